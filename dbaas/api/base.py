@@ -3,6 +3,7 @@ from __future__ import absolute_import, unicode_literals
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from rest_framework.templatetags.rest_framework import replace_query_param
 from django.core.exceptions import ValidationError
 
 
@@ -51,3 +52,52 @@ class ObjectPermissionsFilter(object):
             obj.pk for obj in queryset.all() if user.has_perm(permission, obj=obj)
         ])
         return filtered_queryset
+
+
+class CursorPaginationMixin(object):
+
+    """
+    Keyset pagination for list endpoints, enabled by the `cursor` query
+    param. Each page is read with `WHERE id > cursor ORDER BY id LIMIT n`,
+    so deep pages cost the same as the first one. The `next` link carries
+    the last id of the current page and `count` is not calculated.
+    Set `cursor_descending` to walk from the newest rows.
+    """
+    cursor_query_param = 'cursor'
+    cursor_field = 'id'
+    cursor_descending = False
+
+    def list(self, request, *args, **kwargs):
+        if self.cursor_query_param not in request.QUERY_PARAMS:
+            return super(CursorPaginationMixin, self).list(
+                request, *args, **kwargs
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup, ordering = 'gt', self.cursor_field
+        if self.cursor_descending:
+            lookup, ordering = 'lt', '-' + self.cursor_field
+
+        cursor = request.QUERY_PARAMS.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                **{'{}__{}'.format(self.cursor_field, lookup): cursor}
+            )
+
+        page_size = self.get_paginate_by()
+        objects = list(queryset.order_by(ordering)[:page_size + 1])
+        next_url = None
+        if len(objects) > page_size:
+            objects = objects[:page_size]
+            next_url = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param,
+                getattr(objects[-1], self.cursor_field)
+            )
+
+        serializer = self.get_serializer(objects, many=True)
+        return Response({
+            'count': None,
+            'next': next_url,
+            'previous': None,
+            'results': serializer.data,
+        })
@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from django.contrib.sites.models import Site
 
 from dbaas.middleware import UserMiddleware
+from api.base import CursorPaginationMixin
 from logical.models import Database
 from logical.forms import DatabaseForm
 from physical.models import Plan, Environment
@@ -96,11 +97,13 @@ class DatabaseSerializer(serializers.HyperlinkedModelSerializer):
         )
 
 
-class DatabaseAPI(viewsets.ModelViewSet):
+class DatabaseAPI(CursorPaginationMixin, viewsets.ModelViewSet):
 
     """
     *   ### __List databases__
         __GET__ /api/database/
+    *   ### __List databases with cursor pagination__
+        __GET__ /api/database/?cursor=
     *   ### __To create a new database__
         __POST__ /api/database/
             {
@@ -139,7 +142,13 @@ class DatabaseAPI(viewsets.ModelViewSet):
     )
 
     def get_queryset(self):
-        queryset = self.model.objects.all()
+        queryset = self.model.objects.select_related(
+            'databaseinfra__plan__replication_topology',
+            'databaseinfra__engine__engine_type',
+            'environment', 'team', 'project'
+        ).prefetch_related(
+            'credentials', 'lock__task', 'databaseinfra__instances'
+        )
         params = self.request.GET.dict()
         from_teams = Team.objects.filter(users=self.request.user)
         valid_params = {}
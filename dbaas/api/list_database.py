@@ -3,6 +3,7 @@ from __future__ import absolute_import, unicode_literals
 from rest_framework import viewsets, serializers, status, filters
 from rest_framework import permissions
 import logging
+from api.base import CursorPaginationMixin
 from logical.models import Database
 from physical import models as physical_models
 from .engine_type import EngineTypeSerializer
@@ -39,11 +40,13 @@ class DatabaseSerializer(serializers.ModelSerializer):
         )
 
 
-class DatabaseListAPI(viewsets.ReadOnlyModelViewSet):
+class DatabaseListAPI(CursorPaginationMixin, viewsets.ReadOnlyModelViewSet):
 
     """
     *   ### __List databases__
         __GET__ /api/database_list/
+    *   ### __List databases with cursor pagination__
+        __GET__ /api/database_list/?cursor=
     """
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
     model = Database
@@ -61,5 +64,5 @@ class DatabaseListAPI(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         qs = self.model.objects.all()\
-            .select_related("databaseinfra__engine")
+            .select_related("databaseinfra__engine__engine_type", "team")
         return qs
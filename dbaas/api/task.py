@@ -3,7 +3,9 @@ from __future__ import absolute_import, unicode_literals
 
 from rest_framework import viewsets, serializers, permissions
 from rest_framework import filters
+from django.db.models import Q
 
+from api.base import CursorPaginationMixin
 from notification.models import TaskHistory
 from logical.models import Database, DatabaseHistory
 
@@ -97,10 +99,13 @@ class TaskSerializer(serializers.ModelSerializer):
         return None
 
 
-class TaskAPI(viewsets.ReadOnlyModelViewSet):
+class TaskAPI(CursorPaginationMixin, viewsets.ReadOnlyModelViewSet):
 
     """
     Task API
+
+    *   ### __List tasks with cursor pagination, newest first__
+        __GET__ /api/task/?cursor=
     """
     all_chg_tasks_names = [
         'maintenance.tasks.create_database_rollback',
@@ -184,9 +189,10 @@ class TaskAPI(viewsets.ReadOnlyModelViewSet):
     ordering = ('-created_at',)
     datetime_fields = ('created_at', 'updated_at', 'ended_at')
 
+    cursor_descending = True
+
     def get_queryset(self):
         params = self.request.GET.dict()
-        database = Database.objects.all()
 
         filter_params = {}
         for k, v in params.iteritems():
@@ -194,22 +200,22 @@ class TaskAPI(viewsets.ReadOnlyModelViewSet):
                 filter_params['task_name__in'] = self.chg_tasks_names
             elif k.split('__')[0] in self.filter_fields:
                 filter_params[k] = v
-        result = self.model.objects.filter(**filter_params)
-
-        database_name_list = [
-            db.name
-            for db in database
-            if db.send_all_chg
-        ]
-
-        if database_name_list:
-            filter_param_chg = {
-                'task_name__in': self.chg_tasks_names + self.all_chg_tasks_names,
-                'database_name__in': database_name_list
-            }
-            for key, value in params.iteritems():
-                if key not in ['exclude_system_tasks', 'database_name'] and key.split('__')[0] in self.filter_fields:
-                    filter_param_chg[key] = value
-            result_chg = self.model.objects.filter(**filter_param_chg)
-            return (result_chg | result).order_by('updated_at')
-        return result
+
+        # send_all_chg databases also see their chg tasks, resolved by the
+        # database as a subquery instead of loading every Database
+        filter_param_chg = {
+            'task_name__in': self.chg_tasks_names + self.all_chg_tasks_names,
+            'database_name__in': Database.objects.filter(
+                send_all_chg=True
+            ).values('name')
+        }
+        for key, value in params.iteritems():
+            if key not in ['exclude_system_tasks', 'database_name'] and key.split('__')[0] in self.filter_fields:
+                filter_param_chg[key] = value
+
+        # rollback is read from the details of every task
+        queryset = self.model.objects.prefetch_related('detail_lines')
+        if not filter_params:
+            return queryset
+
+        return queryset.filter(Q(**filter_params) | Q(**filter_param_chg))
@@ -4,6 +4,8 @@ import logging
 from datetime import datetime
 from django.core.urlresolvers import reverse
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from logical.models import Database
 from logical.tests import factory
@@ -93,3 +95,43 @@ class DatabaseAPITestCase(DbaaSAPITestCase, BasicTestsMixin):
         # self.assertTrue(obj.is_in_quarantine)
         # self.assertEqual(obj.quarantine_dt, datetime.now().date())
         # self.assertEqual(obj.quarantine_user.username, self.USERNAME)
+
+    def _list_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        for i in range(6):
+            self.model_create()
+        url = self.url_list()
+        # warm up replication roles cache
+        self.client.get(url)
+
+        self.assertEqual(
+            self._list_queries(url + '?page_size=2'),
+            self._list_queries(url + '?page_size=6')
+        )
+
+    def test_list_with_cursor_pagination(self):
+        databases = [self.model_create() for i in range(3)]
+
+        url = self.url_list() + '?page_size=2&cursor='
+        response = self.client.get(url)
+        data = response.data
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [db['id'] for db in data[self.url_prefix]],
+            [databases[0].id, databases[1].id]
+        )
+        self.assertIn(
+            'cursor={}'.format(databases[1].id), data['_links']['next']
+        )
+
+        response = self.client.get(data['_links']['next'])
+        data = response.data
+        self.assertEqual(
+            [db['id'] for db in data[self.url_prefix]], [databases[2].id]
+        )
+        self.assertIsNone(data['_links']['next'])
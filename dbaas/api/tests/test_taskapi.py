@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from django.test import TestCase
+from django.test.client import RequestFactory
+from api.task import TaskAPI
+from logical.tests.factory import DatabaseFactory
+from notification.models import TaskHistory
+
+
+class TaskAPIQuerysetTestCase(TestCase):
+
+    def setUp(self):
+        self.database = DatabaseFactory(name='mydb')
+        self.other_database = DatabaseFactory(name='otherdb')
+        self.chg_task_name = TaskAPI.all_chg_tasks_names[0]
+        self.own_task = TaskHistory.objects.create(
+            task_name='notification.tasks.create_database',
+            database_name='mydb'
+        )
+        self.other_chg_task = TaskHistory.objects.create(
+            task_name=self.chg_task_name, database_name='otherdb'
+        )
+        self.other_task = TaskHistory.objects.create(
+            task_name='other_task', database_name='otherdb'
+        )
+
+    def get_queryset(self, **params):
+        view = TaskAPI()
+        view.request = RequestFactory().get('/api/task/', params)
+        return view.get_queryset()
+
+    def test_without_filters_returns_all(self):
+        self.assertEqual(self.get_queryset().count(), 3)
+
+    def test_filter_without_send_all_chg(self):
+        self.assertEqual(
+            list(self.get_queryset(database_name='mydb')), [self.own_task]
+        )
+
+    def test_filter_includes_chg_tasks_of_send_all_chg_databases(self):
+        self.other_database.send_all_chg = True
+        self.other_database.save()
+
+        tasks = self.get_queryset(database_name='mydb')
+
+        self.assertItemsEqual(tasks, [self.own_task, self.other_chg_task])
+
+    def test_chg_tasks_keep_other_filters(self):
+        self.other_database.send_all_chg = True
+        self.other_database.save()
+
+        tasks = self.get_queryset(
+            database_name='mydb', task_status=TaskHistory.STATUS_ERROR
+        )
+
+        self.assertEqual(list(tasks), [])
+
+    def test_details_are_prefetched(self):
+        for task in (self.own_task, self.other_chg_task, self.other_task):
+            task.add_detail(message='Step 1')
+            task.flush_details()
+
+        with self.assertNumQueries(2):
+            details = [task.details for task in self.get_queryset()]
+
+        self.assertEqual(details, ['Step 1'] * 3)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import heapq
+import logging
+import time
+from itertools import count
+from multiprocessing.pool import ThreadPool
+from Queue import Queue
+
+from util.concurrency import safe_call, MAX_WAIT
+
+
+LOG = logging.getLogger(__name__)
+
+
+class BackupJob(object):
+
+    def __init__(self, infra, priority=0, environment=None, provider=None,
+                 **kwargs):
+        self.infra = infra
+        self.priority = priority
+        self.environment = environment
+        self.provider = provider
+        self.started_at = None
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        return "<BackupJob infra={} priority={}>".format(
+            self.infra, self.priority
+        )
+
+
+class BackupScheduler(object):
+    """
+    Runs backup jobs in a bounded thread pool, always picking the job with
+    the highest priority among the ones whose environment and volume
+    provider still have free slots. A new job starts as soon as a running
+    one finishes, so the window is bounded by the limits, not by sleeps.
+
+    A limit lower than 1 means unlimited. With one worker the jobs run in
+    the caller thread.
+    """
+
+    def __init__(self, func, workers=1, environment_limit=0,
+                 provider_limit=0):
+        self.func = func
+        self.workers = max(1, workers)
+        self.environment_limit = environment_limit
+        self.provider_limit = provider_limit
+        self._queue = []
+        self._counter = count()
+        self._running = {}
+
+    def add(self, job):
+        # heapq is a min heap; insertion order breaks priority ties
+        heapq.heappush(self._queue, (-job.priority, next(self._counter), job))
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _slots(self, job):
+        return (('environment', job.environment, self.environment_limit),
+                ('provider', job.provider, self.provider_limit))
+
+    def _has_slot(self, job):
+        for kind, key, limit in self._slots(job):
+            if limit > 0 and self._running.get((kind, key), 0) >= limit:
+                return False
+        return True
+
+    def _acquire(self, job, delta=1):
+        for kind, key, _ in self._slots(job):
+            self._running[(kind, key)] = self._running.get((kind, key), 0) + delta
+
+    def _release(self, job):
+        self._acquire(job, delta=-1)
+
+    def _next_job(self):
+        blocked = []
+        job = None
+        while self._queue:
+            item = heapq.heappop(self._queue)
+            if self._has_slot(item[2]):
+                job = item[2]
+                break
+            blocked.append(item)
+        for item in blocked:
+            heapq.heappush(self._queue, item)
+        return job
+
+    def run(self, on_start=None, on_finish=None):
+        """
+        Runs all queued jobs and returns one ParallelResult per job, in
+        completion order. on_start(job) and on_finish(result) are called
+        from the caller thread.
+        """
+        if self.workers == 1:
+            return self._run_serial(on_start, on_finish)
+
+        done = Queue()
+        pool = ThreadPool(self.workers)
+        call = safe_call(self.func)
+        results = []
+        in_flight = 0
+        try:
+            while self._queue or in_flight:
+                job = None
+                if in_flight < self.workers:
+                    job = self._next_job()
+
+                if job is not None:
+                    self._start(job, on_start)
+                    pool.apply_async(call, (job,), callback=done.put)
+                    in_flight += 1
+                    continue
+
+                result = done.get(timeout=MAX_WAIT)
+                in_flight -= 1
+                self._finish(result, results, on_finish)
+        finally:
+            pool.close()
+            pool.join()
+        return results
+
+    def _run_serial(self, on_start, on_finish):
+        call = safe_call(self.func, close_connection=False)
+        results = []
+        job = self._next_job()
+        while job is not None:
+            self._start(job, on_start)
+            self._finish(call(job), results, on_finish)
+            job = self._next_job()
+        return results
+
+    def _start(self, job, on_start):
+        self._acquire(job)
+        job.started_at = time.time()
+        if on_start:
+            on_start(job)
+
+    def _finish(self, result, results, on_finish):
+        self._release(result.item)
+        results.append(result)
+        if on_finish:
+            on_finish(result)
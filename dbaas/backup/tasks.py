@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from logging import getLogger
 from datetime import datetime, date, timedelta
-from time import sleep, strftime
+from time import sleep, strftime, time
 from dbaas.celery import app
 from dbaas_credentials.models import CredentialType
 from drivers.errors import ConnectionError
@@ -9,8 +9,10 @@ from notification.models import TaskHistory
 from physical.models import DatabaseInfra, Environment, Volume
 from system.models import Configuration
 from util.decorators import only_one
+from util.wait import Waiter
 from workflow.steps.util.volume_provider import VolumeProviderSnapshot
 from models import Snapshot, BackupGroup
+from backup.scheduler import BackupJob, BackupScheduler
 from notification.tasks import TaskRegister
 from util import (get_worker_name, get_credentials_for,
                   GetCredentialException)
@@ -255,7 +257,6 @@ def make_instance_gcp_snapshot_backup(
         for _ in range(backup_retry_attempts):
             cont += 1
             try:
-                code = 201
                 response, data = provider.new_take_snapshot(persist=persist)
 
                 if response.status_code < 400:
@@ -277,10 +278,14 @@ def make_instance_gcp_snapshot_backup(
                 else:
                     raise e
 
-        count = 0
         if response.status_code < 400:
-            while code != 200:
-                sleep(20)
+            waiter = Waiter(
+                Configuration.get_by_name_as_int(
+                    'snapshot_status_timeout', default=30*60
+                ),
+                initial_wait=5, max_wait=20
+            )
+            for _ in waiter:
                 snap_response, snap_status = provider.take_snapshot_status(data['identifier'])
                 if snap_response.status_code in [200, 202]:
                     unlock_instance(driver, instance, client)
@@ -288,13 +293,10 @@ def make_instance_gcp_snapshot_backup(
                     break
                 if snap_response.status_code >= 400:
                     raise error
-                if count >= 90:
-                    errormsg = "Timeout"
-                    set_backup_error(infra, snapshot, errormsg)
-                    raise Exception(errormsg)
-                else:
-                    count += 1
-                code = snap_response.status_code
+            else:
+                errormsg = "Timeout"
+                set_backup_error(infra, snapshot, errormsg)
+                raise Exception(errormsg)
 
             snapshot.done(snap_status)
             snapshot.save()
@@ -495,6 +497,117 @@ def update_ssl(self):
         TaskRegister.update_ssl(db, user)
 
 
+def _worst_status(status, other):
+    order = [
+        TaskHistory.STATUS_SUCCESS, TaskHistory.STATUS_WARNING,
+        TaskHistory.STATUS_ERROR
+    ]
+    return max(status, other, key=order.index)
+
+
+def _volume_provider_endpoint(environment, endpoints):
+    if environment.id not in endpoints:
+        try:
+            credential = get_credentials_for(
+                environment, CredentialType.VOLUME_PROVIDER
+            )
+            endpoints[environment.id] = credential.endpoint
+        except GetCredentialException:
+            endpoints[environment.id] = environment.name
+    return endpoints[environment.id]
+
+
+def _wait_database_backup_task(job):
+    task = TaskRegister.database_backup(
+        database=job.database, user=None, automatic=True,
+        current_hour=job.current_hour
+    )
+    running = [TaskHistory.STATUS_WAITING, TaskHistory.STATUS_RUNNING]
+    waiter = Waiter(
+        job.wait_timeout, initial_wait=job.poll_interval,
+        max_wait=job.poll_interval
+    )
+    for _ in waiter:
+        if not TaskHistory.objects.filter(
+            id=task.id, task_status__in=running
+        ).exists():
+            break
+    else:
+        # the worker moves on to the next infra, the task keeps running
+        LOG.error('Backup task {} of {} not finished after {}s'.format(
+            task.id, job.infra, job.wait_timeout
+        ))
+        return TaskHistory.STATUS_WARNING, [
+            "Backup task {} not finished after {}s, not waited".format(
+                task.id, job.wait_timeout
+            )
+        ]
+
+    status = TaskHistory.objects.get(id=task.id).task_status
+    if status not in (TaskHistory.STATUS_SUCCESS, TaskHistory.STATUS_WARNING):
+        status = TaskHistory.STATUS_ERROR
+    return status, ["Backup task {} finished with {}".format(task.id, status)]
+
+
+def _make_infra_backup(job):
+    if job.parallel_backup:
+        return _wait_database_backup_task(job)
+
+    status = TaskHistory.STATUS_SUCCESS
+    msgs = []
+    error = {}
+    group = BackupGroup()
+    group.save()
+
+    for instance in job.instances:
+        try:
+            if job.driver is None:
+                raise job.driver_error
+            is_eligible = job.driver.check_instance_is_eligible_for_backup(
+                instance
+            )
+            if not is_eligible:
+                LOG.info(
+                    'Instance {} is not eligible for backup'.format(instance)
+                )
+                continue
+        except Exception as e:
+            status = TaskHistory.STATUS_ERROR
+            msg = "Backup for %s was unsuccessful. Error: %s" % (
+                str(instance), str(e))
+            LOG.error(msg)
+
+        msgs.append("{} - Starting backup for {} ...".format(
+            strftime("%m/%d/%Y %H:%M:%S"), instance
+        ))
+        try:
+            snapshot = make_instance_snapshot_backup(
+                instance=instance, error=error, group=group,
+                current_hour=job.current_hour
+            )
+            if snapshot and snapshot.was_successful:
+                msg = "Backup for %s was successful" % (str(instance))
+                LOG.info(msg)
+            elif snapshot and snapshot.was_error:
+                status = TaskHistory.STATUS_ERROR
+                msg = "Backup for %s was unsuccessful. Error: %s" % (
+                    str(instance), error['errormsg'])
+                LOG.error(msg)
+            else:
+                status = _worst_status(status, TaskHistory.STATUS_WARNING)
+                msg = "Backup for %s has warning" % (str(instance))
+                LOG.info(msg)
+        except Exception as e:
+            status = TaskHistory.STATUS_ERROR
+            msg = "Backup for %s was unsuccessful. Error: %s" % (
+                str(instance), str(e))
+            LOG.error(msg)
+
+        msgs.append("{} - {}".format(strftime("%m/%d/%Y %H:%M:%S"), msg))
+
+    return status, msgs
+
+
 @app.task(bind=True)
 @only_one(key="makedatabasebackupkey", timeout=60*60*4)
 def make_databases_backup(self):
@@ -505,25 +618,36 @@ def make_databases_backup(self):
     )
     task_history.relevance = TaskHistory.RELEVANCE_ERROR
 
-    backup_group_interval = Configuration.get_by_name_as_int(
-        'backup_group_interval', default=1
-    )
-    backups_per_group = Configuration.get_by_name_as_int(
-        'backups_per_group', default=20
+    scheduler = BackupScheduler(
+        _make_infra_backup,
+        workers=Configuration.get_by_name_as_int(
+            'backup_scheduler_workers', default=10
+        ),
+        environment_limit=Configuration.get_by_name_as_int(
+            'backups_per_group', default=20
+        ),
+        provider_limit=Configuration.get_by_name_as_int(
+            'backups_per_volume_provider', default=10
+        ),
     )
     parallel_backup = Configuration.get_by_name_as_int(
         'parallel_backup', 0
     )
-    waiting_msg = "\nWaiting {} minute(s) to start the next backup group".format(
-        backup_group_interval
+    poll_interval = Configuration.get_by_name_as_int(
+        'parallel_backup_poll_interval', default=10
+    )
+    wait_timeout = Configuration.get_by_name_as_int(
+        'parallel_backup_timeout', default=60*60*3
     )
-    status = TaskHistory.STATUS_SUCCESS
-    environments = Environment.objects.all()
     prod_envs = Environment.prod_envs()
     dev_envs = Environment.dev_envs()
     env_names_order = list(prod_envs) + list(dev_envs)
     if not env_names_order:
-        env_names_order = [env.name for env in environments]
+        env_names_order = [env.name for env in Environment.objects.all()]
+    env_weight = {
+        name: len(env_names_order) - index
+        for index, name in enumerate(env_names_order)
+    }
 
     current_time = datetime.now()
     current_hour = current_time.hour
@@ -544,102 +668,82 @@ def make_databases_backup(self):
     )
 
     # Merging pending and current infras to backup list
-    infras = infras_current_hour | infras_pending_backup
-    for env_name in env_names_order:
-        try:
-            env = environments.get(name=env_name)
-        except Environment.DoesNotExist:
+    infras = (infras_current_hour | infras_pending_backup).select_related(
+        'environment', 'engine__engine_type', 'plan__replication_topology'
+    )
+    endpoints = {}
+    for infra in infras:
+        env = infra.environment
+        database = infra.databases.first()
+        if env.name not in env_weight or not database:
             continue
 
-        msg = '\nStarting Backup for env {}'.format(env.name)
-        task_history.update_details(persist=True, details=msg)
-        databaseinfras_by_env = infras.filter(environment=env)
-        error = {}
-        backup_number = 0
-        for infra in databaseinfras_by_env:
-            if not infra.databases.first():
-                continue
-
-            if backups_per_group > 0:
-                if backup_number < backups_per_group:
-                    backup_number += 1
-                else:
-                    backup_number = 0
-                    task_history.update_details(waiting_msg, True)
-                    sleep(backup_group_interval*60)
-
-            if parallel_backup:
+        # most overdue first, prod environments first on ties
+        overdue = current_hour - infra.backup_hour
+        job = BackupJob(
+            infra,
+            priority=overdue * (len(env_names_order) + 1) + env_weight[env.name],
+            environment=env.name,
+            provider=_volume_provider_endpoint(env, endpoints),
+            database=database,
+            current_hour=current_hour,
+            parallel_backup=parallel_backup,
+            poll_interval=poll_interval,
+            wait_timeout=wait_timeout,
+            driver=None,
+            driver_error=None,
+        )
+        if not parallel_backup:
+            try:
+                job.driver = infra.get_driver()
+            except Exception as e:
+                job.driver_error = e
+            job.instances = list(infra.instances.filter(
+                read_only=False, is_active=True
+            ))
+            for instance in job.instances:
+                instance.databaseinfra = infra
+        scheduler.add(job)
+
+    task_history.update_details(persist=True, details=(
+        "\n{} backup(s) scheduled, {} worker(s), up to {} per environment "
+        "and {} per volume provider").format(
+            len(scheduler), scheduler.workers, scheduler.environment_limit,
+            scheduler.provider_limit
+        )
+    )
+    statuses = [TaskHistory.STATUS_SUCCESS]
 
-                database = infra.databases.first()
-                msg = "\n{} - Starting backup task for {}".format(
-                    strftime("%d/%m/%Y %H:%M:%S"), database
-                )
-                task_history.update_details(persist=True, details=msg)
-                TaskRegister.database_backup(
-                    database=database, user=None, automatic=True, current_hour=current_hour
-                )
+    def on_start(job):
+        task_history.update_details(persist=True, details=(
+            "\n{} - Starting backup task for {} on {}".format(
+                strftime("%d/%m/%Y %H:%M:%S"), job.database, job.environment
+            )
+        ))
 
-            else:
+    def on_finish(result):
+        if result.ok:
+            job_status, msgs = result.result
+        else:
+            job_status = TaskHistory.STATUS_ERROR
+            msgs = ["Backup for {} was unsuccessful. Error: {}".format(
+                result.item.database, result.error
+            )]
+        msgs.append("Backup for {} took {:.2f}s".format(
+            result.item.database, result.elapsed
+        ))
+        statuses.append(job_status)
+        task_history.update_details(
+            persist=True, details="\n" + "\n".join(msgs)
+        )
 
-                group = BackupGroup()
-                group.save()
+    started_at = time()
+    scheduler.run(on_start=on_start, on_finish=on_finish)
 
-                instances_backup = infra.instances.filter(
-                    read_only=False, is_active=True
-                )
-                for instance in instances_backup:
-                    try:
-                        driver = instance.databaseinfra.get_driver()
-                        is_eligible = driver.check_instance_is_eligible_for_backup(
-                            instance
-                        )
-                        if not is_eligible:
-                            LOG.info(
-                                'Instance {} is not eligible for backup'.format(
-                                    instance
-                                )
-                            )
-                            continue
-                    except Exception as e:
-                        status = TaskHistory.STATUS_ERROR
-                        msg = "Backup for %s was unsuccessful. Error: %s" % (
-                            str(instance), str(e))
-                        LOG.error(msg)
-
-                    time_now = str(strftime("%m/%d/%Y %H:%M:%S"))
-                    start_msg = "\n{} - Starting backup for {} ...".format(
-                        time_now, instance
-                    )
-                    task_history.update_details(persist=True, details=start_msg)
-                    try:
-                        snapshot = make_instance_snapshot_backup(
-                            instance=instance, error=error, group=group,
-                            current_hour=current_hour
-                        )
-                        if snapshot and snapshot.was_successful:
-                            msg = "Backup for %s was successful" % (str(instance))
-                            LOG.info(msg)
-                        elif snapshot and snapshot.was_error:
-                            status = TaskHistory.STATUS_ERROR
-                            msg = "Backup for %s was unsuccessful. Error: %s" % (
-                                str(instance), error['errormsg'])
-                            LOG.error(msg)
-                        else:
-                            status = TaskHistory.STATUS_WARNING
-                            msg = "Backup for %s has warning" % (str(instance))
-                            LOG.info(msg)
-                        LOG.info(msg)
-                    except Exception as e:
-                        status = TaskHistory.STATUS_ERROR
-                        msg = "Backup for %s was unsuccessful. Error: %s" % (
-                            str(instance), str(e))
-                        LOG.error(msg)
-
-                    time_now = str(strftime("%m/%d/%Y %H:%M:%S"))
-                    msg = "\n{} - {}".format(time_now, msg)
-                    task_history.update_details(persist=True, details=msg)
-
-    task_history.update_status_for(status, details="\nBackup finished")
+    task_history.update_status_for(
+        reduce(_worst_status, statuses),
+        details="\nBackup finished in {:.2f}s".format(time() - started_at)
+    )
 
     return
 
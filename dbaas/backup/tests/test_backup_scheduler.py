@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import threading
+import time
+from unittest import TestCase
+
+from backup.scheduler import BackupJob, BackupScheduler
+
+
+class BackupSchedulerTestCase(TestCase):
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.max_running = {}
+
+    def run_job(self, job):
+        with self.lock:
+            self.running[job.environment] = (
+                self.running.get(job.environment, 0) + 1
+            )
+            self.max_running[job.environment] = max(
+                self.max_running.get(job.environment, 0),
+                self.running[job.environment]
+            )
+        time.sleep(0.01)
+        with self.lock:
+            self.running[job.environment] -= 1
+        return job.infra
+
+    def test_serial_runs_by_priority(self):
+        scheduler = BackupScheduler(lambda job: job.infra)
+        scheduler.add(BackupJob('low', priority=1))
+        scheduler.add(BackupJob('high', priority=5))
+        scheduler.add(BackupJob('low_2', priority=1))
+
+        results = scheduler.run()
+
+        self.assertEqual(
+            [result.result for result in results], ['high', 'low', 'low_2']
+        )
+
+    def test_environment_limit(self):
+        scheduler = BackupScheduler(
+            self.run_job, workers=4, environment_limit=1
+        )
+        for i in range(4):
+            scheduler.add(BackupJob('dev_{}'.format(i), environment='dev'))
+            scheduler.add(BackupJob('prod_{}'.format(i), environment='prod'))
+
+        results = scheduler.run()
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(self.max_running, {'dev': 1, 'prod': 1})
+
+    def test_provider_limit_across_environments(self):
+        scheduler = BackupScheduler(
+            self.run_job, workers=4, provider_limit=1
+        )
+        for i in range(3):
+            scheduler.add(BackupJob(
+                'infra_{}'.format(i), environment='shared', provider='vp'
+            ))
+
+        scheduler.run()
+
+        self.assertEqual(self.max_running, {'shared': 1})
+
+    def test_error_does_not_stop_other_jobs(self):
+        def run(job):
+            if job.infra == 'broken':
+                raise Exception('Volume provider is down')
+            return job.infra
+
+        scheduler = BackupScheduler(run, workers=2)
+        scheduler.add(BackupJob('broken', priority=2))
+        scheduler.add(BackupJob('ok', priority=1))
+
+        results = scheduler.run()
+
+        self.assertEqual(
+            sorted((result.item.infra, result.ok) for result in results),
+            [('broken', False), ('ok', True)]
+        )
@@ -1,12 +1,14 @@
 from django.test import TestCase
-from mock import patch, call
+from mock import patch, call, MagicMock
 from datetime import datetime, timedelta
 
 from model_mommy import mommy
 
-from backup.tasks import make_databases_backup
+from backup.tasks import make_databases_backup, _wait_database_backup_task
 from backup.models import Snapshot, BackupGroup
+from backup.scheduler import BackupJob
 from dbaas.tests.helpers import DatabaseHelper, InfraHelper, PlanHelper
+from notification.models import TaskHistory
 from physical.models import Environment
 
 
@@ -176,3 +178,53 @@ class TestMakeDatabasesBackup(TestCase):
         make_instance_snapshot_backup.assertEqual(
             snapshot.status, Snapshot.ERROR
         )
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@patch('backup.tasks.TaskRegister.database_backup')
+class TestWaitDatabaseBackupTask(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        clock_patch = patch('util.wait.time', new=self.clock)
+        clock_patch.start()
+        self.addCleanup(clock_patch.stop)
+        self.job = BackupJob(
+            MagicMock(), database=MagicMock(), current_hour=5,
+            poll_interval=10, wait_timeout=60
+        )
+
+    def test_finished_task(self, database_backup):
+        database_backup.return_value = mommy.make(
+            'TaskHistory', task_status=TaskHistory.STATUS_SUCCESS
+        )
+        status, _ = _wait_database_backup_task(self.job)
+
+        self.assertEqual(status, TaskHistory.STATUS_SUCCESS)
+        self.assertEqual(self.clock.now, 0)
+
+    def test_stuck_task_is_not_waited_forever(self, database_backup):
+        task = mommy.make(
+            'TaskHistory', task_status=TaskHistory.STATUS_RUNNING
+        )
+        database_backup.return_value = task
+        status, msgs = _wait_database_backup_task(self.job)
+
+        self.assertEqual(status, TaskHistory.STATUS_WARNING)
+        self.assertIn('not finished after 60s', msgs[0])
+        self.assertEqual(self.clock.now, 60)
+        self.assertEqual(
+            TaskHistory.objects.get(id=task.id).task_status,
+            TaskHistory.STATUS_RUNNING
+        )
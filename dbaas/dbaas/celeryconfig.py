@@ -12,6 +12,9 @@ CELERYD_TASK_TIME_LIMIT = os.getenv('CELERYD_TASK_TIME_LIMIT', '21600')
 CELERY_TRACK_STARTED = True
 CELERY_IGNORE_RESULT = False
 CELERY_RESULT_BACKEND = 'djcelery.backends.cache:CacheBackend'
+# Chords count their finished parts in the result backend, so it must be
+# shared by all workers: the default django cache is local to the process
+CELERY_CACHE_BACKEND = os.getenv('CELERY_CACHE_BACKEND', 'notification')
 CELERYBEAT_MAX_LOOP_INTERVAL = 5
 CELERY_TIMEZONE = os.getenv('DJANGO_TIME_ZONE', 'America/Sao_Paulo')
 CELERYBEAT_SCHEDULER = 'djcelery.schedulers.DatabaseScheduler'
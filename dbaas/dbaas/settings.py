@@ -312,6 +312,22 @@ CACHES = {
     }
 }
 
+# In-process tier in front of the cache for Configuration lookups
+CONFIGURATION_LOCAL_CACHE_TTL = int(
+    os.getenv('DBAAS_CONFIGURATION_LOCAL_CACHE_TTL', '5')
+)
+CONFIGURATION_LOCAL_CACHE_SIZE = int(
+    os.getenv('DBAAS_CONFIGURATION_LOCAL_CACHE_SIZE', '512')
+)
+
+# In-process cache for util.get_credentials_for
+CREDENTIAL_LOCAL_CACHE_TTL = int(
+    os.getenv('DBAAS_CREDENTIAL_LOCAL_CACHE_TTL', '60')
+)
+CREDENTIAL_LOCAL_CACHE_SIZE = int(
+    os.getenv('DBAAS_CREDENTIAL_LOCAL_CACHE_SIZE', '1024')
+)
+
 # AUTHENTICATION_BACKENDS = (
 #   'django_auth_ldap.backend.LDAPBackend',
 #   'account.backends.DbaasBackend',
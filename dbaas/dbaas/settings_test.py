@@ -8,6 +8,10 @@ TEST_DISCOVER_ROOT = os.path.abspath(os.path.join(__file__, '../..'))
 LOGGING = {}
 DEBUG = 0
 TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
+# rolled back test data does not fire the signals that clear these caches,
+# and cache.clear() only reaches the shared tier
+CONFIGURATION_LOCAL_CACHE_TTL = 0
+CREDENTIAL_LOCAL_CACHE_TTL = 0
 NOSE_ARGS = [
     '--verbosity=2',
     '--no-byte-compile',
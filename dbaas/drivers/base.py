@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 import logging
+import time
 from collections import Iterable
 from util import get_credentials_for
 
+from django.core.cache import cache
 from django.utils.translation import ugettext_lazy as _
 
-from .errors import ConnectionError
+from util.concurrency import parallel_map
+from util.wait import wait_until, WaitTimeout
+from .errors import (ConnectionError, ReplicationError,
+                     ReplicationNotRunningError)
 
 
 LOG = logging.getLogger(__name__)
 
+SWITCHOVER_INITIAL_WAIT = 0.5
+SWITCHOVER_CHECK_SECONDS = 10
+
 __all__ = ['BaseDriver', 'DatabaseStatus', 'DatabaseInfraStatus']
 
 
@@ -27,6 +35,9 @@ class BaseDriver(object):
     # must be overwritten by subclasses
     default_port = 0
 
+    # seconds behind the master that still count as replication ok
+    max_replication_lag = 0
+
     def __init__(self, *args, **kwargs):
 
         if 'databaseinfra' in kwargs:
@@ -35,12 +46,57 @@ class BaseDriver(object):
         else:
             raise TypeError(_("DatabaseInfra is not defined"))
 
-    def _masters_size_in_bytes(self, field_lookup):
+    def _masters_size_in_bytes(self, field_lookup, force_refresh=False):
+        masters = self.get_cached_master_instances(force_refresh)
+        return sum(map(lambda m: getattr(m, field_lookup) or 0, masters))
+
+    @property
+    def replication_roles_cache_key(self):
+        return "datainfra:roles:%d" % self.databaseinfra.pk
+
+    def get_cached_master_instances(self, force_refresh=False):
+        """
+            Return the master instances of infra using the replication role
+            cache. Instances are only probed if the cache is empty or
+            force_refresh is True. No master found (e.g. during a failover)
+            is never cached, so the next call probes again.
+        """
+        from system.models import Configuration
+
+        master_ids = None
+        if not force_refresh:
+            master_ids = cache.get(self.replication_roles_cache_key)
+
+        if master_ids:
+            # all() instead of filter() to use prefetched instances
+            return [
+                instance for instance in self.databaseinfra.instances.all()
+                if instance.id in master_ids
+            ]
+
         masters = self.get_master_instance()
         if not masters:
-            return 0
-        masters = [masters] if not isinstance(masters, Iterable) else masters
-        return sum(map(lambda m: getattr(m, field_lookup) or 0, masters))
+            masters = []
+        elif not isinstance(masters, Iterable):
+            masters = [masters]
+
+        if not masters:
+            return masters
+
+        cache.set(
+            self.replication_roles_cache_key,
+            [master.id for master in masters],
+            Configuration.get_by_name_as_int(
+                'replication_roles_cache_ttl', default=300
+            )
+        )
+        return masters
+
+    def refresh_replication_roles(self):
+        return self.get_cached_master_instances(force_refresh=True)
+
+    def invalidate_replication_roles(self):
+        cache.delete(self.replication_roles_cache_key)
 
     @property
     def ports(self):
@@ -250,6 +306,29 @@ class BaseDriver(object):
     def is_replication_ok(self, instance):
         raise NotImplementedError()
 
+    def replication_lag_for(self, instances):
+        """
+        Returns {instance: seconds behind the master}, or None when the
+        replication is not running, checking all instances at once.
+        Drivers that see every member in one call should override it.
+        """
+        def lag_of(instance):
+            try:
+                return self.get_replication_info(instance)
+            except ReplicationNotRunningError:
+                return None
+
+        lags = {}
+        for result in parallel_map(lag_of, instances, len(instances)):
+            if not result.ok:
+                raise ReplicationError(
+                    'Could not check the replication of {}: {}'.format(
+                        result.item, result.error
+                    )
+                )
+            lags[result.item] = result.result
+        return lags
+
     def switch_master(self, instance=None, preferred_slave_instance=None):
         raise NotImplementedError()
 
@@ -345,31 +424,82 @@ class BaseDriver(object):
         self.agents_command(
             host, "stop", no_output=no_output, raise_if_error=raise_if_error)
 
+    def wait_replication_caught_up(self, instance, timeout):
+        """
+        Waits up to timeout seconds for is_replication_ok, checking right
+        away and then backing off from under a second to
+        SWITCHOVER_CHECK_SECONDS. Drivers with an engine native wait
+        should override it.
+        """
+        try:
+            wait_until(
+                lambda: self.is_replication_ok(instance), timeout,
+                initial_wait=SWITCHOVER_INITIAL_WAIT,
+                max_wait=SWITCHOVER_CHECK_SECONDS,
+                description='Replication of {}'.format(instance)
+            )
+        except WaitTimeout:
+            return False
+        return True
+
+    def wait_master_changed(self, instance, timeout):
+        try:
+            wait_until(
+                lambda: not self.check_instance_is_master(
+                    instance, default_timeout=False
+                ), timeout,
+                initial_wait=SWITCHOVER_INITIAL_WAIT,
+                max_wait=SWITCHOVER_CHECK_SECONDS,
+                description='Master change of {}'.format(instance)
+            )
+        except WaitTimeout:
+            return False
+        return True
+
+    def switchover(self, instance, switch, attempts=100,
+                   check_is_master_attempts=5):
+        """
+        Switches the master out of instance as soon as its replication is
+        ok and waits for it to stop being the master. The budgets are the
+        ones of the old fixed polling, attempts of 10 seconds each.
+        Returns how many seconds it took.
+        """
+        started_at = time.time()
+        if not self.wait_replication_caught_up(
+                instance, attempts * SWITCHOVER_CHECK_SECONDS):
+            raise Exception(
+                "Could not switch master because of replication's delay"
+            )
+
+        switch()
+        self.invalidate_replication_roles()
+        LOG.info("Switch master returned ok...")
+
+        if not self.wait_master_changed(
+                instance, check_is_master_attempts * SWITCHOVER_CHECK_SECONDS):
+            raise Exception("Could not change master")
+
+        elapsed = time.time() - started_at
+        self.record_switchover_time(elapsed)
+        return elapsed
+
+    def record_switchover_time(self, elapsed):
+        """
+        Logs the switchover time as key=value pairs for the log pipeline;
+        the steps also keep it in the task details.
+        """
+        LOG.info(
+            "switchover_seconds=%.2f infra=%s engine=%s",
+            elapsed, self.databaseinfra.name, self.name
+        )
+
     def check_replication_and_switch(self, instance, attempts=100,
                                      check_is_master_attempts=5,
                                      preferred_slave_instance=None):
-        from time import sleep
-        for attempt in range(0, attempts):
-            if self.is_replication_ok(instance):
-                self.switch_master(instance, preferred_slave_instance)
-                LOG.info("Switch master returned ok...")
-
-                check_is_master_attempts_count = check_is_master_attempts
-                while self.check_instance_is_master(instance,
-                                                    default_timeout=False):
-                    if check_is_master_attempts_count == 0:
-                        break
-                    check_is_master_attempts_count -= 1
-                    sleep(10)
-                else:
-                    return
-
-                raise Exception("Could not change master")
-
-            LOG.info("Waiting 10s to check replication...")
-            sleep(10)
-        raise Exception(
-            "Could not switch master because of replication's delay"
+        return self.switchover(
+            instance,
+            lambda: self.switch_master(instance, preferred_slave_instance),
+            attempts, check_is_master_attempts
         )
 
     def check_replication_and_switch_with_stepdown_time(self, instance, attempts=100,
@@ -377,28 +507,12 @@ class BaseDriver(object):
                                                         preferred_slave_instance=None,
                                                         stepdown_time=60):
         LOG.info("Check Replication with StepDown time of %s seconds", stepdown_time)
-        from time import sleep
-        for attempt in range(0, attempts):
-            if self.is_replication_ok(instance):
-                self.switch_master_with_stepdowntime(instance, preferred_slave_instance, stepdown_time)
-                LOG.info("Switch master returned ok...")
-
-                check_is_master_attempts_count = check_is_master_attempts
-                while self.check_instance_is_master(instance,
-                                                    default_timeout=False):
-                    if check_is_master_attempts_count == 0:
-                        break
-                    check_is_master_attempts_count -= 1
-                    sleep(10)
-                else:
-                    return
-
-                raise Exception("Could not change master")
-
-            LOG.info("Waiting 10s to check replication...")
-            sleep(10)
-        raise Exception(
-            "Could not switch master because of replication's delay"
+        return self.switchover(
+            instance,
+            lambda: self.switch_master_with_stepdowntime(
+                instance, preferred_slave_instance, stepdown_time
+            ),
+            attempts, check_is_master_attempts
         )
 
     def get_database_agents(self):
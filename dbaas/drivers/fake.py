@@ -29,7 +29,7 @@ class FakeDriver(BaseDriver):
         return DATABASES_INFRA[self.databaseinfra.name]
 
     def concatenate_instances(self):
-        return ",".join(["%s:%s" % (instance.address, instance.port) for instance in self.databaseinfra.instances.exclude(instance_type=Instance.MONGODB_ARBITER).filter(is_active=True).all()])
+        return ",".join(["%s:%s" % (instance.address, instance.port) for instance in self.databaseinfra.instances.all() if instance.instance_type != Instance.MONGODB_ARBITER and instance.is_active])
 
     def get_connection(self, database=None):
         return "fake://%s" % self.concatenate_instances()
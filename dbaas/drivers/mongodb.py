@@ -27,9 +27,72 @@ MONGO_SERVER_SELECTION_DEFAULT_TIMEOUT = 5
 MONGO_SOCKET_TIMEOUT = 5
 
 
+class ReplicaSetStatus(object):
+    """
+    One replSetGetStatus answer: state, optime and lag of every member,
+    so all of them are checked with a single round-trip.
+    """
+
+    def __init__(self, status):
+        self.members = {}
+        self.primary = None
+        for member in status['members']:
+            self.members[member['name']] = member
+            if member['stateStr'] == 'PRIMARY':
+                self.primary = member
+
+    @staticmethod
+    def optime(member):
+        return member['optimeDate'].replace(
+            tzinfo=tz.tzutc()).astimezone(tz.tzlocal())
+
+    def member(self, instance):
+        name = "{}:{}".format(instance.address, instance.port)
+        try:
+            return self.members[name]
+        except KeyError:
+            raise ReplicationNoInstances(
+                "Could not find the instance in the Replica Set"
+            )
+
+    def is_primary(self, instance):
+        member = self.members.get(
+            "{}:{}".format(instance.address, instance.port)
+        )
+        return member is not None and member['stateStr'] == 'PRIMARY'
+
+    def lag(self, instance):
+        """ Seconds the instance is behind the primary """
+        if self.is_primary(instance):
+            return 0
+
+        if self.primary is None:
+            raise ReplicationNoPrimary(
+                "There is not any Primary in the Replica Set"
+            )
+
+        member = self.member(instance)
+        delay = self.optime(self.primary) - self.optime(member)
+        seconds_delay = delay.days * 24 * 3600 + delay.seconds
+        LOG.info("The instance {} is {} seconds behind Primary".format(
+            instance, seconds_delay)
+        )
+
+        if (seconds_delay == 0
+                and member["stateStr"] not in ["PRIMARY", "SECONDARY"]):
+            LOG.info(
+                ("The instance {} is 0 seconds behind Primary, but it is not "
+                 "Secondary. It is {}".format(instance, member["stateStr"]))
+            )
+            return 100000
+
+        return seconds_delay
+
+
 class MongoDB(BaseDriver):
 
     default_port = 27017
+    max_replication_lag = 2
 
     RESERVED_DATABASES_NAME = ['admin', 'config', 'local']
 
@@ -80,12 +143,12 @@ class MongoDB(BaseDriver):
         return repl_name
 
     def __concatenate_instances(self):
+        # filtered in python to use prefetched instances on listings
         return ",".join(
             ["{}:{}".format(instance.address, instance.port)
-             for instance in self.databaseinfra.instances.filter(
-                instance_type=Instance.MONGODB,
-                is_active=True,
-                read_only=False).all()]
+             for instance in self.databaseinfra.instances.all()
+             if instance.instance_type == Instance.MONGODB and
+             instance.is_active and not instance.read_only]
         )
 
     def __concatenate_instances_dns(self):
@@ -351,19 +414,16 @@ class MongoDB(BaseDriver):
             databaseinfra_status.used_size_in_bytes = json_list_databases.get(
                 'totalSize', 0)
 
-            list_databases = self.list_databases()
+            # the server answered both commands above, on this client
+            list_databases = [
+                db['name'] for db in json_list_databases.get('databases', [])
+            ]
             for database in self.databaseinfra.databases.all():
                 database_name = database.name
                 json_db_status = getattr(
                     client, database_name).command('dbStats')
                 db_status = DatabaseStatus(database)
-                # is_alive?
-                try:
-                    if (self.check_status()
-                            and (database_name in list_databases)):
-                        db_status.is_alive = True
-                except Exception:
-                    pass
+                db_status.is_alive = database_name in list_databases
 
                 storageSize = json_db_status.get("storageSize") or 0
                 db_status.used_size_in_bytes = storageSize
@@ -460,55 +520,25 @@ class MongoDB(BaseDriver):
                         self.databaseinfra, e.message)
                 )
 
-    def get_replication_info(self, instance):
-        if self.check_instance_is_master(instance=instance,
-                                         default_timeout=False):
-            return 0
-
-        instance_opttime = None
-        instance_member = None
-        with self.pymongo() as client:
-            replSetGetStatus = client.admin.command('replSetGetStatus')
-            primary_opttime = None
-            for member in replSetGetStatus['members']:
-                if member['stateStr'] == 'PRIMARY':
-                    primary_opttime = member['optimeDate'].replace(
-                        tzinfo=tz.tzutc()).astimezone(tz.tzlocal())
-
-            if primary_opttime is None:
-                raise ReplicationNoPrimary(
-                    "There is not any Primary in the Replica Set"
-                )
-
-            for member in replSetGetStatus['members']:
-                if member["name"] == "{}:{}".format(instance.address,
-                                                    instance.port):
-                    instance_opttime = member['optimeDate'].replace(
-                        tzinfo=tz.tzutc()).astimezone(tz.tzlocal())
-                    instance_member = member
-
-        if instance_opttime is None:
-            raise ReplicationNoInstances(
-                "Could not find the instance in the Replica Set"
+    def get_replication_topology(self, default_timeout=False):
+        with self.pymongo(default_timeout=default_timeout) as client:
+            return ReplicaSetStatus(
+                client.admin.command('replSetGetStatus')
             )
 
-        delay = primary_opttime - instance_opttime
-        seconds_delay = delay.days * 24 * 3600 + delay.seconds
-        LOG.info("The instance {} is {} seconds behind Primary".format(
-            instance, seconds_delay)
+    def _is_single_instance(self, instance):
+        return (
+            instance.instance_type != instance.MONGODB_ARBITER and
+            instance.is_active and
+            self.databaseinfra.instances.filter(is_active=True).count() == 1
         )
 
-        if (seconds_delay == 0
-                and instance_member["stateStr"]
-                not in ["PRIMARY", "SECONDARY"]):
-            LOG.info(
-                ("The instance {} is 0 seconds behind Primary, but it is not "
-                 "Secondary. It is {}".format(
-                    instance, instance_member["stateStr"]))
-            )
-            return 100000
+    def get_replication_info(self, instance, topology=None):
+        if self._is_single_instance(instance):
+            return 0
 
-        return seconds_delay
+        topology = topology or self.get_replication_topology()
+        return topology.lag(instance)
 
     def get_max_replica_id(self, ):
         with self.pymongo() as client:
@@ -520,16 +550,56 @@ class MongoDB(BaseDriver):
                     max_id = repl_id
             return max_id
 
-    def is_replication_ok(self, instance):
-        if self.check_instance_is_master(instance=instance,
-                                         default_timeout=False):
-            return True
-
-        if self.get_replication_info(instance=instance) <= 2:
+    def is_replication_ok(self, instance, topology=None):
+        if (self.get_replication_info(instance, topology=topology)
+                <= self.max_replication_lag):
             return True
 
         return False
 
+    def replication_lag_for(self, instances):
+        topology = None
+        if not all(map(self._is_single_instance, instances)):
+            topology = self.get_replication_topology()
+
+        return {
+            instance: self.get_replication_info(instance, topology=topology)
+            for instance in instances
+        }
+
+    def get_master_instance(self, ignore_instance=None, default_timeout=False):
+        if self.databaseinfra.instances.filter(is_active=True).count() == 1:
+            return super(MongoDB, self).get_master_instance(
+                ignore_instance, default_timeout
+            )
+
+        try:
+            topology = self.get_replication_topology(default_timeout)
+        except (pymongo.errors.PyMongoError, ConnectionError) as e:
+            LOG.warning(
+                "Could not get the replica set status of {}: {}".format(
+                    self.databaseinfra, e
+                )
+            )
+            return super(MongoDB, self).get_master_instance(
+                ignore_instance, default_timeout
+            )
+
+        instances = self.get_database_instances()
+        if ignore_instance:
+            instances.remove(ignore_instance)
+        for instance in instances:
+            if not instance.is_active:
+                continue
+            if topology.is_primary(instance):
+                return instance
+            if instance.hostname.future_host:
+                instance.address = instance.hostname.future_host.address
+                if topology.is_primary(instance):
+                    return instance
+
+        return None
+
     def deprecated_files(self,):
         return ['*.lock', 'mongod.running', '*.backup']
 
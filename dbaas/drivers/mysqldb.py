@@ -2,6 +2,7 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 import datetime
+import time
 import logging
 import _mysql as mysqldb
 import _mysql_exceptions
@@ -153,7 +154,8 @@ class MySQL(BaseDriver):
     def mysqldb(self, instance=None, database=None):
         client = None
         try:
-            yield self.__mysql_client__(instance)
+            client = self.__mysql_client__(instance)
+            yield client
         except _mysql_exceptions.OperationalError as e:
             if e.args[0] == ER_ACCESS_DENIED_ERROR:
                 raise driver_errors.AuthenticationError(e.args[1])
@@ -180,30 +182,33 @@ class MySQL(BaseDriver):
 
     def __query(self, query_string, instance=None):
         with self.mysqldb(instance=instance) as client:
-            try:
-                LOG.debug("query_string: %s" % query_string)
-                client.query(query_string)
-                r = client.store_result()
-                if r is not None:
-                    return r.fetch_row(maxrows=0, how=1)
-            except _mysql_exceptions.ProgrammingError as e:
-                LOG.error("__query ProgrammingError: %s" % e)
-                if e.args[0] == ER_DB_CREATE_EXISTS:
-                    raise driver_errors.DatabaseAlreadyExists(e.args[1])
-                else:
-                    raise driver_errors.GenericDriverError(e.args)
-            except _mysql_exceptions.OperationalError as e:
-                LOG.error("__query OperationalError: %s" % e)
-                if e.args[0] == ER_DB_DROP_EXISTS:
-                    raise driver_errors.DatabaseDoesNotExist(e.args[1])
-                elif e.args[0] == ER_CANNOT_USER:
-                    raise driver_errors.InvalidCredential(e.args[1])
-                elif e.args[0] == ER_WRONG_STRING_LENGTH:
-                    raise driver_errors.InvalidCredential(e.args[1])
-                else:
-                    raise driver_errors.GenericDriverError(e.args)
-            except Exception as e:
+            return self.__run_query(client, query_string)
+
+    def __run_query(self, client, query_string):
+        try:
+            LOG.debug("query_string: %s" % query_string)
+            client.query(query_string)
+            r = client.store_result()
+            if r is not None:
+                return r.fetch_row(maxrows=0, how=1)
+        except _mysql_exceptions.ProgrammingError as e:
+            LOG.error("__query ProgrammingError: %s" % e)
+            if e.args[0] == ER_DB_CREATE_EXISTS:
+                raise driver_errors.DatabaseAlreadyExists(e.args[1])
+            else:
                 raise driver_errors.GenericDriverError(e.args)
+        except _mysql_exceptions.OperationalError as e:
+            LOG.error("__query OperationalError: %s" % e)
+            if e.args[0] == ER_DB_DROP_EXISTS:
+                raise driver_errors.DatabaseDoesNotExist(e.args[1])
+            elif e.args[0] == ER_CANNOT_USER:
+                raise driver_errors.InvalidCredential(e.args[1])
+            elif e.args[0] == ER_WRONG_STRING_LENGTH:
+                raise driver_errors.InvalidCredential(e.args[1])
+            else:
+                raise driver_errors.GenericDriverError(e.args)
+        except Exception as e:
+            raise driver_errors.GenericDriverError(e.args)
 
     def query(self, query_string, instance=None):
         return self.__query(query_string, instance)
@@ -225,50 +230,33 @@ class MySQL(BaseDriver):
         )
 
     def info(self):
-        from logical.models import Database
-
         databaseinfra_status = DatabaseInfraStatus(
             databaseinfra_model=self.databaseinfra)
 
-        r = self.__query("SELECT VERSION()")
-        databaseinfra_status.version = r[0]['VERSION()']
+        with self.mysqldb() as client:
+            r = self.__run_query(client, "SELECT VERSION()")
+            databaseinfra_status.version = r[0]['VERSION()']
 
-        db_sizes = self.__query("SELECT s.schema_name 'Database', ifnull(SUM( t.data_length + t.index_length), 0) 'Size' \
-                                FROM information_schema.SCHEMATA s \
-                                  left outer join information_schema.TABLES t on s.schema_name = t.table_schema \
-                                GROUP BY s.schema_name")
+            db_sizes = self.__run_query(client, "SELECT s.schema_name 'Database', ifnull(SUM( t.data_length + t.index_length), 0) 'Size' \
+                                    FROM information_schema.SCHEMATA s \
+                                      left outer join information_schema.TABLES t on s.schema_name = t.table_schema \
+                                    GROUP BY s.schema_name")
 
         all_dbs = {}
         for database in db_sizes:
             all_dbs[database['Database']] = int(database['Size'])
 
-        list_databases = self.list_databases()
-        for database_name in all_dbs.keys():
-            database_model = None
-            try:
-                # LOG.debug("checking status for database %s" % database_name)
-                database_model = Database.objects.get(
-                    name=database_name, databaseinfra=self.databaseinfra)
-            except Database.DoesNotExist:
-                pass
-
-            if database_model:
-                db_status = DatabaseStatus(database_model)
-                # is_alive?
-                try:
-                    if self.check_status() and (database_name in list_databases):
-                        db_status.is_alive = True
-                except Exception as e:
-                    LOG.warning(
-                        "could not retrieve db status for %s: %s" % (
-                            database_name, e)
-                        )
-
-                db_status.total_size_in_bytes = 0
-                db_status.used_size_in_bytes = all_dbs[database_name]
-
-                databaseinfra_status.databases_status[
-                    database_name] = db_status
+        # the server answered on this connection, every schema listed is up
+        for database_model in self.databaseinfra.databases.filter(
+                name__in=all_dbs.keys()):
+            database_name = database_model.name
+            db_status = DatabaseStatus(database_model)
+            db_status.is_alive = True
+            db_status.total_size_in_bytes = 0
+            db_status.used_size_in_bytes = all_dbs[database_name]
+
+            databaseinfra_status.databases_status[
+                database_name] = db_status
 
         databaseinfra_status.used_size_in_bytes = sum(all_dbs.values())
 
@@ -430,6 +418,44 @@ class MySQL(BaseDriver):
     def switch_master(self, instance=None, preferred_slave_instance=None):
         return self.replication_topology_driver.switch_master(driver=self)
 
+    def wait_replication_caught_up(self, instance, timeout):
+        """
+        Waits with MASTER_POS_WAIT on the instances that replicate from
+        instance until they apply its current binlog position, then
+        checks the replication as usual with the time left.
+        """
+        started_at = time.time()
+        master_status = self.__query("SHOW MASTER STATUS", instance=instance)
+        if master_status:
+            log_file = master_status[0]['File']
+            log_pos = int(master_status[0]['Position'])
+            for peer in self.get_database_instances():
+                if peer == instance or not peer.is_active:
+                    continue
+                slave_status = self.__query(
+                    "SHOW SLAVE STATUS", instance=peer
+                )
+                if (not slave_status or
+                        slave_status[0]['Master_Host'] != instance.address):
+                    continue
+
+                remaining = max(1, int(timeout - (time.time() - started_at)))
+                result = self.__query(
+                    "SELECT MASTER_POS_WAIT('{}', {}, {}) AS pos_wait".format(
+                        log_file, log_pos, remaining
+                    ), instance=peer
+                )
+                pos_wait = result[0]['pos_wait']
+                if pos_wait is None or int(pos_wait) < 0:
+                    LOG.info("{} did not reach {}:{} of {}".format(
+                        peer, log_file, log_pos, instance
+                    ))
+                    return False
+
+        return super(MySQL, self).wait_replication_caught_up(
+            instance, max(0, timeout - (time.time() - started_at))
+        )
+
     def start_slave(self, instance):
         client = self.get_client(instance)
         client.query("start slave")
@@ -21,6 +21,8 @@ LOG = logging.getLogger(__name__)
 CLONE_DATABASE_SCRIPT_NAME = "redis_clone.py"
 REDIS_CONNECTION_DEFAULT_TIMEOUT = 5
 REDIS_CONNECTION_SOCKET_TIMEOUT = 3
+# under the socket timeout, WAIT blocks the connection while it runs
+REDIS_SWITCHOVER_WAIT_SECONDS = 1
 
 
 class Redis(BaseDriver):
@@ -216,15 +218,11 @@ class Redis(BaseDriver):
                 'used_memory', 0
             )
 
+            # the server answered INFO on this client, no need to ping it
             for database in self.databaseinfra.databases.all():
                 database_name = database.name
                 db_status = DatabaseStatus(database)
-
-                try:
-                    if self.check_status():
-                        db_status.is_alive = True
-                except:
-                    pass
+                db_status.is_alive = True
 
                 db_status.total_size_in_bytes = 0
                 db_status.used_size_in_bytes = infra_status.used_size_in_bytes
@@ -279,6 +277,29 @@ class Redis(BaseDriver):
     def switch_master(self, instance=None, preferred_slave_instance=None):
         pass
 
+    def wait_replication_caught_up(self, instance, timeout):
+        """
+        When instance is a master with replicas, WAITs for all of them to
+        acknowledge its writes before checking the replication as usual.
+        """
+        with self.redis(instance=instance) as client:
+            replication = client.info('replication')
+            replicas = int(replication.get('connected_slaves', 0))
+            if replication.get('role') == 'master' and replicas:
+                wait_ms = int(
+                    1000 * min(timeout, REDIS_SWITCHOVER_WAIT_SECONDS)
+                )
+                acked = client.execute_command(
+                    'WAIT', replicas, max(1, wait_ms)
+                )
+                LOG.info("{} of {} replicas of {} acknowledged".format(
+                    acked, replicas, instance
+                ))
+
+        return super(Redis, self).wait_replication_caught_up(
+            instance, timeout
+        )
+
     def get_database_agents(self):
         return ['httpd']
 
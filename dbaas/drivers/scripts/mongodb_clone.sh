@@ -16,62 +16,21 @@ port_dest=${10}
 
 pass2clone2=$(echo "${pass2clone#*=}")
 pass_dest2=$(echo "${pass_dest#*=}")
-path_of_dump=${11}/${db_dest}_$(echo $RANDOM)
-
-echo $(date "+%Y-%m-%d %T") "- Creating temporary dir..."
-mkdir -p ${path_of_dump}
-ret=$?
-if [ ${ret} -ne 0 ]
-then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on creating temporary dir"
-    exit ${ret}
-fi
-
-echo ""; echo $(date "+%Y-%m-%d %T") "- Dumping source database..."
-mongodump -h ${host2clone} --port ${port2clone} -u ${user2clone} -p ${pass2clone2} -d ${db2clone} --authenticationDatabase admin -o ${path_of_dump}
-ret=$?
-if [ ${ret} -ne 0 ]
-then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on dumping source database"
-    rm -rf ${path_of_dump}
-    exit ${ret}
-fi
-
-echo ""; echo $(date "+%Y-%m-%d %T") "- Deleting users from dump..."
-rm -f ${path_of_dump}/${db2clone}/system.users.metadata.json
-ret=$?
-if [ ${ret} -ne 0 ]
-then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on deleting users from dump"
-    rm -rf ${path_of_dump}
-    exit ${ret}
-fi
-
-rm -f ${path_of_dump}/${db2clone}/system.users.bson
-ret=$?
-if [ ${ret} -ne 0 ]
-then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on deleting users from dump"
-    rm -rf ${path_of_dump}
-    exit ${ret}
-fi
-
-echo ""; echo $(date "+%Y-%m-%d %T") "- Restoring target database..."
-mongorestore -h ${host_dest} --port ${port_dest} -u ${user_dest} -p ${pass_dest2} -d ${db_dest} --authenticationDatabase admin ${path_of_dump}/${db2clone}
-ret=$?
-if [ ${ret} -ne 0 ]
-then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on restoring target database"
-    rm -rf ${path_of_dump}
-    exit ${ret}
-fi
-
-echo ""; echo $(date "+%Y-%m-%d %T") "- Deleting temporary files..."
-rm -rf ${path_of_dump}
+parallel=${CLONE_PARALLEL:-4}
+
+# The dump is streamed as an archive straight into mongorestore, so it is
+# never written to disk. Both sides copy CLONE_PARALLEL collections at a
+# time and the users collection is left out of the restore. Collections
+# are dropped before being restored, so a retry starts from scratch.
+echo $(date "+%Y-%m-%d %T") "- Cloning database, ${parallel} collections at a time..."
+set -o pipefail
+mongodump -h ${host2clone} --port ${port2clone} -u ${user2clone} -p ${pass2clone2} -d ${db2clone} --authenticationDatabase admin --archive --numParallelCollections ${parallel} |
+    mongorestore -h ${host_dest} --port ${port_dest} -u ${user_dest} -p ${pass_dest2} --authenticationDatabase admin --archive --drop --numParallelCollections ${parallel} --nsInclude "${db2clone}.*" --nsExclude "${db2clone}.system.users" --nsFrom "${db2clone}.*" --nsTo "${db_dest}.*"
 ret=$?
+set +o pipefail
 if [ ${ret} -ne 0 ]
 then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on deleting temporary files"
+    echo $(date "+%Y-%m-%d %T") "- ERROR on cloning database"
     exit ${ret}
 fi
 
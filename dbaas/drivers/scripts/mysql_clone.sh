@@ -16,45 +16,116 @@ port_dest=${10}
 
 pass2clone2=$(echo "${pass2clone#*=}")
 pass_dest2=$(echo "${pass_dest#*=}")
-path_of_dump=${11}/${db_dest}_$(echo $RANDOM)
 
-echo $(date "+%Y-%m-%d %T") "- Creating temporary dir..."
-mkdir -p ${path_of_dump}
+# Tables are streamed from mysqldump straight into mysql, CLONE_PARALLEL
+# at a time, with the client protocol compressed. Each table copied is
+# marked in the state dir, so a retry only copies the missing ones.
+# Tables dumped apart are not consistent with each other; CLONE_CONSISTENT=1
+# copies all of them in a single transaction instead, from scratch on
+# every run. CLONE_STATE_DIR must be unique per destination database.
+state_dir=${CLONE_STATE_DIR:-${11}/${db_dest}.clone}
+parallel=${CLONE_PARALLEL:-4}
+consistent=${CLONE_CONSISTENT:-0}
+
+export db2clone db_dest state_dir
+export src_args="-h ${host2clone} --port ${port2clone} -u ${user2clone} -p${pass2clone2} --compress"
+export dest_args="-h ${host_dest} --port ${port_dest} -u ${user_dest} -p${pass_dest2} --compress"
+
+clone_table()
+{
+    set -o pipefail
+    local table=${1}
+    [ -f "${state_dir}/done/${table}" ] && return 0
+
+    mysql ${dest_args} ${db_dest} -e "SET FOREIGN_KEY_CHECKS=0; TRUNCATE TABLE \`${table}\`" &&
+    mysqldump ${src_args} --no-create-info --skip-triggers ${db2clone} "${table}" |
+        mysql ${dest_args} ${db_dest} &&
+    touch "${state_dir}/done/${table}" &&
+    echo $(date "+%Y-%m-%d %T") "- Table ${table} cloned"
+}
+export -f clone_table
+
+echo $(date "+%Y-%m-%d %T") "- Creating state dir..."
+mkdir -p ${state_dir}/done
 ret=$?
 if [ ${ret} -ne 0 ]
 then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on creating temporary dir"
+    echo $(date "+%Y-%m-%d %T") "- ERROR on creating state dir"
     exit ${ret}
 fi
 
-echo ""; echo $(date "+%Y-%m-%d %T") "- Dumping source database..."
-mysqldump -h ${host2clone} --port ${port2clone} -u ${user2clone} -p${pass2clone2} --routines ${db2clone} > ${path_of_dump}/mysql.dump
-ret=$?
+if [ -f ${state_dir}/schema ]
+then
+    # the state is only valid while the destination has all its tables
+    mysql ${dest_args} -N -B -e "SELECT table_name FROM information_schema.tables WHERE table_schema = '${db_dest}' AND table_type = 'BASE TABLE'" > ${state_dir}/dest_tables
+    ret=$?
+    if [ ${ret} -ne 0 ]
+    then
+        echo $(date "+%Y-%m-%d %T") "- ERROR on listing destination tables"
+        exit ${ret}
+    fi
+    if [ -n "$(sort ${state_dir}/chunks | comm -23 - <(sort ${state_dir}/dest_tables))" ]
+    then
+        echo $(date "+%Y-%m-%d %T") "- Destination is missing tables, discarding previous state..."
+        rm -f ${state_dir}/schema ${state_dir}/done/*
+    fi
+fi
+
+if [ ! -f ${state_dir}/schema ]
+then
+    echo ""; echo $(date "+%Y-%m-%d %T") "- Cloning schema..."
+    set -o pipefail
+    mysql ${src_args} -N -B -e "SELECT table_name FROM information_schema.tables WHERE table_schema = '${db2clone}' AND table_type = 'BASE TABLE'" > ${state_dir}/chunks.tmp &&
+    mysqldump ${src_args} --no-data --skip-triggers --routines ${db2clone} | mysql ${dest_args} ${db_dest}
+    ret=$?
+    set +o pipefail
+    if [ ${ret} -ne 0 ]
+    then
+        echo $(date "+%Y-%m-%d %T") "- ERROR on cloning schema"
+        exit ${ret}
+    fi
+    mv ${state_dir}/chunks.tmp ${state_dir}/chunks && touch ${state_dir}/schema
+fi
+
+if [ "${consistent}" = "1" ]
+then
+    echo ""; echo $(date "+%Y-%m-%d %T") "- Cloning $(wc -l < ${state_dir}/chunks) tables in a single transaction..."
+    rm -f ${state_dir}/done/*
+    set -o pipefail
+    (echo "SET FOREIGN_KEY_CHECKS=0;"; sed 's/.*/TRUNCATE TABLE `&`;/' ${state_dir}/chunks) | mysql ${dest_args} ${db_dest} &&
+    mysqldump ${src_args} --no-create-info --skip-triggers --single-transaction ${db2clone} | mysql ${dest_args} ${db_dest}
+    ret=$?
+    set +o pipefail
+else
+    echo ""; echo $(date "+%Y-%m-%d %T") "- Cloning $(wc -l < ${state_dir}/chunks) tables, ${parallel} at a time..."
+    tr '\n' '\0' < ${state_dir}/chunks | xargs -0 -r -n 1 -P ${parallel} bash -c 'clone_table "$@"' _
+    ret=$?
+fi
 if [ ${ret} -ne 0 ]
 then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on dumping source database"
-    rm -rf ${path_of_dump}
+    echo $(date "+%Y-%m-%d %T") "- ERROR on cloning tables, the ones cloned are kept for the retry"
     exit ${ret}
 fi
 
-echo ""; echo $(date "+%Y-%m-%d %T") "- Restoring target database..."
-mysql -h ${host_dest} --port ${port_dest} -u ${user_dest} -p${pass_dest2} ${db_dest} < ${path_of_dump}/mysql.dump
+echo ""; echo $(date "+%Y-%m-%d %T") "- Cloning triggers..."
+set -o pipefail
+mysqldump ${src_args} --no-data --no-create-info --skip-routines --triggers ${db2clone} | mysql ${dest_args} ${db_dest}
 ret=$?
+set +o pipefail
 if [ ${ret} -ne 0 ]
 then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on restoring target database"
-    rm -rf ${path_of_dump}
+    echo $(date "+%Y-%m-%d %T") "- ERROR on cloning triggers"
     exit ${ret}
 fi
 
-echo ""; echo $(date "+%Y-%m-%d %T") "- Deleting temporary files..."
-rm -rf ${path_of_dump}
+echo ""; echo $(date "+%Y-%m-%d %T") "- Deleting state dir..."
+rm -rf ${state_dir}
 ret=$?
 if [ ${ret} -ne 0 ]
 then
-    echo $(date "+%Y-%m-%d %T") "- ERROR on deleting temporary files"
+    echo $(date "+%Y-%m-%d %T") "- ERROR on deleting state dir"
     exit ${ret}
 fi
 
 
-exit 0
\ No newline at end of file
+exit 0
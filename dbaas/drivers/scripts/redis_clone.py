@@ -6,9 +6,14 @@ import click
 import os
 import logging
 import ast
+import time
 from contextlib import contextmanager
 
 
+CHUNK_SIZE = 1024 * 1024
+PROGRESS_EVERY = 64 * CHUNK_SIZE
+
+
 class RedisDriver(object):
 
     def __init__(self, address, port, password, timeout,):
@@ -95,38 +100,87 @@ def test_return_code(return_code):
         return False
 
 
+def open_sftp(host, sys_user, sys_pass):
+    transport = paramiko.Transport((host, 22))
+    transport.use_compression(True)
+    transport.connect(username=sys_user, password=sys_pass)
+    return paramiko.SFTPClient.from_transport(transport)
+
+
+def wait_for_bgsave(client, redis_time_out):
+    last_save = client.lastsave()
+    try:
+        client.bgsave()
+    except redis.ResponseError, e:
+        # A BGSAVE already running is fine, its dump is waited instead
+        click.echo("BGSAVE not started: {}".format(e))
+
+    deadline = time.time() + int(redis_time_out)
+    interval = 0.5
+    while client.lastsave() == last_save:
+        if time.time() >= deadline:
+            return False
+        time.sleep(interval)
+        interval = min(interval * 2, 10)
+    return True
+
+
 def dump_src_database(host, redis_port, redis_pass,
-                      redis_time_out, dump_path,
-                      sys_user, sys_pass, remote_path):
+                      redis_time_out, sys_user, sys_pass, remote_path):
 
     click.echo("Dumping source database...")
     driver = RedisDriver(host, redis_port, redis_pass, redis_time_out)
 
     with driver.redis() as client:
         try:
-            client.save()
+            if not wait_for_bgsave(client, redis_time_out):
+                click.echo("Timeout while waiting for dump")
+                return None
         except Exception, e:
             click.echo("Error while requesting dump: {}".format(e))
-            return False
+            return None
 
     try:
-        transport = paramiko.Transport((host, 22))
-        transport.connect(username=sys_user, password=sys_pass)
+        source = open_sftp(host, sys_user, sys_pass).open(remote_path, 'rb')
+        source.prefetch()
+
+        click.echo("Dump successful! :)")
+        return source
+    except Exception, e:
+        click.echo('ERROR while opening dump file: {}'.format(e))
+        return None
 
-        sftp = paramiko.SFTPClient.from_transport(transport)
-        sftp.get(remote_path, dump_path)
 
-        sftp.close()
-        transport.close()
+def stream_dump(source, targets):
+    """Copy the source dump to each (host, sys_user, sys_pass, remote_path)
+    target at once, so it is read only once and never stored locally"""
 
-        click.echo("Dump successful! :)")
+    try:
+        files = [
+            open_sftp(host, sys_user, sys_pass).open(remote_path, 'wb')
+            for host, sys_user, sys_pass, remote_path in targets
+        ]
+        copied = 0
+        try:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                for target in files:
+                    target.write(chunk)
+                copied += len(chunk)
+                if copied % PROGRESS_EVERY < CHUNK_SIZE:
+                    click.echo("{} MB copied".format(copied / CHUNK_SIZE))
+        finally:
+            for target in files:
+                target.close()
         return True
     except Exception, e:
         click.echo('ERROR while transporting dump file: {}'.format(e))
         return False
 
 
-def restore_dst_database(dump_path, host, redis_port, redis_pass, sys_user,
+def restore_dst_database(source, host, redis_port, redis_pass, sys_user,
                          sys_pass, remote_path, redis_time_out):
 
     from physical.models import Host
@@ -140,17 +194,7 @@ def restore_dst_database(dump_path, host, redis_port, redis_pass, sys_user,
         )
     )
 
-    try:
-        transport = paramiko.Transport((host, 22))
-        transport.connect(username=sys_user, password=sys_pass)
-
-        sftp = paramiko.SFTPClient.from_transport(transport)
-        sftp.put(dump_path, remote_path)
-
-        sftp.close()
-        transport.close()
-    except Exception, e:
-        click.echo('ERROR while transporting dump file: {}'.format(e))
+    if not stream_dump(source, [(host, sys_user, sys_pass, remote_path)]):
         return False
 
     Host.run_script(
@@ -186,13 +230,12 @@ def restore_dst_database(dump_path, host, redis_port, redis_pass, sys_user,
     return True
 
 
-def restore_dst_cluster(dump_path, cluster_info, redis_time_out):
+def restore_dst_cluster(source, cluster_info, redis_time_out):
 
     from physical.models import Host
     for instance_info in cluster_info:
         sys_user = instance_info['sys_user']
         sys_pass = instance_info['sys_pass']
-        remote_path = instance_info['remote_path']
         redis_pass = instance_info['redis_pass']
         redis_port = instance_info['redis_port']
         host = instance_info['host']
@@ -207,27 +250,20 @@ def restore_dst_cluster(dump_path, cluster_info, redis_time_out):
             )
         )
 
+    targets = [
+        (info['host'], info['sys_user'], info['sys_pass'], info['remote_path'])
+        for info in cluster_info
+    ]
+    if not stream_dump(source, targets):
+        return False
+
     for instance_info in cluster_info:
         sys_user = instance_info['sys_user']
         sys_pass = instance_info['sys_pass']
-        remote_path = instance_info['remote_path']
         redis_pass = instance_info['redis_pass']
         redis_port = instance_info['redis_port']
         host = instance_info['host']
 
-        try:
-            transport = paramiko.Transport((host, 22))
-            transport.connect(username=sys_user, password=sys_pass)
-
-            sftp = paramiko.SFTPClient.from_transport(transport)
-            sftp.put(dump_path, remote_path)
-
-            sftp.close()
-            transport.close()
-        except Exception, e:
-            click.echo('ERROR while transporting dump file: {}'.format(e))
-            return False
-
         Host.run_script(
             address=host.address,
             username=sys_user,
@@ -295,34 +331,33 @@ def main(redis_time_out, src_pass, src_host,
             format='%(asctime)s %(levelname)s %(message)s',
         )
 
-    if not dump_src_database(src_host, src_port, src_pass,
-                             redis_time_out, local_dump_path,
-                             src_sys_user, src_sys_pass, src_dump_path):
+    # local_dump_path and --remove_dump are kept for compatibility only,
+    # the dump is streamed from source to destination without local copy
+    source = dump_src_database(src_host, src_port, src_pass,
+                               redis_time_out, src_sys_user, src_sys_pass,
+                               src_dump_path)
+    if not source:
         click.echo("Dump unsuccessful! :(")
         return 1
 
-    if cluster_info:
-        cluster_info = ast.literal_eval(cluster_info)
-
-        if not restore_dst_cluster(
-                local_dump_path,
-                cluster_info,
-                redis_time_out):
-            click.echo("Restore unsuccessful! :(")
-            return 1
-    else:
-        if not restore_dst_database(local_dump_path, dst_host, dst_port,
-                                    dst_pass, dst_sys_user, dst_sys_pass,
-                                    dst_dump_path, redis_time_out):
-            click.echo("Restore unsuccessful! :(")
-            return 1
-
-    if remove_dump:
-        try:
-            os.remove(local_dump_path)
-        except OSError:
-            click.echo("The file {} dos not exists.".format(local_dump_path))
-            pass
+    try:
+        if cluster_info:
+            cluster_info = ast.literal_eval(cluster_info)
+
+            if not restore_dst_cluster(
+                    source,
+                    cluster_info,
+                    redis_time_out):
+                click.echo("Restore unsuccessful! :(")
+                return 1
+        else:
+            if not restore_dst_database(source, dst_host, dst_port,
+                                        dst_pass, dst_sys_user, dst_sys_pass,
+                                        dst_dump_path, redis_time_out):
+                click.echo("Restore unsuccessful! :(")
+                return 1
+    finally:
+        source.close()
 
     return 0
 
@@ -83,6 +83,73 @@ class MySQLUsedAndTotalTestCase(BaseMysqlDriverTestCase):
         self.assertEqual(self.driver.masters_used_size_in_bytes, 10)
 
 
+class MySQLReplicationRolesCacheTestCase(BaseMysqlDriverTestCase):
+
+    def setUp(self):
+        super(MySQLReplicationRolesCacheTestCase, self).setUp()
+        self.driver.check_instance_is_master = MagicMock(
+            side_effect=self.instance_helper.check_instance_is_master
+        )
+        self.driver.invalidate_replication_roles()
+
+    def test_probe_only_on_cache_miss(self):
+        masters = self.driver.get_cached_master_instances()
+        self.assertEqual(masters, [self.instance])
+        probes = self.driver.check_instance_is_master.call_count
+
+        masters = self.driver.get_cached_master_instances()
+        self.assertEqual(masters, [self.instance])
+        self.assertEqual(
+            self.driver.check_instance_is_master.call_count, probes
+        )
+
+    def test_force_refresh(self):
+        self.driver.get_cached_master_instances()
+        probes = self.driver.check_instance_is_master.call_count
+
+        self.driver.refresh_replication_roles()
+        self.assertGreater(
+            self.driver.check_instance_is_master.call_count, probes
+        )
+
+    def test_invalidate(self):
+        self.driver.get_cached_master_instances()
+        probes = self.driver.check_instance_is_master.call_count
+
+        self.driver.invalidate_replication_roles()
+        self.driver.get_cached_master_instances()
+        self.assertGreater(
+            self.driver.check_instance_is_master.call_count, probes
+        )
+
+    def test_no_master_is_not_cached(self):
+        self.driver.check_instance_is_master.side_effect = None
+        self.driver.check_instance_is_master.return_value = False
+        self.assertEqual(self.driver.get_cached_master_instances(), [])
+        probes = self.driver.check_instance_is_master.call_count
+
+        self.driver.check_instance_is_master.side_effect = (
+            self.instance_helper.check_instance_is_master
+        )
+        masters = self.driver.get_cached_master_instances()
+        self.assertEqual(masters, [self.instance])
+        self.assertGreater(
+            self.driver.check_instance_is_master.call_count, probes
+        )
+
+    def test_sizes_use_cached_roles(self):
+        self.instance.total_size_in_bytes = 105
+        self.instance.used_size_in_bytes = 55
+        self.instance.save()
+        self.assertEqual(self.driver.masters_total_size_in_bytes, 105)
+        probes = self.driver.check_instance_is_master.call_count
+
+        self.assertEqual(self.driver.masters_used_size_in_bytes, 55)
+        self.assertEqual(
+            self.driver.check_instance_is_master.call_count, probes
+        )
+
+
 class MySQLEngineTestCase(BaseMysqlDriverTestCase):
 
     """
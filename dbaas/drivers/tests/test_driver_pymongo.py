@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 import os
+from datetime import datetime, timedelta
 from mock import patch, MagicMock
+from django.test import TestCase
 
 from drivers import DriverFactory
 from physical.tests import factory as factory_physical
 from logical.tests import factory as factory_logical
 from logical.models import Database
-from drivers.mongodb import MongoDB, MongoDBReplicaSet
+from drivers.errors import ReplicationNoInstances, ReplicationNoPrimary
+from drivers.mongodb import MongoDB, MongoDBReplicaSet, ReplicaSetStatus
 from drivers.tests.base import (BaseMongoDriverTestCase, FakeDriverClient,
                                 BaseSingleInstanceUpdateSizesTest,
                                 BaseHAInstanceUpdateSizesTest)
@@ -250,3 +253,42 @@ class ManageCredentialsMongoDBTestCase(BaseMongoDriverTestCase):
         )
         self.driver.remove_user(self.credential)
         self.assertIsNone(self.__find_user__(self.credential))
+
+
+class ReplicaSetStatusTestCase(TestCase):
+
+    def setUp(self):
+        now = datetime(2020, 1, 1, 10, 0, 0)
+        self.topology = ReplicaSetStatus({'members': [
+            {'name': '10.0.0.1:27017', 'stateStr': 'PRIMARY',
+             'optimeDate': now},
+            {'name': '10.0.0.2:27017', 'stateStr': 'SECONDARY',
+             'optimeDate': now - timedelta(seconds=5)},
+            {'name': '10.0.0.3:27017', 'stateStr': 'RECOVERING',
+             'optimeDate': now},
+        ]})
+
+    def instance(self, address):
+        return MagicMock(address=address, port=27017)
+
+    def test_roles(self):
+        self.assertTrue(self.topology.is_primary(self.instance('10.0.0.1')))
+        self.assertFalse(self.topology.is_primary(self.instance('10.0.0.2')))
+        self.assertFalse(self.topology.is_primary(self.instance('10.0.0.9')))
+
+    def test_lag(self):
+        self.assertEqual(self.topology.lag(self.instance('10.0.0.1')), 0)
+        self.assertEqual(self.topology.lag(self.instance('10.0.0.2')), 5)
+        self.assertEqual(self.topology.lag(self.instance('10.0.0.3')), 100000)
+
+    def test_lag_of_unknown_instance(self):
+        with self.assertRaises(ReplicationNoInstances):
+            self.topology.lag(self.instance('10.0.0.9'))
+
+    def test_lag_without_primary(self):
+        topology = ReplicaSetStatus({'members': [
+            {'name': '10.0.0.2:27017', 'stateStr': 'SECONDARY',
+             'optimeDate': datetime(2020, 1, 1)},
+        ]})
+        with self.assertRaises(ReplicationNoPrimary):
+            topology.lag(self.instance('10.0.0.2'))
@@ -179,6 +179,28 @@ class RedisEngineTestCase(BaseRedisDriverTestCase):
                          self.driver.get_connection(database=self.database))
 
 
+class RedisInfoTestCase(BaseRedisDriverTestCase):
+
+    @mock.patch('drivers.redis.Redis.check_status')
+    @mock.patch('drivers.redis.Redis.redis')
+    def test_info_uses_a_single_client(self, redis, check_status):
+        redis.return_value.__enter__.return_value.info.return_value = {
+            'redis_version': '4.0.10', 'used_memory': 40
+        }
+        for name in ('first_db', 'second_db'):
+            factory_logical.DatabaseFactory(
+                name=name, databaseinfra=self.databaseinfra
+            )
+
+        info = self.driver.info()
+
+        self.assertEqual(redis.call_count, 1)
+        self.assertFalse(check_status.called)
+        self.assertEqual(info.version, '4.0.10')
+        self.assertTrue(info.get_database_status('first_db').is_alive)
+        self.assertTrue(info.get_database_status('second_db').is_alive)
+
+
 class ManageDatabaseRedisTestCase(BaseRedisDriverTestCase):
 
     """ Test case to managing database in redis engine """
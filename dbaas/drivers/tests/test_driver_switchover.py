@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from mock import patch, MagicMock
+
+from django.test import TestCase
+
+from drivers.fake import FakeDriver
+from physical.tests import factory
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@patch('drivers.base.LOG')
+@patch('drivers.fake.FakeDriver.switch_master')
+@patch('drivers.fake.FakeDriver.check_instance_is_master', create=True)
+@patch('drivers.fake.FakeDriver.is_replication_ok', create=True)
+class SwitchoverTestCase(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for module in ('util.wait.time', 'drivers.base.time'):
+            clock_patch = patch(module, new=self.clock)
+            clock_patch.start()
+            self.addCleanup(clock_patch.stop)
+        self.driver = FakeDriver(
+            databaseinfra=factory.DatabaseInfraFactory()
+        )
+        self.instance = MagicMock()
+
+    def test_switches_as_soon_as_replication_is_ok(
+            self, replication_ok, is_master, switch_master, log):
+        replication_ok.return_value = True
+        is_master.side_effect = [True, False]
+
+        elapsed = self.driver.check_replication_and_switch(self.instance)
+
+        switch_master.assert_called_once_with(self.instance, None)
+        self.assertLess(elapsed, 1)
+        log.info.assert_any_call(
+            "switchover_seconds=%.2f infra=%s engine=%s", elapsed,
+            self.driver.databaseinfra.name, self.driver.name
+        )
+
+    def test_replication_delay(
+            self, replication_ok, is_master, switch_master, log):
+        replication_ok.return_value = False
+
+        with self.assertRaises(Exception) as error:
+            self.driver.check_replication_and_switch(
+                self.instance, attempts=3
+            )
+
+        self.assertIn("replication's delay", str(error.exception))
+        self.assertFalse(switch_master.called)
+        self.assertEqual(self.clock.now, 30)
+
+    def test_master_not_changed(
+            self, replication_ok, is_master, switch_master, log):
+        replication_ok.return_value = True
+        is_master.return_value = True
+
+        with self.assertRaises(Exception) as error:
+            self.driver.check_replication_and_switch(
+                self.instance, check_is_master_attempts=2
+            )
+
+        self.assertIn("Could not change master", str(error.exception))
+        self.assertNotIn(
+            'switchover_seconds', str(log.info.call_args_list)
+        )
@@ -365,16 +365,13 @@ class Database(BaseModel):
 
     @property
     def current_locked_task(self):
-        lock = self.lock.first()
-        if lock:
+        # all() instead of first() to use prefetch_related('lock__task')
+        for lock in self.lock.all():
             return lock.task
 
     @property
     def is_locked(self):
-        lock = self.lock.first()
-        if lock:
-            return True
-        return False
+        return bool(self.lock.all())
 
     def delete(self, *args, **kwargs):
         if self.is_in_quarantine:
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from collections import defaultdict
+
+from physical.models import Instance
+
+
+def infras_by_host(host_ids):
+    infras = defaultdict(set)
+    instances = Instance.objects.filter(
+        hostname_id__in=host_ids
+    ).values_list('hostname_id', 'databaseinfra_id')
+    for host_id, infra_id in instances:
+        infras[host_id].add(infra_id)
+    return infras
+
+
+def plan_rolling_batches(items, batch_size, groups_of):
+    """
+    Splits items in batches of at most batch_size where no two items
+    share a group, e.g. two hosts of the same infra are never in the
+    same batch. Keeps the original order as much as possible.
+    """
+    batch_size = max(1, batch_size)
+    pending = list(items)
+    batches = []
+    while pending:
+        batch, used, left = [], set(), []
+        for item in pending:
+            groups = groups_of(item)
+            if len(batch) < batch_size and not groups & used:
+                batch.append(item)
+                used |= groups
+            else:
+                left.append(item)
+        batches.append(batch)
+        pending = left
+    return batches
+
+
+def failure_ratio(statuses, failed_statuses):
+    if not statuses:
+        return 0.0
+    failed = len([status for status in statuses if status in failed_statuses])
+    return float(failed) / len(statuses)
@@ -1,18 +1,54 @@
 from datetime import datetime
 from socket import gethostname
+from django.core.cache import cache
 from notification.models import TaskHistory
 from physical.models import DatabaseInfra, Instance
+from system.models import Configuration
+from util.concurrency import parallel_map
 from util.providers import get_switch_write_instance_steps
-from workflow.steps.util.host_provider import Provider, \
-    HostProviderInfoException
+from workflow.steps.util.host_provider import Provider
 from workflow.workflow import steps_for_instances
 
 
+def get_host_zone(instance, refresh=False):
+    """zone of the instance host, cached because it only changes on
+    migrations and the host provider has no bulk listing"""
+    host = instance.hostname
+    key = "host:zone:{}".format(host.identifier)
+    zone = None if refresh else cache.get(key)
+    if zone is None:
+        hp = Provider(instance, instance.databaseinfra.environment)
+        zone = hp.host_info(host)["zone"]
+        cache.set(key, zone, Configuration.get_by_name_as_int(
+            'host_zone_cache_ttl', default=60*60
+        ))
+    return zone
+
+
+def get_masters_with_zone(infra):
+    driver = infra.get_driver()
+    instances_masters = driver.get_master_instance()
+    if isinstance(instances_masters, Instance):
+        instances_masters = [instances_masters]
+    return [
+        (instance, get_host_zone(instance))
+        for instance in instances_masters
+    ]
+
+
 class SwitchMasters(object):
 
-    def __init__(self, target_zone, instances=None):
+    def __init__(self, target_zone, instances=None, workers=None,
+                 dry_run=False):
         self.zone = target_zone
         self._task = None
+        self.dry_run = dry_run
+        self.errors = []
+        if workers is None:
+            workers = Configuration.get_by_name_as_int(
+                'switch_masters_in_zone_concurrency', default=1
+            )
+        self.workers = workers
 
         self.instances = []
         if instances:
@@ -25,81 +61,115 @@ class SwitchMasters(object):
         return self._task
 
     def do(self):
-        if not self.instances:
-            self.load_all_masters()
+        if self.instances:
+            self.instances = self.filter_instances_in_zone(self.instances)
+        else:
+            self.task.add_detail("Getting all masters...")
+            self.instances = self.get_all_masters_from_zone()
+            self.task.add_detail("Loaded\n", level=2)
+
+        for error in self.errors:
+            self.task.add_detail(error, level=2)
+
+        if self.dry_run:
+            self.task.add_detail(self.dry_run_report())
+            self.task.set_status_success('Dry run, nothing was switched')
+            return
+
         self.start_switch()
 
     def get_all_masters_from_zone(self):
+        infras = DatabaseInfra.objects.filter(
+            databases__isnull=False
+        ).distinct().select_related(
+            'environment', 'plan__replication_topology'
+        )
         instances = []
-        for infra in DatabaseInfra.objects.all():
-            if not infra.databases.exists():
+        results = parallel_map(
+            get_masters_with_zone, list(infras), workers=self.workers
+        )
+        for result in results:
+            if not result.ok:
+                self.errors.append(
+                    "ERROR-{}-{}".format(result.item, result.error)
+                )
                 continue
-            driver = infra.get_driver()
-            instances_masters = driver.get_master_instance()
-            if isinstance(instances_masters, Instance):
-                instances_masters = [instances_masters]
-            for instance in instances_masters:
-                hp = Provider(instance, infra.environment)
-                info = hp.host_info(instance.hostname)
-                if info["zone"] == self.zone:
+            for instance, zone in result.result:
+                if zone == self.zone:
                     instances.append(instance)
         return instances
 
-    def load_all_masters(self):
-        self.task.add_detail("Getting all masters...")
-        for infra in DatabaseInfra.objects.all():
-            if not infra.databases.exists():
-                continue
-            driver = infra.get_driver()
-            infra_masters = driver.get_master_instance()
-            if isinstance(infra_masters, Instance):
-                infra_masters = [infra_masters]
-            self.instances += infra_masters
-        self.task.add_detail("Loaded\n", level=2)
+    def filter_instances_in_zone(self, instances):
+        results = parallel_map(get_host_zone, instances, workers=self.workers)
+        in_zone = []
+        for result in results:
+            if not result.ok:
+                self.errors.append("ERROR-{}-{}".format(
+                    result.item.hostname, result.error
+                ))
+            elif result.result == self.zone:
+                in_zone.append(result.item)
+            else:
+                self.task.add_detail("OK-{}-{}".format(
+                    result.item.hostname, result.result
+                ), level=2)
+        return in_zone
+
+    def dry_run_report(self):
+        lines = ["Masters to switch in {}: {}".format(
+            self.zone, len(self.instances)
+        )]
+        for instance in self.instances:
+            lines.append("WOULD SWITCH-{}-{}".format(
+                instance.hostname, instance.databaseinfra
+            ))
+        return "\n".join(lines)
 
     def start_switch(self):
         self.task.add_detail("Switching master in {}...".format(self.zone))
-        for instance in self.instances:
-            infra = instance.databaseinfra
-            env = infra.environment
-            host = instance.hostname
-            hp = Provider(instance, env)
-            try:
-                info = hp.host_info(host)
-            except HostProviderInfoException as e:
-                self.task.add_detail("ERROR-{}-{}".format(host, e), level=2)
-                self.task.set_status_error('Could not load host info')
-                return
-
-            if info["zone"] != self.zone:
-                self.task.add_detail(
-                    "OK-{}-{}".format(host, info["zone"]), level=2
-                )
+        if self.errors:
+            self.task.set_status_error('Could not load all masters')
+            return
+
+        results = parallel_map(
+            self.switch_instance, self.instances, workers=self.workers
+        )
+        failed = 0
+        for result in results:
+            host = result.item.hostname
+            if result.ok and result.result is True:
+                self.task.add_detail("SWITCHED-{}".format(host), level=2)
                 continue
+            failed += 1
+            self.task.add_detail("ERROR-{}-{}".format(
+                host, result.error or result.result
+            ), level=2)
 
-            database = infra.databases.first()
-            if database.is_being_used_elsewhere():
-                self.task.add_detail(
-                    "ERROR-{}-Being used to another task".format(host),
-                    level=2
+        if failed:
+            self.task.set_status_error(
+                'Could not switch {} of {} masters'.format(
+                    failed, len(results)
                 )
-                self.task.set_status_error(
-                    'Database is being used by another task'
-                )
-                return
-
-            self.task.add_detail(
-                "SWITCHING-{}-{}...".format(host, info["zone"]),
-                level=2
             )
-            class_path = infra.plan.replication_topology.class_path
-            steps = get_switch_write_instance_steps(class_path)
-            if not steps_for_instances(steps, [instance], self.task):
-                self.task.set_status_error('Could not switch all masters')
-                return
+            return
         self.task.set_status_success('Could switch all masters')
 
-    def register_task(self):
+    def switch_instance(self, instance):
+        infra = instance.databaseinfra
+        database = infra.databases.first()
+        if database.is_being_used_elsewhere():
+            return 'Being used to another task'
+
+        task = self.register_task(database)
+        class_path = infra.plan.replication_topology.class_path
+        steps = get_switch_write_instance_steps(class_path)
+        if not steps_for_instances(steps, [instance], task):
+            task.set_status_error('Could not switch master')
+            return 'See task {}'.format(task.id)
+        task.set_status_success('Master switched')
+        return True
+
+    def register_task(self, database=None):
         task_history = TaskHistory()
         task_history.task_id = datetime.now().strftime("%Y%m%d%H%M%S")
         task_history.task_name = "switch_masters_in_zone"
@@ -107,5 +177,9 @@ class SwitchMasters(object):
         task_history.task_status = TaskHistory.STATUS_RUNNING
         task_history.context = {'hostname': gethostname()}
         task_history.user = 'admin'
+        if database:
+            task_history.object_id = database.id
+            task_history.object_class = database._meta.db_table
+            task_history.database_name = database.name
         task_history.save()
         return task_history
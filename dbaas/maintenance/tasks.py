@@ -3,13 +3,17 @@ from dbaas.celery import app
 import models
 import logging
 
-from maintenance.tasks_disk_resize import find_zabbix_and_grafana_credentials_for_environment, go_through_databases
+from maintenance.tasks_disk_resize import (find_zabbix_and_grafana_credentials_for_environment, go_through_databases,
+                                           get_zabbix_provider_and_metrics)
 from notification.models import TaskHistory
 from system.models import Configuration
 from dbaas_credentials.models import CredentialType
 from util import get_worker_name, \
     build_context_script, get_dict_lines
 from util.decorators import only_one
+from util.concurrency import parallel_map
+from maintenance.rolling import (infras_by_host, plan_rolling_batches,
+                                 failure_ratio)
 from registered_functions.functools import get_function
 from util.task_register import TaskRegisterBase
 from workflow.steps.util.dns import ChangeTTLTo5Minutes, ChangeTTLTo3Hours
@@ -41,27 +45,97 @@ def execute_scheduled_maintenance(self, maintenance_id):
     task_history.update_details(
         persist=True, details="Executing Maintenance: {}".format(maintenance)
     )
-    for hm in models.HostMaintenance.objects.filter(maintenance=maintenance):
-        # main_output = {}
-        hm.status = hm.RUNNING
-        hm.started_at = datetime.now()
-        hm.save()
-        if hm.host is None:
-            hm.status = hm.UNAVAILABLEHOST
-            hm.finished_at = datetime.now()
-            hm.save()
-            continue
-
-        host = hm.host
-        update_task = "\nRunning Maintenance on {}".format(host)
 
-        if maintenance.disable_alarms:
-            disable_alarms(hm.host)
+    parallelism = Configuration.get_by_name_as_int(
+        'maintenance_parallelism', default=1
+    )
+    batch_size = Configuration.get_by_name_as_int(
+        'maintenance_batch_size', default=parallelism
+    )
+    max_failure_ratio = Configuration.get_by_name_as_float(
+        'maintenance_max_failure_ratio', default=0
+    )
+    params = list(models.MaintenanceParameters.objects.filter(
+        maintenance=maintenance
+    ))
 
-        param_dict = {}
-        params = models.MaintenanceParameters.objects.filter(
-            maintenance=maintenance
+    host_maintenances = models.HostMaintenance.objects.filter(
+        maintenance=maintenance
+    )
+    host_maintenances.filter(host=None).update(
+        status=models.HostMaintenance.UNAVAILABLEHOST,
+        started_at=datetime.now(), finished_at=datetime.now()
+    )
+    host_maintenances = list(
+        host_maintenances.exclude(host=None).select_related('host')
+    )
+    host_infras = infras_by_host([hm.host_id for hm in host_maintenances])
+    batches = plan_rolling_batches(
+        host_maintenances, batch_size,
+        lambda hm: host_infras.get(hm.host_id, set())
+    )
+    task_history.update_details(persist=True, details=(
+        "\n{} host(s) in {} batch(es), parallelism {}".format(
+            len(host_maintenances), len(batches), parallelism
         )
+    ))
+
+    statuses = []
+    status = TaskHistory.STATUS_SUCCESS
+    details = 'Maintenance executed succesfully'
+    for index, batch in enumerate(batches):
+        models.HostMaintenance.objects.filter(
+            id__in=[hm.id for hm in batch]
+        ).update(status=models.HostMaintenance.RUNNING, started_at=datetime.now())
+
+        results = parallel_map(
+            lambda hm: run_host_maintenance(hm, maintenance, params),
+            batch, workers=parallelism
+        )
+        save_host_maintenance_results(results)
+        statuses.extend(result.result['status'] for result in results)
+        task_history.update_details(persist=True, details="".join(
+            "\nRunning Maintenance on {}...status: {}".format(
+                result.item.host, result.result['status']
+            ) for result in results
+        ))
+
+        ratio = failure_ratio(statuses, HOST_MAINTENANCE_FAILED)
+        if max_failure_ratio and ratio > max_failure_ratio:
+            pending = [hm.id for batch in batches[index + 1:] for hm in batch]
+            models.HostMaintenance.objects.filter(id__in=pending).update(
+                status=models.HostMaintenance.REVOKED
+            )
+            status = TaskHistory.STATUS_ERROR
+            details = (
+                'Maintenance stopped, {:.0%} of hosts failed (limit {:.0%}). '
+                '{} host(s) revoked'
+            ).format(ratio, max_failure_ratio, len(pending))
+            break
+
+    models.Maintenance.objects.filter(id=maintenance_id).update(
+        status=maintenance.FINISHED, finished_at=datetime.now()
+    )
+    task_history.update_status_for(status, details=details)
+    LOG.info("Maintenance: {} has FINISHED".format(maintenance))
+
+
+HOST_MAINTENANCE_FAILED = (
+    models.HostMaintenance.ERROR,
+    models.HostMaintenance.ROLLBACK_SUCCESS,
+    models.HostMaintenance.ROLLBACK_ERROR,
+)
+
+
+def run_host_maintenance(hm, maintenance, params):
+    host = hm.host
+    result = {'status': None, 'main_log': None, 'rollback_log': None}
+
+    if maintenance.disable_alarms:
+        disable_alarms(host)
+
+    try:
+        param_dict = {}
         for param in params:
             param_function = get_function(param.function_name)
             param_dict[param.parameter_name] = param_function(host.id)
@@ -71,50 +145,60 @@ def execute_scheduled_maintenance(self, maintenance_id):
             script=main_script,
             raise_if_error=False
         )
+        result['main_log'] = get_dict_lines(main_output)
 
         if main_output['exit_code'] == 0:
-            hm.status = hm.SUCCESS
-        else:
-            if maintenance.rollback_script:
-                hm.status = hm.ROLLBACK
-                hm.save()
-
-                rollback_script = build_context_script(
-                    param_dict, maintenance.rollback_script
-                )
-                rollback_output = host.ssh.run_script(
-                    script=rollback_script,
-                    raise_if_error=False
-                )
-
-                if rollback_output['exit_code'] == 0:
-                    hm.status = hm.ROLLBACK_SUCCESS
-                else:
-                    hm.status = hm.ROLLBACK_ERROR
-
-                hm.rollback_log = get_dict_lines(rollback_output)
+            result['status'] = hm.SUCCESS
+        elif maintenance.rollback_script:
+            rollback_script = build_context_script(
+                param_dict, maintenance.rollback_script
+            )
+            rollback_output = host.ssh.run_script(
+                script=rollback_script,
+                raise_if_error=False
+            )
 
+            if rollback_output['exit_code'] == 0:
+                result['status'] = hm.ROLLBACK_SUCCESS
             else:
-                hm.status = hm.ERROR
+                result['status'] = hm.ROLLBACK_ERROR
 
+            result['rollback_log'] = get_dict_lines(rollback_output)
+        else:
+            result['status'] = hm.ERROR
+    except Exception as e:
+        LOG.error("Maintenance on {} failed: {}".format(host, e))
+        result['status'] = hm.ERROR
+        result['main_log'] = str(e)
+    finally:
         if maintenance.disable_alarms:
-            enable_alarms(hm.host)
-
-        update_task += "...status: {}".format(hm.status)
-
-        task_history.update_details(persist=True, details=update_task)
-
-        hm.main_log = get_dict_lines(main_output)
-        hm.finished_at = datetime.now()
-        hm.save()
+            enable_alarms(host)
+
+    return result
+
+
+def save_host_maintenance_results(results):
+    finished_at = datetime.now()
+    ids_by_status = {}
+    for result in results:
+        if not result.ok:
+            result.result = {
+                'status': models.HostMaintenance.ERROR,
+                'main_log': result.error, 'rollback_log': None
+            }
+        ids_by_status.setdefault(result.result['status'], []).append(
+            result.item.id
+        )
+        # logs are different for each host
+        models.HostMaintenance.objects.filter(id=result.item.id).update(
+            main_log=result.result['main_log'],
+            rollback_log=result.result['rollback_log']
+        )
 
-    models.Maintenance.objects.filter(id=maintenance_id).update(
-        status=maintenance.FINISHED, finished_at=datetime.now()
-    )
-    task_history.update_status_for(
-        TaskHistory.STATUS_SUCCESS, details='Maintenance executed succesfully'
-    )
-    LOG.info("Maintenance: {} has FINISHED".format(maintenance))
+    for status, ids in ids_by_status.items():
+        models.HostMaintenance.objects.filter(id__in=ids).update(
+            status=status, finished_at=finished_at
+        )
 
 
 def disable_alarms(host):
@@ -507,11 +591,15 @@ def zabbix_alert_resize_disk_task(self, task_history, database):
         database.environment, integration, task_history)
     project_domain = graf_credential.get_parameter_by_name('project_domain')
 
-    collected, problems, resizes, status = go_through_databases(databases=databases, task=task_history,
-                                                                zabbix_credential=zabbix_credential,
-                                                                project_domain=project_domain, collected=1, problems=0,
-                                                                resizes=0, status=status,
-                                                                threshold_disk_resize=threshold_disk_resize)
+    zabbix_provider, metrics = get_zabbix_provider_and_metrics(database, zabbix_credential)
+    try:
+        collected, problems, resizes, status = go_through_databases(databases=databases, task=task_history,
+                                                                    zabbix_provider=zabbix_provider, metrics=metrics,
+                                                                    project_domain=project_domain, collected=1,
+                                                                    problems=0, resizes=0, status=status,
+                                                                    threshold_disk_resize=threshold_disk_resize)
+    finally:
+        zabbix_provider.logout()
 
     details = "Resize: {} | Problems: {}".format(resizes, problems)
 
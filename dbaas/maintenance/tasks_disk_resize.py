@@ -4,13 +4,13 @@ from __future__ import absolute_import
 import logging
 import datetime
 import socket
+import time
 
 from account.models import AccountUser
 from dbaas_credentials.credential import Credential
 from dbaas_credentials.models import CredentialType
 from dbaas_zabbix import factory_for
 from dbaas_zabbix.errors import ZabbixMetricsError
-from dbaas_zabbix.metrics import ZabbixMetrics
 from logical.errors import BusyDatabaseError
 from logical.models import Database
 from paramiko.ssh_exception import SSHException
@@ -27,6 +27,58 @@ from .models import TaskHistory
 LOG = logging.getLogger(__name__)
 ZABBIX_PROVIDER_TOTAL_TIME = 0
 ZABBIX_METRICS_TOTAL_TIME = 0
+# same items, filters and units (kb) of dbaas_zabbix.metrics.ZabbixMetrics
+ZABBIX_DISK_DATA_SIZE_KEY = 'hrStorageSizeInBytes[/data]'
+ZABBIX_DISK_DATA_USED_KEY = 'hrStorageUsedInBytes[/data]'
+ZABBIX_DISK_DATA_MAX_AGE = 3600
+
+
+class ZabbixDiskMetrics(object):
+    """
+    /data size and usage, in kb, of every host of the client group in the
+    environment Zabbix, fetched with a single item.get and then read from
+    memory. Values older than ZABBIX_DISK_DATA_MAX_AGE are not used.
+    """
+
+    def __init__(self, api, group):
+        self.api = api
+        self.group = group
+        self.values = {}
+
+    def load(self):
+        items = self.api.item.get(
+            output=['key_', 'lastvalue', 'lastclock'],
+            selectHosts=['host'],
+            group=self.group,
+            filter={
+                'key_': [ZABBIX_DISK_DATA_SIZE_KEY, ZABBIX_DISK_DATA_USED_KEY],
+                'status': 0,
+                'state': 0,
+            }
+        )
+        oldest = time.time() - ZABBIX_DISK_DATA_MAX_AGE
+        for item in items:
+            if int(item.get('lastclock') or 0) < oldest:
+                continue
+            for host in item['hosts']:
+                self.values.setdefault(host['host'], {})[item['key_']] = (
+                    int(float(item['lastvalue'])) / 1024
+                )
+        return self
+
+    def _get_value(self, host, key):
+        try:
+            return self.values[host][key]
+        except KeyError:
+            raise ZabbixMetricsError(
+                "Item {} not found for {}".format(key, host)
+            )
+
+    def get_current_disk_data_size(self, host):
+        return self._get_value(host, ZABBIX_DISK_DATA_SIZE_KEY)
+
+    def get_current_disk_data_used(self, host):
+        return self._get_value(host, ZABBIX_DISK_DATA_USED_KEY)
 
 
 def zabbix_collect_used_disk(task):
@@ -71,17 +123,28 @@ def go_through_environments(environments, task, integration, collected, problems
         LOG.info("Using credentials: Zabbix: %s - Grafana: %s" % (zabbix_credential.id, grafana_credential.id))
 
         project_domain = grafana_credential.get_parameter_by_name('project_domain')
-        databases = Database.objects.filter(environment=environment)
+        databases = list(Database.objects.filter(
+            environment=environment
+        ).select_related('databaseinfra'))
+        if not databases:
+            continue
+
+        # one zabbix session and one metrics fetch for the whole environment
+        zabbix_provider, metrics = get_zabbix_provider_and_metrics(databases[0], zabbix_credential)
 
         # execute for databases of this specific environment
-        collected, problems, resizes, status = go_through_databases(databases, task, zabbix_credential,
-                                                                    project_domain, collected, problems, resizes,
-                                                                    status, threshold_disk_resize)
+        try:
+            collected, problems, resizes, status = go_through_databases(databases, task, zabbix_provider, metrics,
+                                                                        project_domain, collected, problems, resizes,
+                                                                        status, threshold_disk_resize)
+        finally:
+            zabbix_provider.logout()
 
     return collected, problems, resizes, status
 
 
-def go_through_databases(databases, task, zabbix_credential, project_domain, collected, problems, resizes, status, threshold_disk_resize):
+def go_through_databases(databases, task, zabbix_provider, metrics, project_domain, collected, problems, resizes, status,
+                         threshold_disk_resize):
     if databases is not None:
         for database in databases:
             database_resized = False
@@ -91,14 +154,10 @@ def go_through_databases(databases, task, zabbix_credential, project_domain, col
             if check_locked_database(database, task):
                 continue  # goes to next database because this is locked
 
-            # get zabbix provider and metrics
-            zabbix_provider, metrics = get_zabbix_provider_and_metrics(database, zabbix_credential)
-
             driver = database.databaseinfra.get_driver()
             non_database_instances = driver.get_non_database_instances()
 
-            # get hosts either from zabbix or infra
-            hosts = get_hosts(zabbix_provider, database)
+            hosts = get_hosts(database)
 
             # execute for hosts
             collected, problems, resizes, status, database_resized = go_through_hosts(hosts, database,
@@ -107,8 +166,6 @@ def go_through_databases(databases, task, zabbix_credential, project_domain, col
                                                                                       project_domain, metrics, problems,
                                                                                       status, threshold_disk_resize,
                                                                                       resizes, database_resized)
-
-            zabbix_provider.logout()
         return collected, problems, resizes, status
 
 
@@ -359,7 +416,7 @@ def check_locked_database(database, task):
 
 
 def get_zabbix_provider_and_metrics(database, zabbix_credential):
-    LOG.info("Getting zabbix provider and metrics for database: %s" % database.name)
+    LOG.info("Getting zabbix provider and metrics for environment: %s" % database.environment)
     started_at = datetime.datetime.now()
     LOG.info("Provider started at: %s" % started_at)
     zabbix_provider = factory_for(
@@ -371,9 +428,9 @@ def get_zabbix_provider_and_metrics(database, zabbix_credential):
 
     started_at = datetime.datetime.now()
     LOG.info("Metrics started at: %s" % started_at)
-    metrics = ZabbixMetrics(
+    metrics = ZabbixDiskMetrics(
         zabbix_provider.api, zabbix_provider.main_clientgroup
-    )
+    ).load()
     global ZABBIX_METRICS_TOTAL_TIME
     ZABBIX_METRICS_TOTAL_TIME += (datetime.datetime.now() - started_at).total_seconds()
     LOG.info("Provider total time: %s - Metrics total time: %s" % (ZABBIX_PROVIDER_TOTAL_TIME,
@@ -382,12 +439,8 @@ def get_zabbix_provider_and_metrics(database, zabbix_credential):
     return zabbix_provider, metrics
 
 
-def get_hosts(zabbix_provider, database):
-    if zabbix_provider.using_agent:
-        LOG.info("Zabbix is using_agent for database: %s" % database.name)
-        return list({instance.hostname for instance in database.databaseinfra.instances.all()})
-    else:
-        return zabbix_provider.hosts
+def get_hosts(database):
+    return database.databaseinfra.hosts
 
 
 def is_database_instance(database, non_database_instances, host):
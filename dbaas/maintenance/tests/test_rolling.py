@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from unittest import TestCase
+
+from maintenance.rolling import plan_rolling_batches, failure_ratio
+
+
+class PlanRollingBatchesTestCase(TestCase):
+
+    def setUp(self):
+        self.infras = {
+            'mongo-01': {1}, 'mongo-02': {1}, 'mongo-03': {1},
+            'redis-01': {2}, 'redis-02': {2},
+            'shared-01': {1, 2}, 'mysql-01': {3},
+        }
+
+    def plan(self, hosts, batch_size):
+        return plan_rolling_batches(hosts, batch_size, self.infras.get)
+
+    def test_same_infra_never_in_same_batch(self):
+        hosts = ['mongo-01', 'mongo-02', 'mongo-03', 'redis-01', 'redis-02']
+
+        batches = self.plan(hosts, batch_size=10)
+
+        self.assertEqual(batches, [
+            ['mongo-01', 'redis-01'],
+            ['mongo-02', 'redis-02'],
+            ['mongo-03'],
+        ])
+
+    def test_host_in_two_infras(self):
+        batches = self.plan(['mongo-01', 'shared-01', 'mysql-01'], 10)
+        self.assertEqual(batches, [['mongo-01', 'mysql-01'], ['shared-01']])
+
+    def test_batch_size(self):
+        batches = self.plan(['mongo-01', 'redis-01', 'mysql-01'], 2)
+        self.assertEqual(batches, [['mongo-01', 'redis-01'], ['mysql-01']])
+
+    def test_empty(self):
+        self.assertEqual(self.plan([], 2), [])
+
+
+class FailureRatioTestCase(TestCase):
+
+    def test_ratio(self):
+        self.assertEqual(failure_ratio([0, 1, 1, 5], (0, 5)), 0.5)
+
+    def test_without_statuses(self):
+        self.assertEqual(failure_ratio([], (0,)), 0.0)
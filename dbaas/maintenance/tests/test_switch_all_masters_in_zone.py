@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from unittest import TestCase
+from mock import MagicMock, call, patch
+
+from maintenance.scripts.switch_all_masters_in_zone import SwitchMasters
+
+
+MODULE = 'maintenance.scripts.switch_all_masters_in_zone.{}'
+
+
+def make_instance(hostname):
+    instance = MagicMock()
+    instance.hostname = hostname
+    instance.databaseinfra.databases.first.return_value.\
+        is_being_used_elsewhere.return_value = False
+    return instance
+
+
+@patch(MODULE.format('SwitchMasters.register_task'))
+class SwitchMastersTestCase(TestCase):
+
+    def setUp(self):
+        self.master_a = make_instance('host-a')
+        self.master_b = make_instance('host-b')
+        self.other_zone = make_instance('host-c')
+
+    def test_discovery_keeps_masters_in_zone(self, register_task):
+        masters = {
+            'infra-a': [(self.master_a, 'zone-1')],
+            'infra-b': [(self.master_b, 'zone-1'), (self.other_zone, 'zone-2')],
+        }
+        infras = MODULE.format('DatabaseInfra')
+        with patch(infras) as infra_model, patch(
+                MODULE.format('get_masters_with_zone'), side_effect=masters.get
+        ):
+            infra_model.objects.filter.return_value.distinct.return_value.\
+                select_related.return_value = ['infra-a', 'infra-b']
+            switch = SwitchMasters('zone-1', workers=2)
+            instances = switch.get_all_masters_from_zone()
+
+        self.assertEqual(instances, [self.master_a, self.master_b])
+        self.assertEqual(switch.errors, [])
+
+    def test_discovery_error_is_reported(self, register_task):
+        def masters(infra):
+            if infra == 'infra-b':
+                raise Exception('driver down')
+            return [(self.master_a, 'zone-1')]
+
+        with patch(MODULE.format('DatabaseInfra')) as infra_model, patch(
+                MODULE.format('get_masters_with_zone'), side_effect=masters
+        ):
+            infra_model.objects.filter.return_value.distinct.return_value.\
+                select_related.return_value = ['infra-a', 'infra-b']
+            switch = SwitchMasters('zone-1', workers=2)
+            instances = switch.get_all_masters_from_zone()
+
+        self.assertEqual(instances, [self.master_a])
+        self.assertEqual(len(switch.errors), 1)
+        self.assertIn('ERROR-infra-b', switch.errors[0])
+        self.assertIn('driver down', switch.errors[0])
+
+    @patch(MODULE.format('get_host_zone'))
+    def test_filter_instances_in_zone(self, get_host_zone, register_task):
+        zones = {'host-a': 'zone-1', 'host-c': 'zone-2'}
+        get_host_zone.side_effect = lambda instance: zones[instance.hostname]
+
+        switch = SwitchMasters('zone-1', workers=2)
+        instances = switch.filter_instances_in_zone(
+            [self.master_a, self.other_zone]
+        )
+
+        self.assertEqual(instances, [self.master_a])
+
+    @patch(MODULE.format('get_switch_write_instance_steps'))
+    @patch(MODULE.format('steps_for_instances'))
+    def test_switch_all(self, steps_for_instances, get_steps, register_task):
+        steps_for_instances.return_value = True
+
+        switch = SwitchMasters(
+            'zone-1', instances=[self.master_a, self.master_b], workers=2
+        )
+        switch.instances = [self.master_a, self.master_b]
+        switch.start_switch()
+
+        self.assertEqual(steps_for_instances.call_count, 2)
+        register_task.return_value.set_status_success.assert_any_call(
+            'Could switch all masters'
+        )
+        self.assertFalse(register_task.return_value.set_status_error.called)
+
+    @patch(MODULE.format('get_switch_write_instance_steps'))
+    @patch(MODULE.format('steps_for_instances'))
+    def test_failed_switch(self, steps_for_instances, get_steps,
+                           register_task):
+        steps_for_instances.side_effect = (
+            lambda steps, instances, task: instances[0] is self.master_a
+        )
+
+        switch = SwitchMasters('zone-1', workers=2)
+        switch.instances = [self.master_a, self.master_b]
+        switch.start_switch()
+
+        task = register_task.return_value
+        task.add_detail.assert_any_call('SWITCHED-host-a', level=2)
+        task.set_status_error.assert_any_call('Could not switch master')
+        task.set_status_error.assert_any_call(
+            'Could not switch 1 of 2 masters'
+        )
+        self.assertNotIn(
+            call('Could switch all masters'),
+            task.set_status_success.call_args_list
+        )
+
+    def test_does_not_switch_when_discovery_failed(self, register_task):
+        switch = SwitchMasters('zone-1', workers=2)
+        switch.errors = ['ERROR-infra-b-driver down']
+
+        with patch.object(switch, 'switch_instance') as switch_instance:
+            switch.start_switch()
+
+        self.assertFalse(switch_instance.called)
+        register_task.return_value.set_status_error.assert_called_once_with(
+            'Could not load all masters'
+        )
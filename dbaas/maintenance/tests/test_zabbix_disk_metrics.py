@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+import time
+from unittest import TestCase
+from mock import MagicMock, patch
+from dbaas_zabbix.errors import ZabbixMetricsError
+from maintenance.tasks_disk_resize import (
+    ZabbixDiskMetrics, ZABBIX_DISK_DATA_SIZE_KEY, ZABBIX_DISK_DATA_USED_KEY,
+    ZABBIX_DISK_DATA_MAX_AGE, has_difference_between
+)
+from physical.models import DiskOffering
+
+
+GB = 1024 * 1024 * 1024
+
+
+def make_item(key, value, host, age=60):
+    return {
+        'key_': key, 'lastvalue': value,
+        'lastclock': str(int(time.time() - age)),
+        'hosts': [{'host': host}]
+    }
+
+
+class ZabbixDiskMetricsTestCase(TestCase):
+
+    def setUp(self):
+        self.api = MagicMock()
+        self.api.item.get.return_value = [
+            make_item(ZABBIX_DISK_DATA_SIZE_KEY, str(10 * GB), 'host-01'),
+            make_item(ZABBIX_DISK_DATA_USED_KEY, '4294967296.0', 'host-01'),
+            make_item(ZABBIX_DISK_DATA_SIZE_KEY, str(20 * GB), 'host-02'),
+            make_item(
+                ZABBIX_DISK_DATA_USED_KEY, str(GB), 'host-02',
+                age=ZABBIX_DISK_DATA_MAX_AGE + 60
+            ),
+        ]
+        self.metrics = ZabbixDiskMetrics(self.api, 'client-group').load()
+
+    def test_single_item_get(self):
+        self.metrics.get_current_disk_data_size('host-01')
+        self.metrics.get_current_disk_data_size('host-02')
+        self.assertEqual(self.api.item.get.call_count, 1)
+
+    def test_same_items_as_zabbix_metrics(self):
+        kwargs = self.api.item.get.call_args[1]
+        self.assertEqual(kwargs['group'], 'client-group')
+        self.assertEqual(kwargs['filter']['status'], 0)
+        self.assertEqual(kwargs['filter']['state'], 0)
+        self.assertItemsEqual(kwargs['filter']['key_'], [
+            'hrStorageSizeInBytes[/data]', 'hrStorageUsedInBytes[/data]'
+        ])
+
+    def test_values_in_kb_by_host(self):
+        self.assertEqual(
+            self.metrics.get_current_disk_data_size('host-01'),
+            10 * 1024 * 1024
+        )
+        self.assertEqual(
+            self.metrics.get_current_disk_data_used('host-01'),
+            4 * 1024 * 1024
+        )
+        self.assertEqual(
+            self.metrics.get_current_disk_data_size('host-02'),
+            20 * 1024 * 1024
+        )
+
+    @patch('maintenance.tasks_disk_resize.Configuration.get_by_name_as_float',
+           new=MagicMock(return_value=1.0))
+    def test_size_matches_disk_offering_size_kb(self):
+        offering = DiskOffering(size_kb=10 * 1024 * 1024)
+        size = self.metrics.get_current_disk_data_size('host-01')
+
+        self.assertEqual(size, offering.size_kb)
+        self.assertFalse(has_difference_between(offering.size_kb, size))
+
+    def test_missing_item(self):
+        with self.assertRaises(ZabbixMetricsError):
+            self.metrics.get_current_disk_data_used('host-02')
+        with self.assertRaises(ZabbixMetricsError):
+            self.metrics.get_current_disk_data_size('unknown-host')
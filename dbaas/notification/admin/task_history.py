@@ -24,7 +24,7 @@ class TaskHistoryAdmin(admin.ModelAdmin):
     list_filter_advanced = list_filter_basic + ["task_name", "user", ]
     readonly_fields = ('created_at', 'ended_at', 'task_name', 'task_id', 'task_status', 'user', 'context', 'arguments',
                        'friendly_details_read', 'db_id', 'relevance')
-    exclude = ('details', 'object_id', 'object_class', 'database_name')
+    exclude = ('stored_details', 'object_id', 'object_class', 'database_name')
 
     def friendly_task_name(self, task_history):
         if task_history.task_name:
@@ -62,7 +62,7 @@ class TaskHistoryAdmin(admin.ModelAdmin):
 
         if request.user.has_perm(self.perm_add_database_infra):
             qs = super(TaskHistoryAdmin, self).queryset(request)
-            return qs
+            return qs.prefetch_related('detail_lines')
 
         if request.GET.get('user'):
             query_dict_copy = request.GET.copy()
@@ -71,7 +71,9 @@ class TaskHistoryAdmin(admin.ModelAdmin):
 
         qs = super(TaskHistoryAdmin, self).queryset(request)
         same_team_users = Team.users_at_same_team(request.user)
-        return qs.filter(user__in=[user.username for user in same_team_users])
+        return qs.filter(
+            user__in=[user.username for user in same_team_users]
+        ).prefetch_related('detail_lines')
 
     def changelist_view(self, request, extra_context=None):
         if request.user.has_perm(self.perm_add_database_infra):
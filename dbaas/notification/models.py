@@ -4,6 +4,7 @@ import logging
 import time
 from datetime import datetime
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -19,6 +20,10 @@ class TaskHistory(BaseModel):
 
     class Meta:
         verbose_name_plural = "Task histories"
+        index_together = [
+            ['task_name', 'updated_at'],
+            ['database_name', 'updated_at'],
+        ]
 
     STATUS_RUNNING = 'RUNNING'
     STATUS_SUCCESS = 'SUCCESS'
@@ -61,9 +66,13 @@ class TaskHistory(BaseModel):
     relevance = models.IntegerField(
         max_length=1, choices=RELEVANCE_CHOICES, default=RELEVANCE_CRITICAL
     )
+    DETAILS_BATCH_SIZE = 50
+    DETAILS_FLUSH_SECONDS = 5
+
     context = models.TextField(null=True, blank=True)
-    details = models.TextField(
-        verbose_name=_("Details"), null=True, blank=True
+    stored_details = models.TextField(
+        verbose_name=_("Details"), null=True, blank=True,
+        db_column='details'
     )
     arguments = models.TextField(
         verbose_name=_("Arguments"), null=True, blank=True
@@ -77,9 +86,116 @@ class TaskHistory(BaseModel):
         max_length=255, null=True, blank=True, db_index=True
     )
 
+    def __init__(self, *args, **kwargs):
+        self._details = None
+        self._pending_details = []
+        self._discard_detail_lines = False
+        self._details_present = False
+        self._details_flushed_at = time.time()
+        self._touched_at = time.time()
+        super(TaskHistory, self).__init__(*args, **kwargs)
+
     def __unicode__(self):
         return u"%s" % self.task_id
 
+    @property
+    def details(self):
+        """
+        Details are stored as an append-only list of lines, they are
+        only joined when somebody reads them. List views should
+        prefetch_related('detail_lines') to read them without a query
+        per task.
+        """
+        if self._details is None:
+            lines = []
+            if self.pk and not self._discard_detail_lines:
+                lines = self._detail_messages()
+            lines += self._pending_details
+            if self.stored_details is None and not lines:
+                return None
+            self._details = '{}{}'.format(
+                self.stored_details or '', ''.join(lines)
+            )
+        return self._details
+
+    def _detail_messages(self):
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'detail_lines' in prefetched:
+            return [
+                line.message for line in sorted(
+                    prefetched['detail_lines'], key=lambda line: line.id
+                )
+            ]
+        return list(self.detail_lines.order_by('id').values_list(
+            'message', flat=True
+        ))
+
+    @details.setter
+    def details(self, value):
+        self.stored_details = value
+        self._details = value
+        self._pending_details = []
+        self._discard_detail_lines = True
+        self._details_present = bool(value)
+
+    def _has_details(self):
+        if not self._details_present:
+            self._details_present = bool(
+                self._details or self.stored_details or
+                (self.pk and not self._discard_detail_lines and
+                 self.detail_lines.exists())
+            )
+        return self._details_present
+
+    def _append_details(self, message):
+        self._pending_details.append(message)
+        self._details_present = True
+        if self._details is not None:
+            self._details = '{}{}'.format(self._details, message)
+
+        flush_interval = time.time() - self._details_flushed_at
+        if (len(self._pending_details) >= self.DETAILS_BATCH_SIZE or
+                flush_interval >= self.DETAILS_FLUSH_SECONDS):
+            self.flush_details()
+
+    def flush_details(self):
+        if not self.pk:
+            self.save()
+            return
+
+        if self._discard_detail_lines:
+            self.detail_lines.all().delete()
+            self._discard_detail_lines = False
+
+        if self._pending_details:
+            TaskHistoryDetail.objects.bulk_create([
+                TaskHistoryDetail(task=self, message=message)
+                for message in self._pending_details
+            ])
+            self._pending_details = []
+        self._details_flushed_at = time.time()
+
+        if time.time() - self._touched_at >= self.DETAILS_FLUSH_SECONDS:
+            self.touch()
+
+    def touch(self):
+        """
+        Details do not save the task, so while it runs this keeps
+        updated_at and the user notification of the task alive, without
+        rewriting the row.
+        """
+        self.updated_at = timezone.now()
+        TaskHistory.objects.filter(pk=self.pk).update(
+            updated_at=self.updated_at
+        )
+        touch_task_notification(self)
+        self._touched_at = time.time()
+
+    def save(self, *args, **kwargs):
+        super(TaskHistory, self).save(*args, **kwargs)
+        self._touched_at = time.time()
+        self.flush_details()
+
     def load_context_data(self):
         if self.context == '':
             self.context = '{}'
@@ -92,22 +208,21 @@ class TaskHistory(BaseModel):
         TODO: should we put a timestamp in details? should we append the details?
         """
 
-        if self.details:
-            self.details = "\n%s%s" % (self.details, details)
+        if self._has_details():
+            self._append_details("\n%s" % details)
         else:
-            self.details = details
+            self._append_details(details)
 
         if persist:
-            self.save()
+            self.flush_details()
 
     def add_detail(self, message, level=None):
         extra = ''
         if level > 0:
             extra = '{}> '.format('-' * level)
 
-        self.details = "{}\n".format(self.details) if self.details else ""
-        self.details = '{}{}{}'.format(self.details, extra, message)
-        self.save()
+        separator = "\n" if self._has_details() else ""
+        self._append_details('{}{}{}'.format(separator, extra, message))
 
     def add_step(self, step, total, description):
         current_time = str(time.strftime("%m/%d/%Y %H:%M:%S"))
@@ -115,6 +230,7 @@ class TaskHistory(BaseModel):
             current_time, step, total, description
         )
         self.add_detail(message, level=2)
+        self.flush_details()
         LOG.info(message)
 
     def update_status_for(self, status, details=None):
@@ -122,7 +238,8 @@ class TaskHistory(BaseModel):
             raise RuntimeError("Invalid task status")
 
         self.task_status = status
-        self.details = (self.details or " ") + "\n" + str(details)
+        separator = "\n" if self._has_details() else " \n"
+        self._append_details(separator + str(details))
         if status in [TaskHistory.STATUS_SUCCESS, TaskHistory.STATUS_ERROR, TaskHistory.STATUS_WARNING]:
             self.update_ended_at()
         else:
@@ -210,18 +327,55 @@ class TaskHistory(BaseModel):
             database_unpin.finish_task()
 
 
+class TaskHistoryDetail(models.Model):
+    task = models.ForeignKey(TaskHistory, related_name="detail_lines")
+    message = models.TextField()
+    created_at = models.DateTimeField(
+        verbose_name=_("created_at"), auto_now_add=True
+    )
+
+    def __unicode__(self):
+        return u"%s" % self.message
+
+
 ###########
 # SIGNALS #
 ###########
 
 
+TASK_NOTIFICATION_TIMEOUT = 1200
+
+
+def task_username(task):
+    user = task.user
+    if not user:
+        return None
+    return user if isinstance(user, basestring) else user.username
+
+
+def task_notification_key(username, task):
+    return "task_users:{}:{}".format(username, task.id)
+
+
+def touch_task_notification(task):
+    username = task_username(task)
+    if not username:
+        return
+    conn = get_redis_connection("notification")
+    key = task_notification_key(username, task)
+    # an expired notification is only created again by save_task
+    if conn.expire(key, TASK_NOTIFICATION_TIMEOUT):
+        conn.hset(
+            key, 'updated_at', int(time.mktime(task.updated_at.timetuple()))
+        )
+
+
 @receiver(post_save, sender=TaskHistory)
 def save_task(sender, instance, **kwargs):
-    user = instance.user
-    if user:
+    username = task_username(instance)
+    if username:
         conn = get_redis_connection("notification")
-        username = user if isinstance(user, basestring) else user.username
-        key = "task_users:{}:{}".format(username, instance.id)
+        key = task_notification_key(username, instance)
         params = {
             'task_id': instance.id,
             'task_name': instance.task_name.split('.')[-1],
@@ -239,4 +393,4 @@ def save_task(sender, instance, **kwargs):
                 params['read'] = old_value['read']
 
         conn.hmset(key, params)
-        conn.expire(key, 1200)
+        conn.expire(key, TASK_NOTIFICATION_TIMEOUT)
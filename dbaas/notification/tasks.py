@@ -1,20 +1,25 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
 from datetime import date, timedelta, datetime
-from time import sleep
+from collections import OrderedDict
+import time
 import traceback
 
+from celery import chord
 from celery.utils.log import get_task_logger
-from django.db.models import Sum, Count, Q
+from django.db.models import Q
 from simple_audit.models import AuditRequest
 
 from account.models import User
 from dbaas.celery import app
 from account.models import Team
-from logical.models import Database
+from logical.models import Database, DatabaseLock
 from physical.models import (Plan, DatabaseInfra, Instance, Pool)
 from util import email_notifications, get_worker_name
-from util.decorators import only_one
+from util.decorators import only_one, acquire_lock, release_lock
+from util.wait import park
+from util.concurrency import (ParallelMap, timing_stats,
+                              format_timing_stats)
 from util import providers as util_providers
 from util import get_vm_name
 from system.models import Configuration
@@ -370,30 +375,40 @@ def databaseinfra_notification(self, user=None):
         LOG.warning("database infra notification is disabled")
         return
 
-    # Sum capacity per databseinfra with parameter plan, environment and engine
-    infras = DatabaseInfra.objects.values(
+    # Sum capacity and used per plan, environment and engine, one query
+    group_by = (
         'plan__name', 'environment__name', 'engine__engine_type__name',
         'plan__provider'
-    ).annotate(capacity=Sum('capacity'))
+    )
+    infras = DatabaseInfra.with_capacity().extra(select={
+        'capacity_notifiable': (
+            'SELECT COUNT(*) FROM logical_database '
+            'WHERE logical_database.databaseinfra_id = '
+            'physical_databaseinfra.id '
+            'AND NOT logical_database.is_in_quarantine '
+            'AND logical_database.subscribe_to_email_events'
+        )
+    }).values(
+        'capacity', 'capacity_used', 'capacity_notifiable', *group_by
+    )
+    groups = OrderedDict()
     for infra in infras:
-        try:
-            database = infra.databases.get()
-        except Database.MultipleObjectsReturned:
-            pass
-        else:
-            if database.is_in_quarantine:
-                continue
-            if not database.subscribe_to_email_events:
-                continue
-
-        used = DatabaseInfra.objects.filter(
-            plan__name=infra['plan__name'],
-            environment__name=infra['environment__name'],
-            engine__engine_type__name=infra['engine__engine_type__name']
-        ).aggregate(used=Count('databases'))
-        # calculate the percentage
-
-        percent = int(used['used'] * 100 / infra['capacity'])
+        key = tuple(infra[field] for field in group_by)
+        group = groups.setdefault(key, dict(
+            zip(group_by, key), capacity=0, used=0, notifiable=0
+        ))
+        group['capacity'] += infra['capacity']
+        group['used'] += infra['capacity_used']
+        group['notifiable'] += infra['capacity_notifiable']
+
+    for infra in groups.values():
+        # a single database in quarantine or not subscribed is not notified
+        if infra['used'] == 1 and not infra['notifiable']:
+            continue
+        if not infra['capacity']:
+            continue
+
+        percent = int(infra['used'] * 100 / infra['capacity'])
         if (percent >= threshold_infra_notification
                 and infra['plan__provider'] != Plan.CLOUDSTACK):
             LOG.info('Plan %s in environment %s with %s%% occupied' % (
@@ -402,7 +417,7 @@ def databaseinfra_notification(self, user=None):
             context = {}
             context['plan'] = infra['plan__name']
             context['environment'] = infra['environment__name']
-            context['used'] = used['used']
+            context['used'] = infra['used']
             context['capacity'] = infra['capacity']
             context['percent'] = percent
             email_notifications.databaseinfra_ending(context=context)
@@ -504,6 +519,40 @@ def database_notification(self):
     return
 
 
+def _probe_databaseinfra_status(databases):
+    """
+    Probes the databaseinfra shared by databases once and returns
+    a list of (database, new status).
+    """
+    instances_status = None
+    statuses = []
+    for database in databases:
+        if database.database_status and database.database_status.is_alive:
+            status = Database.ALIVE
+            if instances_status is None:
+                instances_status = (
+                    database.databaseinfra.check_instances_status()
+                )
+            if instances_status == database.databaseinfra.ALERT:
+                status = Database.ALERT
+        else:
+            status = Database.DEAD
+
+        statuses.append((database, status))
+
+    return statuses
+
+
+def _update_database_status_concurrency(engine_type):
+    default = Configuration.get_by_name_as_int(
+        'update_database_status_concurrency', default=10
+    )
+    return Configuration.get_by_name_as_int(
+        'update_database_status_concurrency_{}'.format(engine_type),
+        default=default
+    )
+
+
 @app.task(bind=True)
 @only_one(key="get_databases_status")
 def update_database_status(self):
@@ -513,10 +562,17 @@ def update_database_status(self):
         task_history = TaskHistory.register(
             request=self.request, user=None, worker_name=worker_name)
         task_history.relevance = TaskHistory.RELEVANCE_WARNING
-        databases = Database.objects.all()
+        started_at = time.time()
+        databases = Database.objects.select_related(
+            'databaseinfra', 'databaseinfra__engine__engine_type'
+        ).order_by('databaseinfra')
+        locked = set(DatabaseLock.objects.values_list(
+            'database_id', flat=True
+        ))
         msgs = []
+        engines = {}
         for database in databases:
-            if database.is_locked:
+            if database.id in locked:
                 msg = ("\nSkip updating database status for {}. "
                        "Database is locked by another task."
                 ).format(database)
@@ -524,24 +580,49 @@ def update_database_status(self):
                 LOG.info(msg)
                 continue
 
-            if database.database_status and database.database_status.is_alive:
-                database.status = Database.ALIVE
-
-                instances_status = (
-                    database.databaseinfra.check_instances_status()
-                )
-                if instances_status == database.databaseinfra.ALERT:
-                    database.status = Database.ALERT
-
-            else:
-                database.status = Database.DEAD
+            infras = engines.setdefault(database.engine_type, OrderedDict())
+            infras.setdefault(database.databaseinfra_id, []).append(database)
 
-            database.save(update_fields=['status'])
-            msg = "\nUpdating status for database: {}, status: {}".format(
-                database, database.status)
-            msgs.append(msg)
-            LOG.info(msg)
+        probes = OrderedDict()
+        for engine_type, infras in engines.items():
+            probes[engine_type] = ParallelMap(
+                _probe_databaseinfra_status, infras.values(),
+                workers=_update_database_status_concurrency(engine_type)
+            )
 
+        changed = {}
+        stats = []
+        for engine_type, probe in probes.items():
+            results = probe.get()
+            stats.append(format_timing_stats(
+                engine_type, timing_stats(results), probe.elapsed
+            ))
+            for result in results:
+                if not result.ok:
+                    msg = "\nCould not update status for {}: {}".format(
+                        ", ".join(map(str, result.item)), result.error
+                    )
+                    msgs.append(msg)
+                    continue
+
+                for database, status in result.result:
+                    if database.status != status:
+                        changed.setdefault(status, []).append(database.id)
+                    database.status = status
+                    msg = ("\nUpdating status for database: {}, "
+                           "status: {}").format(database, database.status)
+                    msgs.append(msg)
+                    LOG.info(msg)
+
+        for status, ids in changed.items():
+            Database.objects.filter(id__in=ids).update(status=status)
+
+        msgs.append("\n\nTiming statistics")
+        msgs.extend("\n{}".format(stat) for stat in stats)
+        msgs.append("\n{} status changed, total time {:.2f}s".format(
+            sum(len(ids) for ids in changed.values()),
+            time.time() - started_at
+        ))
         task_history.update_status_for(
             TaskHistory.STATUS_SUCCESS, details="\n".join(
                 value for value in msgs
@@ -587,28 +668,29 @@ def check_databases_status(self, wait=60):
     return
 
 
-@app.task(bind=True)
-def check_database_is_alive(self, database, wait=60, retries=3):
-    if database.is_locked:
-        msg = ("Skip checking if {} is alive. "
-               "Database is locked by another task."
-        ).format(database)
-        LOG.info(msg)
-        return
-    LOG.info("Checking {} status".format(database))
-    worker_name = get_worker_name()
-    task_history = TaskHistory.register(
-        request=self.request, user=None, worker_name=worker_name
-    )
-    task_history.object_id = database.id
-    task_history.object_class = database._meta.db_table
-    status = [Database.ALIVE, Database.INITIALIZING]
-    task_history.update_status_for(
-        TaskHistory.STATUS_RUNNING,
-        details='Checking {} status\n'.format(database)
-    )
-    sleep(wait)
-    for attempt in range(retries):
+@app.task(bind=True, max_retries=None)
+def check_database_is_alive(self, database, wait=60, retries=3, attempt=0,
+                            task_history=None):
+    if not attempt:
+        if database.is_locked:
+            msg = ("Skip checking if {} is alive. "
+                   "Database is locked by another task."
+            ).format(database)
+            LOG.info(msg)
+            return
+        LOG.info("Checking {} status".format(database))
+        worker_name = get_worker_name()
+        task_history = TaskHistory.register(
+            request=self.request, user=None, worker_name=worker_name
+        )
+        task_history.object_id = database.id
+        task_history.object_class = database._meta.db_table
+        task_history.update_status_for(
+            TaskHistory.STATUS_RUNNING,
+            details='Checking {} status\n'.format(database)
+        )
+    else:
+        status = [Database.ALIVE, Database.INITIALIZING]
         database.update_status()
         if database.status in status:
             task_history.update_status_for(
@@ -618,13 +700,19 @@ def check_database_is_alive(self, database, wait=60, retries=3):
                 )
             )
             return
-        sleep(wait)
-    task_history.update_status_for(
-        TaskHistory.STATUS_ERROR, details='Database {} is {}\n'.format(
-            database, database.get_status_display()
-        )
-    )
-    return
+        if attempt >= retries:
+            task_history.update_status_for(
+                TaskHistory.STATUS_ERROR, details='Database {} is {}\n'.format(
+                    database, database.get_status_display()
+                )
+            )
+            return
+
+    # the worker is free while waiting for the next check
+    return park(self, wait, args=(database,), kwargs={
+        'wait': wait, 'retries': retries, 'attempt': attempt + 1,
+        'task_history': task_history
+    })
 
 
 @app.task(bind=True)
@@ -700,9 +788,29 @@ def update_infra_instances_sizes(self):
     return
 
 
+def _chunks(items, size):
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+UPDATE_INSTANCES_STATUS_LOCK = "get_instances_status"
+
+
 @app.task(bind=True)
-@only_one(key="get_instances_status")
 def update_instances_status(self):
+    # The lock is held until the chord finishes (update_instances_status_
+    # finish or _failed release it), the timeout only covers lost chords.
+    # The chord needs a result backend shared by all workers, see
+    # CELERY_CACHE_BACKEND.
+    lock_token = acquire_lock(
+        UPDATE_INSTANCES_STATUS_LOCK,
+        Configuration.get_by_name_as_int(
+            'update_instances_status_timeout', default=60*60
+        )
+    )
+    if not lock_token:
+        return
+
     LOG.info("Retrieving all databaseinfras")
     worker_name = get_worker_name()
     task_history = TaskHistory.register(
@@ -710,37 +818,134 @@ def update_instances_status(self):
     task_history.relevance = TaskHistory.RELEVANCE_WARNING
 
     try:
-        infras = DatabaseInfra.objects.all()
+        locked = list(DatabaseLock.objects.values_list(
+            'database__databaseinfra_id', flat=True
+        ))
+        infras = DatabaseInfra.objects.exclude(id__in=locked)
         msgs = []
-        for databaseinfra in infras:
-            database = databaseinfra.databases.first()
-            if database and database.is_locked:
-                msg = ("\nSkip updating instance status for {}. "
-                       "Database is locked by another task."
-                ).format(databaseinfra)
-                msgs.append(msg)
-                LOG.info(msg)
-                continue
+        for databaseinfra in DatabaseInfra.objects.filter(id__in=locked):
+            msg = ("\nSkip updating instance status for {}. "
+                   "Database is locked by another task."
+            ).format(databaseinfra)
+            msgs.append(msg)
+            LOG.info(msg)
+
+        chunk_size = Configuration.get_by_name_as_int(
+            'update_instances_status_chunk_size', default=50
+        )
+        infra_ids = list(infras.order_by('id').values_list('id', flat=True))
+        chunks = list(_chunks(infra_ids, max(chunk_size, 1)))
+        task_history.update_details(
+            "\n".join(msgs + [
+                "\nDispatching {} databaseinfras in {} chunks".format(
+                    len(infra_ids), len(chunks)
+                )
+            ]),
+            persist=True
+        )
+        finish = update_instances_status_finish.s(
+            task_history_id=task_history.id, started_at=time.time(),
+            lock_token=lock_token
+        )
+        if not chunks:
+            finish.delay([])
+            return
 
-            LOG.info("Retrieving all instances for {}".format(databaseinfra))
-            for instance in Instance.objects.filter(
-                    databaseinfra=databaseinfra):
-                instance.update_status()
+        chord(
+            update_instances_status_chunk.s(chunk) for chunk in chunks
+        )(finish.on_error(update_instances_status_failed.s(
+            task_history_id=task_history.id, lock_token=lock_token
+        )))
+    except Exception as e:
+        release_lock(UPDATE_INSTANCES_STATUS_LOCK, lock_token)
+        task_history.update_status_for(TaskHistory.STATUS_ERROR, details=e)
+
+    return
 
-                msg = ("\nUpdating instance status, instance: {}, "
-                       "status: {}").format(instance, instance.status)
-                msgs.append(msg)
-                LOG.info(msg)
 
+def _update_infra_instances_status(databaseinfra, changed):
+    msgs = []
+    driver = databaseinfra.get_driver()
+    for instance in databaseinfra.instances.all():
+        status = instance.current_status(driver=driver)
+        if instance.status != status:
+            changed.setdefault(status, []).append(instance.id)
+        instance.status = status
+
+        msg = ("\nUpdating instance status, instance: {}, "
+               "status: {}").format(instance, instance.status)
+        msgs.append(msg)
+        LOG.info(msg)
+
+    try:
+        driver.refresh_replication_roles()
+    except Exception as e:
+        msgs.append("\nCould not refresh replication roles for {}: {}".format(
+            databaseinfra, e
+        ))
+    return msgs
+
+
+@app.task(bind=True)
+def update_instances_status_chunk(self, infra_ids):
+    """
+    Checks every instance of the given databaseinfras reusing one driver
+    per databaseinfra and writes the status transitions in bulk.
+    Errors are reported per databaseinfra, so the chord always finishes.
+    """
+    msgs = []
+    changed = {}
+    for databaseinfra in DatabaseInfra.objects.filter(
+            id__in=infra_ids).select_related('engine__engine_type'):
+        LOG.info("Retrieving all instances for {}".format(databaseinfra))
+        try:
+            msgs.extend(
+                _update_infra_instances_status(databaseinfra, changed)
+            )
+        except Exception as e:
+            LOG.warning("Could not update instances status for {}: {}".format(
+                databaseinfra, e
+            ))
+            msgs.append("\nCould not update instances status for {}: {}".format(
+                databaseinfra, e
+            ))
+
+    for status, ids in changed.items():
+        Instance.objects.filter(id__in=ids).update(status=status)
+
+    return "".join(msgs)
+
+
+@app.task(bind=True)
+def update_instances_status_finish(self, results, task_history_id,
+                                   started_at, lock_token=None):
+    try:
+        task_history = TaskHistory.objects.get(id=task_history_id)
         task_history.update_status_for(
-            TaskHistory.STATUS_SUCCESS, details="\n".join(
-                value for value in msgs
+            TaskHistory.STATUS_SUCCESS,
+            details="{}\n\nTotal time {:.2f}s".format(
+                "".join(results), time.time() - started_at
             )
         )
-    except Exception as e:
-        task_history.update_status_for(TaskHistory.STATUS_ERROR, details=e)
+    finally:
+        if lock_token:
+            release_lock(UPDATE_INSTANCES_STATUS_LOCK, lock_token)
 
-    return
+
+@app.task(bind=True)
+def update_instances_status_failed(self, task_id, task_history_id,
+                                   lock_token=None):
+    try:
+        task_history = TaskHistory.objects.get(id=task_history_id)
+        task_history.update_status_for(
+            TaskHistory.STATUS_ERROR,
+            details="\nChunk of instances status failed, see task {}".format(
+                task_id
+            )
+        )
+    finally:
+        if lock_token:
+            release_lock(UPDATE_INSTANCES_STATUS_LOCK, lock_token)
 
 
 @app.task(bind=True)
@@ -1626,6 +1831,34 @@ def update_organization_name_monitoring(self, task, database, organization_name)
         return True
 
 
+@app.task(bind=True)
+def add_acl_for_app_bind(self, task, database, app_name):
+    from workflow.steps.util.base import ACLFromHellClient
+
+    worker_name = get_worker_name()
+    task_history = TaskHistory.register(
+        request=self.request, worker_name=worker_name, task_history=task
+    )
+    task_history.add_detail('Adding ACLs for app {}'.format(app_name))
+
+    try:
+        client = ACLFromHellClient(database.environment)
+        hostnames = client.get_acl_hostnames(database)
+        added = client.add_acls(database, app_name, hostnames)
+        task_history.add_detail('{} of {} rules added, others were '
+                                'already registered'.format(
+                                    len(added), len(hostnames)
+                                ), level=2)
+    except Exception as e:
+        task_history.add_detail('Error: {}'.format(e))
+        task.set_status_error('Could not add ACLs')
+        return False
+
+    else:
+        task.set_status_success('ACLs added with success')
+        return True
+
+
 @app.task(bind=True)
 def change_database_persistence(self, database, user, task, source_plan, target_plan, since_step=0):
 
@@ -1745,6 +1978,39 @@ def database_set_ssl_not_required(self, database, user, task, since_step=0):
         )
 
 
+PROMETHEUS_QUERY_URL = "https://prometheus-br1.tsuru.gcp.i.globo/api/v1/query"
+PROMQL_REGEX_SPECIAL = set('\\.^$*+?()[]{}|')
+
+
+def _promql_regex_value(names):
+    # escaped for RE2 and then for the PromQL string literal
+    def escape(name):
+        return ''.join(
+            '\\\\' + char if char in PROMQL_REGEX_SPECIAL else char
+            for char in name
+        ).replace('"', '\\"')
+    return '|'.join(escape(name) for name in names)
+
+
+def _query_apps_bind_name(url, names):
+    query = 'tsuru_service_instance_bind{{service_instance=~"{}"}}'.format(
+        _promql_regex_value(names)
+    )
+    response = requests.post(url, data={'query': query}, verify=False)
+    response.raise_for_status()
+    content = json.loads(response.content)
+
+    apps_by_name = {name: [] for name in names}
+    for result in content["data"]["result"]:
+        metric = result["metric"]
+        apps = apps_by_name.get(metric.get("service_instance"))
+        if apps is not None and metric["app"] not in apps:
+            apps.append(metric["app"])
+    return {
+        name: ', '.join(sorted(apps)) for name, apps in apps_by_name.items()
+    }
+
+
 @app.task(bind=True)
 @only_one(key="update_database_apps_bind_name", timeout=600)
 def update_database_apps_bind_name(self):
@@ -1789,48 +2055,57 @@ def update_database_apps_bind_name(self):
        }
     }
     '''
-    try:
-        worker_name = get_worker_name()
-        task_history = TaskHistory.register(
-            request=self.request, user=None, worker_name=worker_name)
-        task_history.relevance = TaskHistory.RELEVANCE_WARNING
+    worker_name = get_worker_name()
+    task_history = TaskHistory.register(
+        request=self.request, user=None, worker_name=worker_name)
+    task_history.relevance = TaskHistory.RELEVANCE_WARNING
 
-        db = Database
-        databases = db.objects.all()
-        database_count = 0
+    chunk_size = Configuration.get_by_name_as_int(
+        'update_database_apps_bind_name_chunk_size', default=200
+    )
+    url = Configuration.get_by_name('prometheus_query_url') or PROMETHEUS_QUERY_URL
+
+    databases = list(Database.objects.values_list('id', 'name', 'apps_bind_name'))
+    names = sorted(set(name for _, name, _ in databases))
+    apps_by_name = {}
+    queries = errors = 0
+    for chunk in _chunks(names, chunk_size):
+        queries += 1
+        try:
+            apps_by_name.update(_query_apps_bind_name(url, chunk))
+        except Exception as e:
+            errors += 1
+            LOG.error("Error querying apps bind name: {}".format(e))
+            task_history.add_detail(
+                'Error querying prometheus for {} databases: {}'.format(
+                    len(chunk), e
+                )
+            )
 
-        for database in databases:
-            data_query = "query=tsuru_service_instance_bind{service_instance="
-            query = "'{}'".format(database.name)
-            data_query = data_query + query + "}"
-            response = requests.get("https://prometheus-br1.tsuru.gcp.i.globo/api/v1/query", params=data_query,
-                                    verify=False)
-            try:
-                content = json.loads(response.content)
-                results = content["data"]["result"]
-
-                apps_bind_name = ""
-                for result in results:
-                    app_name = result["metric"]["app"]
-                    if len(apps_bind_name) > 0:
-                        apps_bind_name += ', ' + app_name
-                    else:
-                        apps_bind_name = app_name
-
-                database_objects = db.objects.filter(id=database.id).first()
-                database_objects.apps_bind_name = apps_bind_name
-                database_objects.save()
-                database_count += 1
-
-            except Exception as e:
-                task_history.update_status_for(TaskHistory.STATUS_ERROR, details=e)
-                pass
+    ids_by_apps = {}
+    for database_id, name, current in databases:
+        if name not in apps_by_name:
+            continue
+        apps_bind_name = apps_by_name[name]
+        if apps_bind_name != (current or ''):
+            ids_by_apps.setdefault(apps_bind_name, []).append(database_id)
 
-        task_history.update_status_for(TaskHistory.STATUS_SUCCESS,
-                                       details='Updating database apps bind name done, the amount: {}'.format(
-                                           database_count))
-    except Exception as e:
-        task_history.update_status_for(TaskHistory.STATUS_ERROR, details='Error connect prometheus')
+    database_count = 0
+    for apps_bind_name, ids in ids_by_apps.items():
+        database_count += Database.objects.filter(id__in=ids).update(
+            apps_bind_name=apps_bind_name
+        )
+
+    status = TaskHistory.STATUS_SUCCESS
+    if errors:
+        status = TaskHistory.STATUS_ERROR
+    task_history.update_status_for(
+        status,
+        details='Updating database apps bind name done, {} changed in {} '
+                'prometheus queries ({} errors)'.format(
+                    database_count, queries, errors
+                )
+    )
 
 
 class TaskRegister(TaskRegisterBase):
@@ -2109,6 +2384,8 @@ class TaskRegister(TaskRegisterBase):
             current_hour=current_hour
         )
 
+        return task
+
     @classmethod
     def database_remove_backup(cls, database, snapshot, user):
         from backup.tasks import remove_database_backup
@@ -2678,6 +2955,21 @@ class TaskRegister(TaskRegisterBase):
         task = cls.create_task(task_params)
         update_organization_name_monitoring.delay(task=task, database=database, organization_name=organization_name)
 
+    @classmethod
+    def database_app_bind_acl(cls, database, app_name):
+
+        args = "Database: {}, App Name: {}".format(database, app_name)
+        task_params = {
+            'task_name': "add_acl_for_app_bind",
+            'arguments': args,
+            'database': database,
+            'relevance': TaskHistory.RELEVANCE_ERROR
+        }
+
+        task = cls.create_task(task_params)
+        add_acl_for_app_bind.delay(task=task, database=database, app_name=app_name)
+        return task
+
     @classmethod
     def database_change_persistence(cls, database, user, since_step=None):
 
@@ -0,0 +1,72 @@
+from django.test import TestCase
+from mock import patch, MagicMock
+
+from logical.tests.factory import DatabaseFactory
+from notification.tasks import databaseinfra_notification
+from physical.tests.factory import DatabaseInfraFactory
+
+
+@patch('notification.tasks.get_worker_name', new=MagicMock())
+@patch('notification.tasks.TaskHistory.register', new=MagicMock())
+@patch('notification.tasks.Configuration.get_by_name_as_int',
+       new=MagicMock(return_value=50))
+@patch('notification.tasks.email_notifications.databaseinfra_ending')
+class DatabaseInfraNotificationTestCase(TestCase):
+
+    def notified(self, databaseinfra_ending):
+        return [
+            kwargs['context'] for _, kwargs in
+            databaseinfra_ending.call_args_list
+        ]
+
+    def test_group_over_threshold(self, databaseinfra_ending):
+        infra = DatabaseInfraFactory(capacity=2)
+        other_infra = DatabaseInfraFactory(
+            capacity=2, plan=infra.plan, environment=infra.environment,
+            engine=infra.engine
+        )
+        DatabaseFactory(databaseinfra=infra)
+        DatabaseFactory(databaseinfra=infra)
+        DatabaseFactory(databaseinfra=other_infra)
+
+        databaseinfra_notification()
+
+        contexts = self.notified(databaseinfra_ending)
+        self.assertEqual(len(contexts), 1)
+        self.assertEqual(contexts[0]['plan'], infra.plan.name)
+        self.assertEqual(contexts[0]['used'], 3)
+        self.assertEqual(contexts[0]['capacity'], 4)
+        self.assertEqual(contexts[0]['percent'], 75)
+
+    def test_group_under_threshold(self, databaseinfra_ending):
+        infra = DatabaseInfraFactory(capacity=4)
+        DatabaseFactory(databaseinfra=infra)
+
+        databaseinfra_notification()
+
+        self.assertFalse(databaseinfra_ending.called)
+
+    def test_single_database_in_quarantine(self, databaseinfra_ending):
+        infra = DatabaseInfraFactory(capacity=1)
+        DatabaseFactory(databaseinfra=infra, is_in_quarantine=True)
+
+        databaseinfra_notification()
+
+        self.assertFalse(databaseinfra_ending.called)
+
+    def test_single_database_not_subscribed(self, databaseinfra_ending):
+        infra = DatabaseInfraFactory(capacity=1)
+        DatabaseFactory(databaseinfra=infra, subscribe_to_email_events=False)
+
+        databaseinfra_notification()
+
+        self.assertFalse(databaseinfra_ending.called)
+
+    def test_zero_capacity_group(self, databaseinfra_ending):
+        infra = DatabaseInfraFactory(capacity=0)
+        DatabaseFactory(databaseinfra=infra)
+        DatabaseInfraFactory(capacity=0)
+
+        databaseinfra_notification()
+
+        self.assertFalse(databaseinfra_ending.called)
@@ -0,0 +1,105 @@
+from django.test import TestCase
+from mock import patch, MagicMock
+import json
+
+from dbaas.tests.helpers import DatabaseHelper
+from logical.models import Database
+from notification.tasks import (update_database_apps_bind_name,
+                                _promql_regex_value)
+
+
+def prometheus_response(*series):
+    response = MagicMock()
+    response.content = json.dumps({
+        "status": "success",
+        "data": {
+            "resultType": "vector",
+            "result": [
+                {"metric": {"service_instance": name, "app": app},
+                 "value": [1660912779.46, "1"]}
+                for name, app in series
+            ]
+        }
+    })
+    return response
+
+
+@patch('notification.tasks.requests.post')
+@patch('notification.models.TaskHistory.register')
+@patch('notification.tasks.get_worker_name')
+class UpdateDatabaseAppsBindNameTestCase(TestCase):
+
+    def setUp(self):
+        self.database = DatabaseHelper.create(name='fake_db')
+        self.other_database = DatabaseHelper.create(name='other_db')
+
+    def test_single_query_for_all_databases(self, worker_mock, register_mock,
+                                            post_mock):
+        post_mock.return_value = prometheus_response(
+            ('fake_db', 'app-b'), ('fake_db', 'app-a'),
+            ('fake_db', 'app-a'), ('other_db', 'app-c')
+        )
+
+        update_database_apps_bind_name()
+
+        self.assertEqual(post_mock.call_count, 1)
+        query = post_mock.call_args[1]['data']['query']
+        self.assertIn('service_instance=~"fake_db|other_db"', query)
+        self.assertEqual(
+            Database.objects.get(id=self.database.id).apps_bind_name,
+            'app-a, app-b'
+        )
+        self.assertEqual(
+            Database.objects.get(id=self.other_database.id).apps_bind_name,
+            'app-c'
+        )
+
+    def test_only_changed_rows_are_written(self, worker_mock, register_mock,
+                                           post_mock):
+        Database.objects.filter(id=self.database.id).update(
+            apps_bind_name='app-a'
+        )
+        post_mock.return_value = prometheus_response(
+            ('fake_db', 'app-a'), ('other_db', 'app-c')
+        )
+
+        with patch.object(Database.objects, 'filter',
+                          wraps=Database.objects.filter) as filter_mock:
+            update_database_apps_bind_name()
+
+        filter_mock.assert_called_once_with(id__in=[self.other_database.id])
+        self.assertEqual(
+            Database.objects.get(id=self.other_database.id).apps_bind_name,
+            'app-c'
+        )
+
+    @patch('notification.tasks.Configuration.get_by_name_as_int',
+           new=MagicMock(return_value=1))
+    def test_failed_chunk_keeps_current_value(self, worker_mock,
+                                              register_mock, post_mock):
+        Database.objects.filter(id=self.database.id).update(
+            apps_bind_name='app-a'
+        )
+        post_mock.side_effect = [
+            Exception('Prometheus is down'),
+            prometheus_response(('other_db', 'app-c'))
+        ]
+
+        update_database_apps_bind_name()
+
+        self.assertEqual(post_mock.call_count, 2)
+        self.assertEqual(
+            Database.objects.get(id=self.database.id).apps_bind_name, 'app-a'
+        )
+        self.assertEqual(
+            Database.objects.get(id=self.other_database.id).apps_bind_name,
+            'app-c'
+        )
+
+
+class PromqlRegexValueTestCase(TestCase):
+
+    def test_escape_regex_chars(self):
+        self.assertEqual(
+            _promql_regex_value(['my.db', 'other_db']), 'my\\\\.db|other_db'
+        )
@@ -0,0 +1,86 @@
+from django.test import TestCase
+from mock import patch, MagicMock, PropertyMock
+
+from model_mommy import mommy
+
+from dbaas.tests.helpers import DatabaseHelper, InfraHelper
+from logical.models import Database
+from notification.tasks import update_database_status
+
+
+@patch('notification.tasks.get_worker_name', new=MagicMock())
+@patch('notification.tasks.TaskHistory.register')
+@patch('physical.models.DatabaseInfra.check_instances_status')
+@patch('logical.models.Database.database_status', new_callable=PropertyMock)
+class UpdateDatabaseStatusTestCase(TestCase):
+
+    def setUp(self):
+        self.task_history = mommy.make(
+            'TaskHistory',
+            task_name='notification.tasks.update_database_status',
+        )
+        self.infra = InfraHelper.create()
+
+    def _run(self, task_register_mock):
+        task_register_mock.return_value = self.task_history
+        update_database_status()
+        return self.task_history
+
+    def test_database_alive(self, status_mock, check_instances_mock,
+                            task_register_mock):
+        database = DatabaseHelper.create(
+            databaseinfra=self.infra, status=Database.DEAD
+        )
+        status_mock.return_value = MagicMock(is_alive=True)
+        check_instances_mock.return_value = self.infra.ALIVE
+
+        task_history = self._run(task_register_mock)
+
+        self.assertEqual(task_history.task_status, 'SUCCESS')
+        self.assertEqual(
+            Database.objects.get(id=database.id).status, Database.ALIVE
+        )
+        self.assertIn('Timing statistics', task_history.details)
+
+    def test_database_alert(self, status_mock, check_instances_mock,
+                            task_register_mock):
+        database = DatabaseHelper.create(
+            databaseinfra=self.infra, status=Database.ALIVE
+        )
+        status_mock.return_value = MagicMock(is_alive=True)
+        check_instances_mock.return_value = self.infra.ALERT
+
+        self._run(task_register_mock)
+
+        self.assertEqual(
+            Database.objects.get(id=database.id).status, Database.ALERT
+        )
+
+    def test_database_dead(self, status_mock, check_instances_mock,
+                           task_register_mock):
+        database = DatabaseHelper.create(
+            databaseinfra=self.infra, status=Database.ALIVE
+        )
+        status_mock.return_value = None
+
+        self._run(task_register_mock)
+
+        self.assertEqual(
+            Database.objects.get(id=database.id).status, Database.DEAD
+        )
+        self.assertFalse(check_instances_mock.called)
+
+    def test_skip_locked_database(self, status_mock, check_instances_mock,
+                                  task_register_mock):
+        database = DatabaseHelper.create(
+            databaseinfra=self.infra, status=Database.ALIVE
+        )
+        mommy.make('DatabaseLock', database=database, task=self.task_history)
+        status_mock.return_value = None
+
+        task_history = self._run(task_register_mock)
+
+        self.assertEqual(
+            Database.objects.get(id=database.id).status, Database.ALIVE
+        )
+        self.assertIn('Database is locked by another task', task_history.details)
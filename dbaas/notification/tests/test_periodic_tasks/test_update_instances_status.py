@@ -0,0 +1,111 @@
+from django.test import TestCase
+from mock import patch
+
+from model_mommy import mommy
+
+from dbaas.tests.helpers import InfraHelper, InstanceHelper
+from physical.models import Instance
+from notification.tasks import (update_instances_status_chunk,
+                                update_instances_status_finish,
+                                update_instances_status_failed,
+                                UPDATE_INSTANCES_STATUS_LOCK)
+
+
+class UpdateInstancesStatusChunkTestCase(TestCase):
+
+    def setUp(self):
+        self.infra = InfraHelper.create()
+        self.instances = InstanceHelper.create_instances_by_quant(
+            self.infra, qt=2
+        )
+
+    @patch('physical.models.DatabaseInfra.get_driver')
+    def test_reuse_driver_per_infra(self, get_driver_mock):
+        get_driver_mock.return_value.check_status.return_value = True
+
+        update_instances_status_chunk([self.infra.id])
+
+        self.assertEqual(get_driver_mock.call_count, 1)
+        self.assertEqual(
+            get_driver_mock.return_value.check_status.call_count, 2
+        )
+
+    @patch('physical.models.DatabaseInfra.get_driver')
+    def test_status_transitions(self, get_driver_mock):
+        get_driver_mock.return_value.check_status.side_effect = [True, False]
+
+        msgs = update_instances_status_chunk([self.infra.id])
+
+        statuses = Instance.objects.filter(
+            databaseinfra=self.infra
+        ).order_by('id').values_list('status', flat=True)
+        self.assertEqual(list(statuses), [Instance.ALIVE, Instance.DEAD])
+        self.assertIn('Updating instance status', msgs)
+
+    @patch('physical.models.DatabaseInfra.get_driver')
+    def test_error_on_infra_does_not_fail_chunk(self, get_driver_mock):
+        other_infra = InfraHelper.create()
+        InstanceHelper.create_instances_by_quant(other_infra, qt=1)
+        driver = get_driver_mock.return_value
+        get_driver_mock.side_effect = [Exception('no driver'), driver]
+        driver.check_status.return_value = True
+
+        msgs = update_instances_status_chunk([self.infra.id, other_infra.id])
+
+        self.assertIn('Could not update instances status', msgs)
+        self.assertIn('no driver', msgs)
+        self.assertIn('Updating instance status', msgs)
+
+    @patch('physical.models.DatabaseInfra.get_driver')
+    def test_inactive_instance_is_not_checked(self, get_driver_mock):
+        Instance.objects.filter(databaseinfra=self.infra).update(
+            is_active=False
+        )
+
+        update_instances_status_chunk([self.infra.id])
+
+        self.assertFalse(get_driver_mock.return_value.check_status.called)
+        self.assertFalse(Instance.objects.filter(
+            databaseinfra=self.infra
+        ).exclude(status=Instance.INACTIVE).exists())
+
+
+@patch('notification.tasks.release_lock')
+class UpdateInstancesStatusFinishTestCase(TestCase):
+
+    def setUp(self):
+        self.task_history = mommy.make(
+            'TaskHistory',
+            task_name='notification.tasks.update_instances_status',
+        )
+
+    def test_join_chunk_results(self, release_lock):
+        task_history = self.task_history
+
+        update_instances_status_finish(
+            ['\nchunk 1', '\nchunk 2'], task_history_id=task_history.id,
+            started_at=0, lock_token='token'
+        )
+
+        task_history = task_history.__class__.objects.get(id=task_history.id)
+        self.assertEqual(task_history.task_status, 'SUCCESS')
+        self.assertIn('chunk 1', task_history.details)
+        self.assertIn('chunk 2', task_history.details)
+        release_lock.assert_called_once_with(
+            UPDATE_INSTANCES_STATUS_LOCK, 'token'
+        )
+
+    def test_failed_chunk_closes_task(self, release_lock):
+        update_instances_status_failed(
+            'chord-id', task_history_id=self.task_history.id,
+            lock_token='token'
+        )
+
+        task_history = self.task_history.__class__.objects.get(
+            id=self.task_history.id
+        )
+        self.assertEqual(task_history.task_status, 'ERROR')
+        self.assertIn('chord-id', task_history.details)
+        release_lock.assert_called_once_with(
+            UPDATE_INSTANCES_STATUS_LOCK, 'token'
+        )
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
+import time
+from datetime import datetime
 from django.test import TestCase
+from mock import patch
 from notification.models import TaskHistory
 from notification.tests.factory import TaskHistoryFactory
 from logical.tests.factory import DatabaseFactory
@@ -66,6 +69,100 @@ class TaskHistoryTestCase(TestCase):
         self.task.add_step(step=step, total=total, description=description)
         self.assertIn(message, self.task.details)
 
+    def test_add_detail_does_not_rewrite_row(self):
+        updated_at = TaskHistory.objects.get(id=self.task.id).updated_at
+
+        self.task.add_detail(message='Testing')
+        self.task.flush_details()
+
+        task = TaskHistory.objects.get(id=self.task.id)
+        self.assertEqual(task.updated_at, updated_at)
+        self.assertIsNone(task.stored_details)
+        self.assertEqual('Testing', task.details)
+
+    @patch('notification.models.get_redis_connection')
+    def test_flush_does_not_touch_within_interval(self, get_connection):
+        self.task.user = 'admin'
+        self.task.add_detail(message='Testing')
+        self.task.flush_details()
+
+        self.assertFalse(get_connection.called)
+
+    @patch('notification.models.get_redis_connection')
+    def test_flush_touches_task_after_interval(self, get_connection):
+        conn = get_connection.return_value
+        conn.expire.return_value = True
+        old = datetime(2020, 1, 1)
+        TaskHistory.objects.filter(id=self.task.id).update(updated_at=old)
+        self.task.user = 'admin'
+        self.task._touched_at = time.time() - TaskHistory.DETAILS_FLUSH_SECONDS
+
+        self.task.add_detail(message='Testing')
+        self.task.flush_details()
+
+        task = TaskHistory.objects.get(id=self.task.id)
+        self.assertGreater(task.updated_at, old)
+        self.assertIsNone(task.stored_details)
+        key = 'task_users:admin:{}'.format(self.task.id)
+        conn.expire.assert_called_once_with(key, 1200)
+        self.assertEqual(conn.hset.call_args[0][:2], (key, 'updated_at'))
+
+    @patch('notification.models.get_redis_connection')
+    def test_touch_does_not_recreate_expired_notification(self, get_connection):
+        conn = get_connection.return_value
+        conn.expire.return_value = False
+        self.task.user = 'admin'
+
+        self.task.touch()
+
+        self.assertFalse(conn.hset.called)
+
+    def test_details_are_buffered_until_batch_size(self):
+        for message in range(TaskHistory.DETAILS_BATCH_SIZE - 1):
+            self.task.add_detail(message=message)
+        self.assertEqual(self.task.detail_lines.count(), 0)
+
+        self.task.add_detail(message='last')
+        self.assertEqual(
+            self.task.detail_lines.count(), TaskHistory.DETAILS_BATCH_SIZE
+        )
+
+    def test_add_step_flushes_details(self):
+        self.task.add_step(step=1, total=2, description='testing')
+
+        task = TaskHistory.objects.get(id=self.task.id)
+        self.assertIn('Step 1 of 2 - testing', task.details)
+
+    def test_details_keep_stored_content_first(self):
+        self.task.details = 'Legacy'
+        self.task.save()
+        self.task.update_status_for(TaskHistory.STATUS_SUCCESS, 'Done')
+
+        task = TaskHistory.objects.get(id=self.task.id)
+        self.assertEqual('Legacy\nDone', task.details)
+
+    def test_set_details_discard_lines(self):
+        self.task.add_detail(message='Testing')
+        self.task.save()
+
+        self.task.details = ''
+        self.task.save()
+
+        task = TaskHistory.objects.get(id=self.task.id)
+        self.assertEqual('', task.details)
+        self.assertEqual(task.detail_lines.count(), 0)
+
+    def test_prefetched_details_do_not_query(self):
+        self.task.add_detail(message='First')
+        self.task.add_detail(message='Second')
+        self.task.flush_details()
+
+        task = TaskHistory.objects.prefetch_related('detail_lines').get(
+            id=self.task.id
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual('First\nSecond', task.details)
+
     def test_can_get_running_tasks(self):
         self.task.task_status = TaskHistory.STATUS_RUNNING
         self.task.save()
@@ -1113,24 +1113,50 @@ class DatabaseInfra(BaseModel):
             instances__is_active=True
         ).distinct()
         LOG.debug(
-            ('Total of datainfra with filter plan {} and environment '
-             '{}: {}').format(plan, environment, len(datainfras))
+            'Filtering datainfra with plan {} and environment {}'.format(
+                plan, environment
+            )
         )
 
         return datainfras
 
+    @classmethod
+    def with_capacity(cls, datainfras=None):
+        """
+        Adds capacity_used and capacity_available, the same as used and
+        available, to each datainfra in the same query. Both are counted
+        from the databases when the query runs, using the databaseinfra
+        index, so there is nothing to keep in sync on create/destroy.
+        """
+        if datainfras is None:
+            datainfras = DatabaseInfra.objects.all()
+
+        used = (
+            'SELECT COUNT(*) FROM logical_database '
+            'WHERE logical_database.databaseinfra_id = '
+            'physical_databaseinfra.id'
+        )
+        # capacity is unsigned on mysql, an infra over capacity would
+        # overflow the subtraction
+        available = (
+            'CAST(physical_databaseinfra.capacity AS SIGNED) - ({})'.format(
+                used
+            )
+        )
+        return datainfras.extra(select={
+            'capacity_used': used,
+            'capacity_available': available,
+        })
+
     @classmethod
     def best_for(cls, plan, environment, name):
         """ Choose the best DatabaseInfra for another database """
-        datainfras = list(
-            DatabaseInfra.get_active_for(plan=plan, environment=environment))
+        datainfras = DatabaseInfra.with_capacity(
+            DatabaseInfra.get_active_for(plan=plan, environment=environment)
+        ).extra(order_by=['-capacity_available', 'id'])
 
-        if not datainfras:
-            return None
-        datainfras.sort(key=lambda di: -di.available)
-        best_datainfra = datainfras[0]
-
-        if best_datainfra.available <= 0:
+        best_datainfra = datainfras.first()
+        if not best_datainfra or best_datainfra.capacity_available <= 0:
             return None
 
         return best_datainfra
@@ -1598,10 +1624,10 @@ class Instance(BaseModel):
             LOG.exception(e)
             raise ValidationError(e.message)
 
-    def check_status(self):
+    def check_status(self, driver=None):
         try:
-            status = self.databaseinfra.get_driver().check_status(
-                instance=self)
+            driver = driver or self.databaseinfra.get_driver()
+            status = driver.check_status(instance=self)
 
             return status
         except Exception:
@@ -1638,14 +1664,17 @@ class Instance(BaseModel):
 
         return format_html(status)
 
-    def update_status(self):
-        if self.is_active:
-            self.status = Instance.DEAD
-            if self.check_status():
-                self.status = Instance.ALIVE
-        else:
-            self.status = Instance.INACTIVE
+    def current_status(self, driver=None):
+        if not self.is_active:
+            return Instance.INACTIVE
+
+        if self.check_status(driver=driver):
+            return Instance.ALIVE
 
+        return Instance.DEAD
+
+    def update_status(self):
+        self.status = self.current_status()
         self.save(update_fields=['status'])
 
     @property
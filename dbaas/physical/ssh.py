@@ -1,5 +1,9 @@
+import os
 import socket
 import logging
+import hashlib
+import threading
+import time
 from time import sleep
 from StringIO import StringIO
 from uuid import uuid4
@@ -7,10 +11,141 @@ from io import BytesIO
 
 import paramiko
 
+from util.wait import Waiter
+
 
 LOG = logging.getLogger(__name__)
 
 
+class SSHConnectionPool(object):
+    """
+    Process-wide cache of authenticated ssh clients keyed by
+    (address, username, credential).
+    Connections idle for more than idle_check seconds are checked before
+    being reused and connections older than ttl seconds are replaced.
+    """
+
+    def __init__(self, ttl=600, idle_check=30):
+        self.ttl = ttl
+        self.idle_check = idle_check
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._connections = {}
+        self.hits = 0
+        self.misses = 0
+        self.handshakes = 0
+        self.handshake_time = 0.0
+
+    @staticmethod
+    def make_key(address, auth):
+        credential = auth.get('password') or auth.get('pkey')
+        if isinstance(credential, paramiko.PKey):
+            credential = credential.get_base64()
+        if isinstance(credential, unicode):
+            credential = credential.encode('utf-8')
+        return (
+            address, auth['username'],
+            hashlib.sha1(credential or '').hexdigest()
+        )
+
+    @staticmethod
+    def _is_alive(client):
+        transport = client.get_transport()
+        if not transport or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except (paramiko.ssh_exception.SSHException, socket.error, EOFError):
+            return False
+        return True
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def _handshake(self, address, auth, timeout):
+        started_at = time.time()
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        client.set_missing_host_key_policy(
+            paramiko.AutoAddPolicy()
+        )
+        client.connect(
+            address,
+            timeout=timeout,
+            **auth
+        )
+        elapsed = time.time() - started_at
+        with self._lock:
+            self.handshakes += 1
+            self.handshake_time += elapsed
+        return client
+
+    def get(self, address, auth, timeout=None):
+        key = self.make_key(address, auth)
+        now = time.time()
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked worker, connections belong to the parent process
+                self._reset()
+            client, created_at, used_at = self._connections.pop(
+                key, (None, None, None)
+            )
+
+        if client:
+            expired = now - created_at > self.ttl
+            if not expired and (now - used_at < self.idle_check or
+                                self._is_alive(client)):
+                with self._lock:
+                    self.hits += 1
+                    self._connections[key] = (client, created_at, now)
+                return client
+            self._close(client)
+
+        client = self._handshake(address, auth, timeout)
+        with self._lock:
+            self.misses += 1
+            self._connections[key] = (client, now, now)
+        return client
+
+    def discard(self, address, auth):
+        key = self.make_key(address, auth)
+        with self._lock:
+            client, _, _ = self._connections.pop(key, (None, None, None))
+        if client:
+            self._close(client)
+
+    def clear(self):
+        with self._lock:
+            connections = self._connections.values()
+            self._connections = {}
+        for client, _, _ in connections:
+            self._close(client)
+
+    def metrics(self):
+        requests = self.hits + self.misses
+        return {
+            'connections': len(self._connections),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / requests if requests else 0.0,
+            'handshakes': self.handshakes,
+            'avg_handshake_time': (
+                self.handshake_time / self.handshakes
+                if self.handshakes else 0.0
+            ),
+        }
+
+
+SSH_POOL = SSHConnectionPool()
+
+
 def connect_host(func):
     def wrapper(self, *args, **kw):
         # try:
@@ -68,16 +203,10 @@ class HostSSH(object):
         self.script_file_full_path = ''
 
     def connect(self, timeout=None):
-        self.client = paramiko.SSHClient()
-        self.client.load_system_host_keys()
-        self.client.set_missing_host_key_policy(
-            paramiko.AutoAddPolicy()
-        )
-        self.client.connect(
-            self.address,
-            timeout=timeout,
-            **self.auth
-        )
+        self.client = SSH_POOL.get(self.address, self.auth, timeout=timeout)
+
+    def disconnect(self):
+        SSH_POOL.discard(self.address, self.auth)
 
     @property
     def pkey(self):
@@ -127,19 +256,49 @@ class HostSSH(object):
             self.script_file_full_path
         )
 
+    def exec_command(self, command, get_pty=False):
+        try:
+            return self.client.exec_command(command, get_pty=get_pty)
+        except (paramiko.ssh_exception.SSHException, socket.error) as err:
+            # the pooled connection was dropped by the server, a channel
+            # could not be opened so it is safe to try a new connection
+            LOG.warning(
+                "Reconnecting to {} after error: {}".format(self.address, err)
+            )
+            self.disconnect()
+            self.connect()
+            return self.client.exec_command(command, get_pty=get_pty)
+
+    def exec_script(self, script, get_pty=False):
+        if get_pty:
+            # a pty echoes stdin and does not receive EOF,
+            # so the script must be sent as a file
+            self.create_script_file(script)
+            return self.exec_command(
+                self.run_script_file_command, get_pty=get_pty
+            )
+
+        self.script_file_full_path = ''
+        command_output = self.exec_command(self.run_script_stdin_command)
+        stdin = command_output[0]
+        stdin.write(script.encode('utf-8'))
+        stdin.flush()
+        stdin.channel.shutdown_write()
+        return command_output
+
+    @property
+    def run_script_stdin_command(self):
+        return 'sudo sh -s'
+
     @connect_host
     def run_script(self, script, get_pty=False, raise_if_error=True,
                    retry=False):
-        self.create_script_file(script)
         LOG.info(
             "Executing command [{}] on remote server {}".format(
                 script, self.address
             )
         )
-        command_output = self.client.exec_command(
-            self.run_script_file_command,
-            get_pty=get_pty
-        )
+        command_output = self.exec_script(script, get_pty=get_pty)
         self.handle_command_output(command_output)
         LOG.info(
             "Command output: [{}]".format(self.output)
@@ -170,7 +329,9 @@ class HostSSH(object):
         )
         sleep(wait)
 
-        for attempt in range(retries):
+        # same time budget as retries every interval, trying sooner
+        waiter = Waiter((retries - 1) * interval, max_wait=interval)
+        for attempt in waiter:
             try:
 
                 LOG.info(
@@ -179,6 +340,9 @@ class HostSSH(object):
                     )
                 )
 
+                # a pooled client may predate a reboot or recreation of
+                # the host, only a new handshake proves it is reachable
+                self.disconnect()
                 self.connect(timeout=timeout)
                 return True
 
@@ -187,14 +351,14 @@ class HostSSH(object):
                     paramiko.ssh_exception.SSHException,
                     socket.error) as err:
 
-                if attempt == retries - 1:
+                if waiter.expired:
                     LOG.error(
                         "Maximum number of login attempts : {} .".format(err)
                     )
                     return False
 
                 LOG.warning("We caught an exception: {} .".format(err))
-                sleep(interval)
+        return False
 
     @connect_host
     def create_temp_file(self, file_name, content):
@@ -230,6 +230,39 @@ class DatabaseInfraTestCase(TestCase):
         self.assertIsNone(
             DatabaseInfra.best_for(plan=plan, environment=environment, name="test"))
 
+    def test_with_capacity_same_as_used_and_available(self):
+        datainfra = factory.DatabaseInfraFactory(capacity=3)
+        factory_logical.DatabaseFactory(databaseinfra=datainfra)
+        factory_logical.DatabaseFactory(databaseinfra=datainfra)
+
+        datainfra = DatabaseInfra.with_capacity().get(id=datainfra.id)
+        self.assertEqual(datainfra.capacity_used, datainfra.used)
+        self.assertEqual(datainfra.capacity_available, datainfra.available)
+        self.assertEqual(datainfra.capacity_available, 1)
+
+    def test_with_capacity_over_capacity(self):
+        plan = factory.PlanFactory()
+        environment = plan.environments.all()[0]
+        over = factory.DatabaseInfraFactory(
+            plan=plan, environment=environment, capacity=1)
+        factory.InstanceFactory(
+            address="127.0.0.1", port=27017, databaseinfra=over)
+        factory_logical.DatabaseFactory(databaseinfra=over)
+        factory_logical.DatabaseFactory(databaseinfra=over)
+
+        over = DatabaseInfra.with_capacity().get(id=over.id)
+        self.assertEqual(over.capacity_available, -1)
+        self.assertEqual(over.capacity_available, over.available)
+        self.assertIsNone(
+            DatabaseInfra.best_for(plan=plan, environment=environment, name="test"))
+
+        datainfra = factory.DatabaseInfraFactory(
+            plan=plan, environment=environment, capacity=2)
+        factory.InstanceFactory(
+            address="127.0.0.2", port=27017, databaseinfra=datainfra)
+        self.assertEqual(datainfra, DatabaseInfra.best_for(
+            plan=plan, environment=environment, name="test"))
+
     @mock.patch.object(FakeDriver, 'info')
     def test_get_info_use_caching(self, info):
         info.return_value = 'hahaha'
@@ -7,7 +7,8 @@ from paramiko.ssh_exception import (BadHostKeyException,
 from socket import error as socker_err
 from physical.ssh import (HostSSH, connect_host,
                           PassAndPkeyEmptyException,
-                          ScriptFailedException)
+                          ScriptFailedException,
+                          SSHConnectionPool)
 
 
 def make_fake_exec_command_output(*args, **kw):
@@ -229,7 +230,90 @@ class RunScriptTestCase(TestCase):
         self.host_ssh.run_script('fake command')
         self.assertTrue(self.host_ssh.client.exec_command.called)
         script_arg = self.host_ssh.client.exec_command.call_args[0][0]
+        self.assertEqual(script_arg, 'sudo sh -s')
+        self.assertFalse(self.host_ssh.client.open_sftp.called)
+
+    def test_script_param_with_pty(self):
+        self.host_ssh.run_script('fake command', get_pty=True)
+        self.assertTrue(self.host_ssh.client.exec_command.called)
+        script_arg = self.host_ssh.client.exec_command.call_args[0][0]
         self.assertEqual(
             script_arg,
             'sudo sh /tmp/{}'.format(self.host_ssh.script_file_name)
         )
+
+    def test_script_sent_by_stdin(self):
+        stdin, stdout, stderr = make_fake_exec_command_output()
+        self.fake_client.exec_command.side_effect = None
+        self.fake_client.exec_command.return_value = stdin, stdout, stderr
+
+        self.host_ssh.run_script('fake command')
+
+        stdin.write.assert_called_once_with('fake command')
+        self.assertTrue(stdin.channel.shutdown_write.called)
+
+
+@patch('physical.ssh.paramiko.SSHClient')
+class SSHConnectionPoolTestCase(TestCase):
+    def setUp(self):
+        self.pool = SSHConnectionPool(ttl=600, idle_check=30)
+        self.auth = {'username': 'fake_username', 'password': 'fake_pass'}
+
+    def test_reuse_connection(self, client_mock):
+        first = self.pool.get('fake_address', self.auth)
+        second = self.pool.get('fake_address', self.auth)
+
+        self.assertIs(first, second)
+        self.assertEqual(client_mock.return_value.connect.call_count, 1)
+        self.assertEqual(self.pool.metrics()['hits'], 1)
+        self.assertEqual(self.pool.metrics()['misses'], 1)
+        self.assertEqual(self.pool.metrics()['hit_rate'], 0.5)
+
+    def test_different_credentials_do_not_share_connection(self, client_mock):
+        self.pool.get('fake_address', self.auth)
+        self.pool.get(
+            'fake_address', {'username': 'fake_username', 'password': 'other'}
+        )
+
+        self.assertEqual(client_mock.return_value.connect.call_count, 2)
+        self.assertEqual(self.pool.metrics()['connections'], 2)
+
+    def test_reconnect_when_ttl_expired(self, client_mock):
+        self.pool.ttl = -1
+        self.pool.get('fake_address', self.auth)
+        self.pool.get('fake_address', self.auth)
+
+        self.assertEqual(client_mock.return_value.connect.call_count, 2)
+        self.assertTrue(client_mock.return_value.close.called)
+
+    def test_reconnect_when_idle_connection_is_dead(self, client_mock):
+        self.pool.idle_check = -1
+        transport = client_mock.return_value.get_transport.return_value
+        transport.is_active.return_value = False
+
+        self.pool.get('fake_address', self.auth)
+        self.pool.get('fake_address', self.auth)
+
+        self.assertEqual(client_mock.return_value.connect.call_count, 2)
+        self.assertEqual(self.pool.metrics()['hits'], 0)
+
+    def test_discard(self, client_mock):
+        self.pool.get('fake_address', self.auth)
+        self.pool.discard('fake_address', self.auth)
+
+        self.assertTrue(client_mock.return_value.close.called)
+        self.assertEqual(self.pool.metrics()['connections'], 0)
+
+    @patch('physical.ssh.sleep')
+    def test_check_does_not_trust_pooled_connection(self, sleep_mock,
+                                                    client_mock):
+        with patch('physical.ssh.SSH_POOL', new=self.pool):
+            host_ssh = HostSSH('fake_address', **self.auth)
+            host_ssh.connect()
+            pooled = host_ssh.client
+
+            self.assertTrue(host_ssh.check(wait=0))
+
+        self.assertEqual(client_mock.return_value.connect.call_count, 2)
+        self.assertTrue(pooled.close.called)
+        self.assertEqual(self.pool.metrics()['connections'], 1)
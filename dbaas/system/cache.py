@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+LOG = logging.getLogger(__name__)
+
+CACHE_MISS = object()
+INVALIDATE_ALL = '*'
+
+
+class LocalLRUCache(object):
+    """
+    Small thread safe in-process LRU with a TTL per entry, used in front of
+    the django cache for values that are read on every request or step.
+    A ttl lower than or equal to 0 disables it.
+    """
+
+    def __init__(self, max_size=512, ttl=5):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, key, default=CACHE_MISS):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is not None and item[1] > time.time():
+                self._data[key] = item
+                self.hits += 1
+                return item[0]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.time() + self.ttl)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self.invalidations += 1
+            if key == INVALIDATE_ALL:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def clear(self):
+        self.delete(INVALIDATE_ALL)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / total if total else 0.0,
+            'invalidations': self.invalidations,
+        }
+
+
+class CacheInvalidationListener(object):
+    """
+    Removes keys from a LocalLRUCache when they are published on a redis
+    channel, so a change made by one process reaches the local tier of
+    every other one. Started lazily, once per process (celery forks).
+    When redis is not reachable the local TTL is the only bound.
+    """
+    RECONNECT_INTERVAL = 5
+
+    def __init__(self, local_cache, channel, client_factory):
+        self.local_cache = local_cache
+        self.channel = channel
+        self.client_factory = client_factory
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, key):
+        try:
+            self.client_factory().publish(self.channel, key)
+        except Exception as e:
+            LOG.warning("Could not publish invalidation for %s: %s", key, e)
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(
+                target=self._listen, name='cache-invalidation'
+            )
+            thread.daemon = True
+            thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client_factory().pubsub(
+                    ignore_subscribe_messages=True
+                )
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.local_cache.delete(message['data'])
+            except Exception as e:
+                LOG.warning(
+                    "Cache invalidation listener for %s failed: %s",
+                    self.channel, e
+                )
+            # messages may have been lost while disconnected
+            self.local_cache.clear()
+            time.sleep(self.RECONNECT_INTERVAL)
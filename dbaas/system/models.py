@@ -4,18 +4,34 @@ import logging
 import simple_audit
 import hashlib
 import datetime
+from django.conf import settings
 from django.core.cache import cache
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from util.models import BaseModel
+from system.cache import (CACHE_MISS, LocalLRUCache,
+                          CacheInvalidationListener)
 
 
-CACHE_MISS = object()
 LOG = logging.getLogger(__name__)
 
 
+def _redis_client():
+    from util.decorators import REDIS_CLIENT
+    return REDIS_CLIENT
+
+
+CONFIGURATION_LOCAL_CACHE = LocalLRUCache(
+    max_size=getattr(settings, 'CONFIGURATION_LOCAL_CACHE_SIZE', 512),
+    ttl=getattr(settings, 'CONFIGURATION_LOCAL_CACHE_TTL', 5)
+)
+CONFIGURATION_INVALIDATION = CacheInvalidationListener(
+    CONFIGURATION_LOCAL_CACHE, 'dbaas:cfg:invalidate', _redis_client
+)
+
+
 class Configuration(BaseModel):
 
     name = models.CharField(
@@ -25,9 +41,14 @@ class Configuration(BaseModel):
     description = models.TextField(
         verbose_name=_("Description"), null=True, blank=True)
 
+    _cache_hits = 0
+    _cache_misses = 0
+
     def clear_cache(self):
         key = self.get_cache_key(self.name)
         cache.delete(key)
+        CONFIGURATION_LOCAL_CACHE.delete(key)
+        CONFIGURATION_INVALIDATION.publish(key)
         # cache.clear()
 
     @property
@@ -72,12 +93,30 @@ class Configuration(BaseModel):
     @classmethod
     def get_by_name(cls, name):
         key = cls.get_cache_key(name)
+        if CONFIGURATION_LOCAL_CACHE.enabled:
+            CONFIGURATION_INVALIDATION.ensure_started()
+            value = CONFIGURATION_LOCAL_CACHE.get(key)
+            if value is not CACHE_MISS:
+                return value
+
         value = cache.get(key, CACHE_MISS)
         if value is CACHE_MISS:
+            cls._cache_misses += 1
             value = Configuration.__get_by_name(name)
             cache.set(key, value)
+        else:
+            cls._cache_hits += 1
+        CONFIGURATION_LOCAL_CACHE.set(key, value)
         return value
 
+    @classmethod
+    def cache_stats(cls):
+        """hit/miss counters of the local and shared cache tiers"""
+        return {
+            'local': CONFIGURATION_LOCAL_CACHE.stats(),
+            'shared': {'hits': cls._cache_hits, 'misses': cls._cache_misses},
+        }
+
     @classmethod
     def get_by_name_all_fields(cls, name):
         return cls.__get_by_name(name, get_value_field=False)
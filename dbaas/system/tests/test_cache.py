@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from unittest import TestCase
+from mock import patch
+
+from system.cache import CACHE_MISS, LocalLRUCache
+
+
+class LocalLRUCacheTest(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        local_cache = LocalLRUCache(max_size=2, ttl=60)
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        local_cache.get('a')
+        local_cache.set('c', 3)
+
+        self.assertEqual(local_cache.get('a'), 1)
+        self.assertIs(local_cache.get('b'), CACHE_MISS)
+        self.assertEqual(local_cache.get('c'), 3)
+
+    @patch('system.cache.time.time')
+    def test_entries_expire(self, time_mock):
+        local_cache = LocalLRUCache(ttl=5)
+        time_mock.return_value = 100
+        local_cache.set('a', None)
+        self.assertIsNone(local_cache.get('a'))
+
+        time_mock.return_value = 106
+        self.assertIs(local_cache.get('a'), CACHE_MISS)
+        self.assertEqual(local_cache.stats()['hits'], 1)
+        self.assertEqual(local_cache.stats()['misses'], 1)
+
+    def test_disabled_with_ttl_zero(self):
+        local_cache = LocalLRUCache(ttl=0)
+        local_cache.set('a', 1)
+        self.assertIs(local_cache.get('a'), CACHE_MISS)
+
+    def test_invalidate_all(self):
+        local_cache = LocalLRUCache(ttl=60)
+        local_cache.set('a', 1)
+        local_cache.set('b', 2)
+        local_cache.delete('*')
+        self.assertEqual(len(local_cache), 0)
@@ -3,7 +3,8 @@ from __future__ import absolute_import, unicode_literals
 from django.test import TestCase
 from django.db import IntegrityError
 # from . import factory
-from ..models import Configuration
+from mock import patch
+from ..models import Configuration, CONFIGURATION_LOCAL_CACHE
 import logging
 import hashlib
 import datetime
@@ -83,3 +84,44 @@ class ConfigurationTest(TestCase):
 
         get_conf = Configuration.get_by_name(conf.name)
         self.assertEquals(get_conf, conf.value)
+
+
+@patch.object(CONFIGURATION_LOCAL_CACHE, 'ttl', 5)
+@patch('system.models.CONFIGURATION_INVALIDATION')
+class ConfigurationLocalCacheTest(TestCase):
+
+    def setUp(self):
+        CONFIGURATION_LOCAL_CACHE.clear()
+        self.conf = factory.ConfigurationFactory()
+
+    def tearDown(self):
+        CONFIGURATION_LOCAL_CACHE.clear()
+
+    def test_local_tier_avoids_shared_cache(self, invalidation):
+        Configuration.get_by_name(self.conf.name)
+
+        with patch('system.models.cache') as cache_mock:
+            value = Configuration.get_by_name(self.conf.name)
+
+        self.assertEquals(value, self.conf.value)
+        self.assertFalse(cache_mock.get.called)
+
+    def test_save_invalidates_local_tier(self, invalidation):
+        Configuration.get_by_name(self.conf.name)
+
+        self.conf.value = 'new value'
+        self.conf.save()
+
+        self.assertEquals(Configuration.get_by_name(self.conf.name), 'new value')
+        invalidation.publish.assert_called_with(
+            Configuration.get_cache_key(self.conf.name)
+        )
+
+    def test_cache_stats(self, invalidation):
+        hits = CONFIGURATION_LOCAL_CACHE.hits
+        Configuration.get_by_name(self.conf.name)
+        Configuration.get_by_name(self.conf.name)
+
+        stats = Configuration.cache_stats()
+        self.assertEquals(stats['local']['hits'], hits + 1)
+        self.assertIn('misses', stats['shared'])
@@ -1,8 +1,11 @@
 from django.conf.urls import patterns, url
-from .views import CeleryHealthCheckView
+from .views import CeleryHealthCheckView, ConfigurationCacheStatsView
 
 
 urlpatterns = patterns('',
                        url(r"^celery/healthcheck.html",
                            CeleryHealthCheckView, name="celery-healthcheck"),
+                       url(r"^configuration/cache_stats.json",
+                           ConfigurationCacheStatsView,
+                           name="configuration-cache-stats"),
                        )
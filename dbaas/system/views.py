@@ -1,6 +1,14 @@
+import json
 from django.http import HttpResponse
-from models import CeleryHealthCheck
+from models import CeleryHealthCheck, Configuration
 
 
 def CeleryHealthCheckView(request):
     return HttpResponse(CeleryHealthCheck.get_healthcheck_string())
+
+
+def ConfigurationCacheStatsView(request):
+    return HttpResponse(
+        json.dumps(Configuration.cache_stats()),
+        content_type="application/json"
+    )
@@ -269,3 +269,30 @@ class ServiceAppBindPostTestCase(TestCase):
         response = self.client.post(url, {'app-name': 'test-app'})
 
         self.assertEquals(response.status_code, 500)
+
+    def test_acl_task_header(self, mock_check_database_status,
+                             mock_add_acl_for_hosts):
+        """ It tests the ACLs are added in background, the response
+        returns the task to be followed.
+        """
+        mock_add_acl_for_hosts.return_value = Mock(id=42)
+        mock_database = Mock(spec=Database)
+        attrs = {
+            'infra.get_driver.return_value.get_dns_port.return_value': [
+                'test_redis_host', 8000
+            ],
+            'databaseinfra.engine.name': 'redis',
+            'databaseinfra.password': 'test_password',
+            'get_endpoint_dns.return_value': 'test.com:<password>',
+            'infra.get_driver.return_value.topology_name.return_value': [
+                'redis_single'
+            ]
+        }
+        mock_database.configure_mock(**attrs)
+        mock_check_database_status.return_value = mock_database
+
+        url = reverse('tsuru:service-app-bind', args=('dev', 'test_database'))
+        response = self.client.post(url, {'app-name': 'test-app'})
+
+        self.assertEquals(response.status_code, 201)
+        self.assertEquals(response['X-DBaaS-ACL-Task'], '42')
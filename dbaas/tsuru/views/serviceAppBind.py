@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.renderers import JSONRenderer, JSONPRenderer
 from rest_framework.response import Response
 from logical.models import Database
+from notification.tasks import TaskRegister
 from workflow.steps.util.base import ACLFromHellClient
 from ..utils import (log_and_response, get_url_env, LOG, check_database_status)
 from rest_framework import status
@@ -16,10 +17,8 @@ class ServiceAppBind(APIView):
     model = Database
 
     def add_acl_for_hosts(self, database, app_name):
-
-        infra = database.infra
-        hosts = infra.hosts
-
+        """Checks the ACL credential and adds the rules in background,
+        returns the task to follow them"""
         acl_from_hell_client = ACLFromHellClient(database.environment)
         if not acl_from_hell_client.aclfromhell_allowed:
             raise AclFromHellNotAllowerForEnvException(
@@ -28,9 +27,7 @@ class ServiceAppBind(APIView):
                 )
             )
 
-        for host in hosts:
-            acl_from_hell_client.add_acl(database, app_name, host.hostname)
-        acl_from_hell_client.add_acl_for_vip_if_needed(database, app_name)
+        return TaskRegister.database_app_bind_acl(database, app_name)
 
     @staticmethod
     def _handle_app_name(app_name):
@@ -48,7 +45,7 @@ class ServiceAppBind(APIView):
 
         database = response
         try:
-            self.add_acl_for_hosts(
+            acl_task = self.add_acl_for_hosts(
                 database,
                 self._handle_app_name(data['app-name'])
             )
@@ -117,7 +114,10 @@ class ServiceAppBind(APIView):
                 "DBAAS_{}PORT".format(kind): ports
             }
 
-        return Response(env_vars, status.HTTP_201_CREATED)
+        response = Response(env_vars, status.HTTP_201_CREATED)
+        if acl_task:
+            response['X-DBaaS-ACL-Task'] = acl_task.id
+        return response
 
     def delete(self, request, database_name, format=None):
         """This method unbinds a App to a database through tsuru."""
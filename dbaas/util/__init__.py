@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
-from time import sleep
 import paramiko
 from slugify import slugify as slugify_function
 from django.contrib.auth.models import User
@@ -14,9 +13,8 @@ import traceback
 import sys
 from billiard import current_process
 from django.utils.module_loading import import_by_path
-from dns.resolver import Resolver
-from dns.exception import DNSException
 import requests
+from util.credentials import get_cached_credential, credential_cache_key
 
 
 LOG = logging.getLogger(__name__)
@@ -160,31 +158,13 @@ def call_script(script_name, working_dir=None, split_lines=True, args=[],
 
 
 def check_dns(dns_to_check, dns_server, retries=90, wait=10, ip_to_check=None):
-    LOG.info("Cheking dns for {}...".format(dns_to_check))
-    resolver = Resolver()
-    resolver.nameservers = [dns_server]
-    LOG.info("CHECK DNS: dns to check {}".format(dns_to_check))
-    for attempt in range(0, retries):
-        LOG.info("Cheking dns for {}... attempt number {}...".format(
-            dns_to_check,
-            str(attempt + 1)
-        ))
-
-        try:
-            answer = resolver.query(dns_to_check)
-        except DNSException:
-            pass
-        else:
-            ips = map(str, answer)
-            LOG.info("CHECK DNS: ips {}".format(ips))
-            LOG.info("CHECK DNS: ip to check {}".format(ip_to_check))
-            if ((ip_to_check and ip_to_check in ips) or
-                    (not ip_to_check and ips)):
-                return True
-
-        sleep(wait)
+    from util.dns_propagation import check_dns_batch
 
-    return False
+    LOG.info("Cheking dns for {}...".format(dns_to_check))
+    return check_dns_batch(
+        [(dns_to_check, ip_to_check)], [dns_server],
+        deadline=retries * wait, max_wait=wait
+    )[dns_to_check]
 
 
 def scp_file(server, username, password, localpath, remotepath, option):
@@ -273,17 +253,24 @@ def get_credentials_in_any_env(credential_type, **kwargs):
 
 def get_credentials_for(environment, credential_type, **kwargs):
     from dbaas_credentials.models import Credential
-    creds = Credential.objects.filter(
-        integration_type__type=credential_type, environments=environment,
-        **kwargs
-    )
 
-    if not creds.exists():
+    def load_credential():
+        creds = Credential.objects.filter(
+            integration_type__type=credential_type, environments=environment,
+            **kwargs
+        )[:1]
+        return creds[0] if creds else None
+
+    credential = get_cached_credential(
+        credential_cache_key(environment, credential_type, **kwargs),
+        load_credential
+    )
+    if credential is None:
         raise GetCredentialException(
             ("Credentials not found for type %s and env %s" %
              (credential_type, environment)))
 
-    return creds[0]
+    return credential
 
 
 def get_or_none_credentials_for(environment, credential_type, **kwargs):
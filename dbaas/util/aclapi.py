@@ -5,6 +5,7 @@ import copy
 from time import sleep
 from dbaas_credentials.models import CredentialType
 from util import get_credentials_for
+from util.concurrency import backoff
 
 
 LOG = logging.getLogger(__name__)
@@ -129,16 +130,17 @@ class AddACLAccess(object):
         )
 
     def _wait_job_finish(self, job_id):
-        attemps = copy.copy(self.wait_job_attemps)
-        while attemps > 0:
+        # most jobs finish in a few seconds, so poll with backoff
+        # capped at wait_job_timeout instead of a fixed interval
+        for attempt in range(self.wait_job_attemps):
+            if attempt:
+                sleep(backoff(attempt - 1, max_wait=self.wait_job_timeout))
             job = self._get_job(job_id)
             if job.get('jobs', {}).get('status') == 'SUCCESS':
                 LOG.info("Job {} executed with SUCCESS!!".format(
                     job_id
                 ))
                 return
-            sleep(self.wait_job_timeout)
-            attemps -= 1
         err_msg = "Job not finished after {} attemps. JOB: {}!!".format(
             self.wait_job_attemps, job
         )
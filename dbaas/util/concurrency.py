@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import logging
+import random
+import time
+import traceback
+from multiprocessing.pool import ThreadPool
+
+from django.db import connection
+
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 10
+# AsyncResult.get() without timeout can not be interrupted on python 2
+MAX_WAIT = 24 * 60 * 60
+
+
+class ParallelResult(object):
+
+    def __init__(self, item, result=None, error=None, elapsed=0.0):
+        self.item = item
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "<ParallelResult item={} ok={} elapsed={:.3f}>".format(
+            self.item, self.ok, self.elapsed
+        )
+
+
+def safe_call(func, close_connection=True):
+    def wrapper(item):
+        started_at = time.time()
+        try:
+            return ParallelResult(
+                item, result=func(item), elapsed=time.time() - started_at
+            )
+        except Exception:
+            LOG.error("Error running {} for {}".format(func, item),
+                      exc_info=True)
+            return ParallelResult(
+                item, error=traceback.format_exc(),
+                elapsed=time.time() - started_at
+            )
+        finally:
+            # each worker thread has its own metadata db connection
+            if close_connection:
+                connection.close()
+    return wrapper
+
+
+class ParallelMap(object):
+    """
+    Runs func for each item in a bounded thread pool, without blocking.
+    Call get() to wait and receive one ParallelResult per item,
+    in the same order of items.
+    """
+
+    def __init__(self, func, items, workers=DEFAULT_WORKERS):
+        self.items = list(items)
+        self.workers = max(1, min(workers or 1, len(self.items) or 1))
+        self.started_at = time.time()
+        self.elapsed = 0.0
+        self.pool = ThreadPool(self.workers)
+        self.async_result = self.pool.map_async(
+            safe_call(func), self.items
+        )
+
+    def get(self, timeout=MAX_WAIT):
+        try:
+            return self.async_result.get(timeout)
+        finally:
+            self.pool.close()
+            self.pool.join()
+            self.elapsed = time.time() - self.started_at
+
+
+def parallel_map(func, items, workers=DEFAULT_WORKERS):
+    if workers <= 1:
+        # same results, but in the caller thread and its db connection
+        call = safe_call(func, close_connection=False)
+        return [call(item) for item in items]
+    return ParallelMap(func, items, workers).get()
+
+
+def backoff(attempt, initial_wait=1, max_wait=30):
+    """exponential backoff with equal jitter"""
+    wait = min(max_wait, initial_wait * (2 ** attempt))
+    return wait / 2.0 + random.uniform(0, wait / 2.0)
+
+
+def timing_stats(results):
+    elapsed = sorted(result.elapsed for result in results)
+    if not elapsed:
+        return {'count': 0, 'errors': 0, 'min': 0, 'avg': 0, 'max': 0,
+                'p95': 0}
+
+    return {
+        'count': len(elapsed),
+        'errors': len([result for result in results if not result.ok]),
+        'min': elapsed[0],
+        'avg': sum(elapsed) / len(elapsed),
+        'max': elapsed[-1],
+        'p95': elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))],
+    }
+
+
+def format_timing_stats(name, stats, wall_time=None):
+    msg = ("{}: {count} probes, {errors} errors, min {min:.2f}s, "
+           "avg {avg:.2f}s, p95 {p95:.2f}s, max {max:.2f}s").format(
+        name, **stats
+    )
+    if wall_time is not None:
+        msg += ", wall time {:.2f}s".format(wall_time)
+    return msg
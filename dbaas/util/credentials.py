@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import logging
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from system.cache import CACHE_MISS, LocalLRUCache, CacheInvalidationListener
+
+
+LOG = logging.getLogger(__name__)
+CREDENTIALS_APP_LABEL = 'dbaas_credentials'
+
+
+def _redis_client():
+    from util.decorators import REDIS_CLIENT
+    return REDIS_CLIENT
+
+
+CREDENTIAL_CACHE = LocalLRUCache(
+    max_size=getattr(settings, 'CREDENTIAL_LOCAL_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'CREDENTIAL_LOCAL_CACHE_TTL', 60)
+)
+CREDENTIAL_INVALIDATION = CacheInvalidationListener(
+    CREDENTIAL_CACHE, 'dbaas:credential:invalidate', _redis_client
+)
+
+
+def _key_value(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_key_value(item) for item in value)
+    return getattr(value, 'pk', value)
+
+
+def credential_cache_key(environment, credential_type, **kwargs):
+    return (
+        _key_value(environment), credential_type,
+        tuple(sorted((k, _key_value(v)) for k, v in kwargs.items()))
+    )
+
+
+def memoize_parameters(credential):
+    """get_parameter_by_name of this instance only queries each name once"""
+    get_parameter_by_name = credential.get_parameter_by_name
+    parameters = {}
+
+    def cached_get_parameter_by_name(name):
+        if name not in parameters:
+            parameters[name] = get_parameter_by_name(name)
+        return parameters[name]
+
+    credential.get_parameter_by_name = cached_get_parameter_by_name
+    return credential
+
+
+def get_cached_credential(key, loader):
+    """
+    Returns the credential (or None, when it does not exist) for key,
+    calling loader only on a local cache miss
+    """
+    if not CREDENTIAL_CACHE.enabled:
+        return loader()
+
+    CREDENTIAL_INVALIDATION.ensure_started()
+    credential = CREDENTIAL_CACHE.get(key)
+    if credential is CACHE_MISS:
+        credential = loader()
+        if credential is not None:
+            memoize_parameters(credential)
+        CREDENTIAL_CACHE.set(key, credential)
+    return credential
+
+
+def clear_credential_cache(sender, **kwargs):
+    if sender._meta.app_label != CREDENTIALS_APP_LABEL:
+        return
+    LOG.info('Clearing credential cache, %s changed', sender.__name__)
+    CREDENTIAL_CACHE.clear()
+    CREDENTIAL_INVALIDATION.publish('*')
+
+
+post_save.connect(clear_credential_cache, dispatch_uid='credential_cache_save')
+post_delete.connect(
+    clear_credential_cache, dispatch_uid='credential_cache_delete'
+)
+m2m_changed.connect(
+    clear_credential_cache, dispatch_uid='credential_cache_m2m'
+)
@@ -4,6 +4,7 @@ import logging
 import redis
 from redis.exceptions import LockError
 from functools import wraps
+from uuid import uuid4
 from dbaas.settings import REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD
 
 LOG = logging.getLogger(__name__)
@@ -14,6 +15,35 @@ REDIS_CLIENT = redis.Redis(
 )
 
 
+# deletes the lock only while it still holds the caller token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def acquire_lock(key, timeout):
+    """Takes the same lock as only_one, for work that ends in another task.
+    Returns the token to give to release_lock, or None if it is taken."""
+    token = uuid4().hex
+    if REDIS_CLIENT.set(key, token, nx=True, ex=timeout):
+        return token
+    LOG.info("key %s locked..." % key)
+    return None
+
+
+def release_lock(key, token):
+    """Releases a lock taken by acquire_lock, from any process. A lock
+    that expired and was taken again is left alone."""
+    try:
+        return bool(REDIS_CLIENT.eval(RELEASE_LOCK_SCRIPT, 1, key, token))
+    except redis.RedisError as e:
+        LOG.warning("Could not release lock %s: %s" % (key, e))
+        return False
+
+
 def only_one(key="", timeout=None):
     """Enforce only one celery task at a time."""
     def real_decorator(function):
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import logging
+import time
+
+from dns.exception import DNSException
+from dns.resolver import Resolver
+
+from util.concurrency import backoff, parallel_map
+
+
+LOG = logging.getLogger(__name__)
+
+MAX_WORKERS = 20
+
+
+def query_dns(dns_to_check, dns_server, timeout=5):
+    resolver = Resolver(configure=False)
+    resolver.nameservers = [dns_server]
+    resolver.lifetime = timeout
+    try:
+        answer = resolver.query(dns_to_check)
+    except DNSException:
+        return []
+    return map(str, answer)
+
+
+def check_dns_batch(records, dns_servers, deadline=900, initial_wait=1,
+                    max_wait=30, timeout=5):
+    """
+    Waits until every (dns, ip) record resolves on every dns server, or
+    the deadline (seconds) passes. All pending pairs are queried
+    concurrently on each round. ip may be None to accept any answer.
+
+    Returns a dict of dns -> bool
+    """
+    expected = dict(records)
+    pending = set(
+        (dns, server) for dns in expected for server in dns_servers
+    )
+    started_at = time.time()
+    attempt = 0
+
+    def check(pair):
+        dns, server = pair
+        ips = query_dns(dns, server, timeout)
+        ip = expected[dns]
+        return (ip and ip in ips) or (not ip and bool(ips))
+
+    while pending:
+        attempt += 1
+        results = parallel_map(
+            check, sorted(pending), workers=min(MAX_WORKERS, len(pending))
+        )
+        for result in results:
+            if result.ok and result.result:
+                pending.discard(result.item)
+        LOG.info("CHECK DNS: attempt {}, {} pending".format(
+            attempt, len(pending)
+        ))
+        if not pending:
+            break
+
+        remaining = deadline - (time.time() - started_at)
+        if remaining <= 0:
+            break
+        time.sleep(min(remaining, backoff(attempt - 1, initial_wait, max_wait)))
+
+    not_ready = set(dns for dns, _ in pending)
+    return dict((dns, dns not in not_ready) for dns in expected)
@@ -3,16 +3,30 @@ from util import get_credentials_for
 from util import get_replication_topology_instance
 from dbaas_credentials.models import CredentialType
 from physical.models import DatabaseInfra
+from workflow.plan import StepPlan
 
 LOG = logging.getLogger(__name__)
 
+# compiled step plans by (topology class path, get_*_steps method)
+STEP_PLANS = {}
+
+
+def get_step_plan(class_path, operation):
+    key = (class_path, operation)
+    plan = STEP_PLANS.get(key)
+    if plan is None:
+        topology = get_replication_topology_instance(class_path)
+        plan = StepPlan(getattr(topology, operation)())
+        STEP_PLANS[key] = plan
+    return plan.copy()
+
 
 def get_deploy_settings(class_path):
-    return get_replication_topology_instance(class_path).get_deploy_steps()
+    return get_step_plan(class_path, 'get_deploy_steps')
 
 
 def get_destroy_settings(class_path):
-    return get_replication_topology_instance(class_path).get_destroy_steps()
+    return get_step_plan(class_path, 'get_destroy_steps')
 
 
 def get_deploy_instances(class_path):
@@ -20,41 +34,39 @@ def get_deploy_instances(class_path):
 
 
 def get_clone_settings(class_path):
-    return get_replication_topology_instance(class_path).get_clone_steps()
+    return get_step_plan(class_path, 'get_clone_steps')
 
 
 def get_resize_settings(class_path):
-    return get_replication_topology_instance(class_path).get_resize_steps()
+    return get_step_plan(class_path, 'get_resize_steps')
 
 
 def get_restore_snapshot_settings(class_path):
-    return get_replication_topology_instance(class_path).get_restore_snapshot_steps()
+    return get_step_plan(class_path, 'get_restore_snapshot_steps')
 
 
 def get_upgrade_disk_type_settings(class_path):
-    return get_replication_topology_instance(class_path).get_upgrade_disk_type_steps()
+    return get_step_plan(class_path, 'get_upgrade_disk_type_steps')
 
 
 def get_database_upgrade_setting(class_path):
-    return get_replication_topology_instance(class_path).get_upgrade_steps()
+    return get_step_plan(class_path, 'get_upgrade_steps')
 
 
 def get_engine_migrate_settings(class_path):
-    return get_replication_topology_instance(
-        class_path
-    ).get_migrate_engines_steps()
+    return get_step_plan(class_path, 'get_migrate_engines_steps')
 
 
 def get_database_upgrade_patch_setting(class_path):
-    return get_replication_topology_instance(class_path).get_upgrade_patch_steps()
+    return get_step_plan(class_path, 'get_upgrade_patch_steps')
 
 
 def get_reinstallvm_steps_setting(class_path):
-    return get_replication_topology_instance(class_path).get_reinstallvm_steps()
+    return get_step_plan(class_path, 'get_reinstallvm_steps')
 
 
 def get_database_configure_ssl_setting(class_path):
-    return get_replication_topology_instance(class_path).get_configure_ssl_steps()
+    return get_step_plan(class_path, 'get_configure_ssl_steps')
 
 
 def get_database_change_parameter_setting(class_path, all_dinamic, custom_procedure):
@@ -81,55 +93,53 @@ def get_database_change_parameter_retry_steps_count(class_path, all_dinamic, cus
 
 
 def get_add_database_instances_steps(class_path):
-    return get_replication_topology_instance(class_path).get_add_database_instances_steps()
+    return get_step_plan(class_path, 'get_add_database_instances_steps')
 
 
 def get_remove_readonly_instance_steps(class_path):
-    return get_replication_topology_instance(class_path).get_remove_readonly_instance_steps()
+    return get_step_plan(class_path, 'get_remove_readonly_instance_steps')
 
 
 def get_switch_write_instance_steps(class_path):
-    return get_replication_topology_instance(class_path).get_switch_write_instance_steps()
+    return get_step_plan(class_path, 'get_switch_write_instance_steps')
 
 
 def get_filer_migrate_steps(class_path):
-    return get_replication_topology_instance(class_path).get_filer_migrate_steps()
+    return get_step_plan(class_path, 'get_filer_migrate_steps')
 
 
 def get_host_migrate_steps(class_path):
-    return get_replication_topology_instance(class_path).get_host_migrate_steps()
+    return get_step_plan(class_path, 'get_host_migrate_steps')
 
 
 def get_region_migrate_steps(class_path, stage):
-    object_instance = get_replication_topology_instance(class_path)
     if stage == DatabaseInfra.STAGE_1:
-        return object_instance.get_region_migrate_steps_stage_1()
+        return get_step_plan(class_path, 'get_region_migrate_steps_stage_1')
     elif stage == DatabaseInfra.STAGE_2:
-        return object_instance.get_region_migrate_steps_stage_2()
+        return get_step_plan(class_path, 'get_region_migrate_steps_stage_2')
     elif stage == DatabaseInfra.STAGE_3:
-        return object_instance.get_region_migrate_steps_stage_3()
+        return get_step_plan(class_path, 'get_region_migrate_steps_stage_3')
 
 
 def get_database_migrate_steps(class_path, stage):
-    object_instance = get_replication_topology_instance(class_path)
     if stage == DatabaseInfra.STAGE_1:
-        return object_instance.get_database_migrate_steps_stage_1()
+        return get_step_plan(class_path, 'get_database_migrate_steps_stage_1')
     elif stage == DatabaseInfra.STAGE_2:
-        return object_instance.get_database_migrate_steps_stage_2()
+        return get_step_plan(class_path, 'get_database_migrate_steps_stage_2')
     elif stage == DatabaseInfra.STAGE_3:
-        return object_instance.get_database_migrate_steps_stage_3()
+        return get_step_plan(class_path, 'get_database_migrate_steps_stage_3')
 
 
 def get_database_change_persistence_setting(class_path):
-    return get_replication_topology_instance(class_path).get_database_change_persistence_steps()
+    return get_step_plan(class_path, 'get_database_change_persistence_steps')
 
 
 def get_database_set_ssl_required_setting(class_path):
-    return get_replication_topology_instance(class_path).get_set_require_ssl_steps()
+    return get_step_plan(class_path, 'get_set_require_ssl_steps')
 
 
 def get_database_set_ssl_not_required_setting(class_path):
-    return get_replication_topology_instance(class_path).get_set_not_require_ssl_steps()
+    return get_step_plan(class_path, 'get_set_not_require_ssl_steps')
 
 
 def get_engine_credentials(engine, environment):
@@ -147,20 +157,20 @@ def get_engine_credentials(engine, environment):
 
 
 def get_start_database_vm_settings(class_path):
-    return get_replication_topology_instance(class_path).get_start_database_vm_steps()
+    return get_step_plan(class_path, 'get_start_database_vm_steps')
 
 
 def get_stop_database_vm_settings(class_path):
-    return get_replication_topology_instance(class_path).get_stop_database_vm_steps()
+    return get_step_plan(class_path, 'get_stop_database_vm_steps')
 
 
 def get_auto_upgrade_vm_settings(class_path):
-    return get_replication_topology_instance(class_path).get_auto_upgrade_database_vm_offering()
+    return get_step_plan(class_path, 'get_auto_upgrade_database_vm_offering')
 
 
 def get_configure_db_params_settings(class_path):
-    return get_replication_topology_instance(class_path).get_configure_db_params_steps()
+    return get_step_plan(class_path, 'get_configure_db_params_steps')
 
 
 def get_configure_static_db_params_settings(class_path):
-    return get_replication_topology_instance(class_path).get_configure_static_db_params_steps()
+    return get_step_plan(class_path, 'get_configure_static_db_params_steps')
@@ -0,0 +1,49 @@
+from unittest import TestCase
+from util.concurrency import (ParallelMap, parallel_map, timing_stats,
+                              format_timing_stats)
+
+
+def _double(value):
+    return value * 2
+
+
+def _fail_on_odd(value):
+    if value % 2:
+        raise ValueError("odd value {}".format(value))
+    return value
+
+
+class ParallelMapTestCase(TestCase):
+
+    def test_keep_items_order(self):
+        results = parallel_map(_double, range(20), workers=4)
+
+        self.assertEqual([result.item for result in results], range(20))
+        self.assertEqual(
+            [result.result for result in results], range(0, 40, 2)
+        )
+
+    def test_errors_are_returned_per_item(self):
+        results = parallel_map(_fail_on_odd, [1, 2, 3], workers=2)
+
+        self.assertFalse(results[0].ok)
+        self.assertIn('odd value 1', results[0].error)
+        self.assertTrue(results[1].ok)
+        self.assertEqual(results[1].result, 2)
+        self.assertFalse(results[2].ok)
+
+    def test_workers_bounded_by_items(self):
+        self.assertEqual(ParallelMap(_double, [1, 2], workers=10).workers, 2)
+        self.assertEqual(ParallelMap(_double, [], workers=10).workers, 1)
+
+    def test_timing_stats(self):
+        results = parallel_map(_fail_on_odd, [1, 2, 3, 4], workers=2)
+        stats = timing_stats(results)
+
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual(stats['errors'], 2)
+        self.assertLessEqual(stats['min'], stats['max'])
+        self.assertIn('4 probes, 2 errors', format_timing_stats('x', stats))
+
+    def test_timing_stats_without_results(self):
+        self.assertEqual(timing_stats([])['count'], 0)
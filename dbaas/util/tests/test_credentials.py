@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from django.test import TestCase
+from mock import patch, MagicMock
+
+from util.credentials import (CREDENTIAL_CACHE, credential_cache_key,
+                              get_cached_credential,
+                              clear_credential_cache)
+
+
+@patch('util.credentials.CREDENTIAL_INVALIDATION')
+@patch.object(CREDENTIAL_CACHE, 'ttl', 60)
+class CredentialCacheTestCase(TestCase):
+
+    def setUp(self):
+        CREDENTIAL_CACHE.clear()
+        self.key = credential_cache_key('dev', 'ZABBIX', project='dbaas')
+
+    def tearDown(self):
+        CREDENTIAL_CACHE.clear()
+
+    def test_loader_called_once(self, invalidation):
+        loader = MagicMock()
+
+        first = get_cached_credential(self.key, loader)
+        second = get_cached_credential(self.key, loader)
+
+        self.assertIs(first, second)
+        self.assertEqual(loader.call_count, 1)
+
+    def test_not_found_is_cached(self, invalidation):
+        loader = MagicMock(return_value=None)
+
+        self.assertIsNone(get_cached_credential(self.key, loader))
+        self.assertIsNone(get_cached_credential(self.key, loader))
+        self.assertEqual(loader.call_count, 1)
+
+    def test_parameters_are_memoized(self, invalidation):
+        credential = MagicMock()
+        get_parameter = credential.get_parameter_by_name
+        get_parameter.return_value = 'value'
+        credential = get_cached_credential(
+            self.key, MagicMock(return_value=credential)
+        )
+
+        credential.get_parameter_by_name('param')
+        credential.get_parameter_by_name('param')
+
+        get_parameter.assert_called_once_with('param')
+
+    def test_credentials_app_change_clears_cache(self, invalidation):
+        get_cached_credential(self.key, MagicMock())
+        sender = MagicMock()
+        sender._meta.app_label = 'dbaas_credentials'
+
+        clear_credential_cache(sender)
+
+        self.assertEqual(len(CREDENTIAL_CACHE), 0)
+        invalidation.publish.assert_called_once_with('*')
+
+    def test_other_app_change_keeps_cache(self, invalidation):
+        get_cached_credential(self.key, MagicMock())
+        sender = MagicMock()
+        sender._meta.app_label = 'physical'
+
+        clear_credential_cache(sender)
+
+        self.assertEqual(len(CREDENTIAL_CACHE), 1)
+
+
+class CredentialCacheKeyTestCase(TestCase):
+
+    def test_model_instances_and_lists(self):
+        environment = MagicMock(pk=3)
+        self.assertEqual(
+            credential_cache_key(environment, 'DNS', name__in=['a', 'b']),
+            (3, 'DNS', (('name__in', ('a', 'b')),))
+        )
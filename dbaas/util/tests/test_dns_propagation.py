@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from unittest import TestCase
+from mock import patch
+
+from util.dns_propagation import check_dns_batch, backoff
+
+
+@patch('util.dns_propagation.time')
+@patch('util.dns_propagation.query_dns')
+class CheckDNSBatchTestCase(TestCase):
+
+    def test_all_records_on_all_servers(self, query_dns, time_mock):
+        time_mock.time.return_value = 0
+        query_dns.side_effect = lambda dns, server, timeout: {
+            'db1.dbaas': ['10.0.0.1'], 'db2.dbaas': ['10.0.0.2'],
+        }[dns]
+
+        ready = check_dns_batch(
+            [('db1.dbaas', '10.0.0.1'), ('db2.dbaas', None)],
+            ['ns1', 'ns2']
+        )
+
+        self.assertEqual(ready, {'db1.dbaas': True, 'db2.dbaas': True})
+        self.assertEqual(query_dns.call_count, 4)
+        self.assertFalse(time_mock.sleep.called)
+
+    def test_only_pending_records_are_queried_again(self, query_dns,
+                                                    time_mock):
+        time_mock.time.return_value = 0
+        answers = {('db1.dbaas', 'ns1'): [[], ['10.0.0.1']]}
+
+        def query(dns, server, timeout):
+            pending = answers.get((dns, server))
+            return pending.pop(0) if pending else ['10.0.0.1']
+        query_dns.side_effect = query
+
+        ready = check_dns_batch(
+            [('db1.dbaas', '10.0.0.1'), ('db2.dbaas', '10.0.0.1')],
+            ['ns1', 'ns2']
+        )
+
+        self.assertEqual(ready, {'db1.dbaas': True, 'db2.dbaas': True})
+        self.assertEqual(query_dns.call_count, 5)
+        self.assertEqual(time_mock.sleep.call_count, 1)
+
+    def test_deadline(self, query_dns, time_mock):
+        time_mock.time.side_effect = [0, 5, 11]
+        query_dns.return_value = ['10.0.0.9']
+
+        ready = check_dns_batch(
+            [('db1.dbaas', '10.0.0.1')], ['ns1'], deadline=10
+        )
+
+        self.assertEqual(ready, {'db1.dbaas': False})
+        self.assertEqual(query_dns.call_count, 2)
+
+
+class BackoffTestCase(TestCase):
+
+    def test_exponential_with_jitter(self):
+        for attempt, wait in [(0, 1), (3, 8), (10, 30)]:
+            value = backoff(attempt, initial_wait=1, max_wait=30)
+            self.assertTrue(wait / 2.0 <= value <= wait)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+from unittest import TestCase
+from mock import patch, MagicMock
+
+from util.wait import Waiter, WaitTimeout, wait_until, park
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class WaitTestCase(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        time_patch = patch('util.wait.time', new=self.clock)
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+    def test_first_check_is_right_away(self):
+        self.assertEqual(wait_until(lambda: 'ready', timeout=60), 'ready')
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_waits_grow_until_max_wait(self):
+        answers = [False] * 8 + [True]
+
+        self.assertTrue(wait_until(
+            lambda: answers.pop(0), timeout=600, initial_wait=1, max_wait=8
+        ))
+
+        self.assertEqual(len(self.clock.sleeps), 8)
+        for wait in self.clock.sleeps:
+            self.assertLessEqual(wait, 8)
+        self.assertGreaterEqual(self.clock.sleeps[-1], 4)
+
+    def test_never_passes_the_deadline(self):
+        with self.assertRaises(WaitTimeout):
+            wait_until(lambda: False, timeout=45, max_wait=30,
+                       description='fake')
+
+        self.assertEqual(self.clock.now, 45)
+
+    def test_waiter_attempts(self):
+        attempts = [attempt for attempt in Waiter(10, max_wait=2)]
+
+        self.assertEqual(attempts, range(len(attempts)))
+        self.assertEqual(self.clock.now, 10)
+
+
+class ParkTestCase(TestCase):
+
+    @patch('util.wait.time')
+    def test_runs_inline_when_called_directly(self, time_mock):
+        task = MagicMock(return_value='done')
+        task.request.called_directly = True
+
+        result = park(task, 10, args=(1,), kwargs={'attempt': 2})
+
+        self.assertEqual(result, 'done')
+        time_mock.sleep.assert_called_once_with(10)
+        task.assert_called_once_with(1, attempt=2)
+
+    @patch('util.wait.time')
+    def test_reschedules_in_worker(self, time_mock):
+        task = MagicMock()
+        task.request.called_directly = False
+        task.request.is_eager = False
+        task.retry.return_value = Exception('retry')
+
+        with self.assertRaises(Exception):
+            park(task, 10, args=(1,), kwargs={'attempt': 2})
+
+        task.retry.assert_called_once_with(
+            args=(1,), kwargs={'attempt': 2}, countdown=10
+        )
+        self.assertFalse(time_mock.sleep.called)
+        self.assertFalse(task.called)
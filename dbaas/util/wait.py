@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import logging
+import time
+
+from util.concurrency import backoff
+
+
+LOG = logging.getLogger(__name__)
+
+
+class WaitTimeout(Exception):
+    pass
+
+
+class Waiter(object):
+    """
+    Deadline based polling: iterate to get one attempt number per check,
+    the waits between checks grow from initial_wait to max_wait and never
+    pass the deadline. The first check is done right away.
+
+        for attempt in Waiter(timeout=300):
+            if is_ready():
+                break
+        else:
+            raise WaitTimeout(...)
+    """
+
+    def __init__(self, timeout, initial_wait=1, max_wait=30):
+        self.timeout = timeout
+        self.initial_wait = initial_wait
+        self.max_wait = max_wait
+        self.deadline = time.time() + timeout
+        self.attempt = 0
+
+    @property
+    def remaining(self):
+        return max(0, self.deadline - time.time())
+
+    @property
+    def expired(self):
+        return self.remaining <= 0
+
+    def next_wait(self):
+        return min(self.remaining, backoff(
+            self.attempt, self.initial_wait, self.max_wait
+        ))
+
+    def __iter__(self):
+        while True:
+            yield self.attempt
+            if self.expired:
+                return
+            time.sleep(self.next_wait())
+            self.attempt += 1
+
+
+def wait_until(condition, timeout, initial_wait=1, max_wait=30,
+               description=None):
+    """
+    Calls condition until it returns something true, and returns it.
+    Raises WaitTimeout when timeout seconds pass.
+    """
+    waiter = Waiter(timeout, initial_wait, max_wait)
+    for _ in waiter:
+        result = condition()
+        if result:
+            return result
+    raise WaitTimeout('{} not ready after {} checks in {}s'.format(
+        description or condition, waiter.attempt + 1, timeout
+    ))
+
+
+def park(task, countdown, args=(), kwargs=None):
+    """
+    Waits countdown seconds without holding the worker: the bound celery
+    task is scheduled again, with args and kwargs, and the current run
+    ends. Keep the wait state (attempt, deadline...) in kwargs, and
+    declare the task with max_retries=None.
+
+    Called directly or eagerly there is no worker to free, so it sleeps
+    and runs the task again inline, returning its result.
+    """
+    kwargs = kwargs or {}
+    request = task.request
+    if request.called_directly or request.is_eager:
+        time.sleep(countdown)
+        return task(*args, **kwargs)
+
+    LOG.info("Parking {} for {}s".format(task.name, countdown))
+    raise task.retry(args=args, kwargs=kwargs, countdown=countdown)
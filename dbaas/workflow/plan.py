@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from django.utils.module_loading import import_by_path
+
+
+class StepPlan(list):
+    """
+    Groups of steps as returned by the replication topologies,
+    [{'group name': ('step.path', ...)}, ...], with every step class
+    resolved once. It is still that list, so it can go anywhere the
+    groups went before; treat it as read only.
+    """
+
+    def __init__(self, groups=()):
+        super(StepPlan, self).__init__(groups)
+        self.classes = {}
+        self.steps_per_instance = 0
+        for _, steps in self.groups:
+            self.steps_per_instance += len(steps)
+            for step in steps:
+                if step in self.classes:
+                    continue
+                try:
+                    self.classes[step] = import_by_path(step)
+                except Exception:
+                    # raised again, as a failed step, when it is used
+                    self.classes[step] = None
+
+    @property
+    def groups(self):
+        return [group.items()[0] for group in self]
+
+    @property
+    def descriptions(self):
+        return [name for name, _ in self.groups]
+
+    def step_class(self, step):
+        step_class = self.classes.get(step)
+        if step_class is None:
+            return import_by_path(step)
+        return step_class
+
+    def is_parallel_safe(self, step):
+        return getattr(self.classes.get(step), 'parallel_safe', False)
+
+    def total_of_steps(self, instances):
+        return self.steps_per_instance * len(instances)
+
+    def copy(self):
+        plan = StepPlan.__new__(StepPlan)
+        list.__init__(plan, self)
+        plan.classes = self.classes
+        plan.steps_per_instance = self.steps_per_instance
+        return plan
+
+
+def compile_plan(groups):
+    if isinstance(groups, StepPlan):
+        return groups
+    return StepPlan(groups)
@@ -0,0 +1,91 @@
+from django.test import TestCase
+from mock import patch, MagicMock, PropertyMock
+
+from workflow.steps.util.base import ACLFromHellClient, CantSetACLError
+
+
+class FakeCache(dict):
+
+    def set(self, key, value, timeout=None):
+        self[key] = value
+
+    def delete(self, key):
+        self.pop(key, None)
+
+
+def rule(hostname):
+    return {'Destination': {'ExternalDNS': {'Name': hostname}}}
+
+
+@patch('workflow.steps.util.base.ACLFromHellClient.credential',
+       new_callable=PropertyMock)
+@patch('workflow.steps.util.base.ACLFromHellClient._post_acl')
+@patch('workflow.steps.util.base.ACLFromHellClient.get_enabled_rules')
+class AddACLsTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = FakeCache()
+        cache_patch = patch('workflow.steps.util.base.cache', new=self.cache)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+        self.database = MagicMock(id=1)
+        self.database.name = 'fake_database'
+        self.database.infra.get_driver.return_value.ports = [3306]
+        self.client = ACLFromHellClient(MagicMock())
+
+    def test_adds_only_missing_rules(self, get_rules, post_acl, credential):
+        get_rules.return_value = [rule('host1')]
+
+        added = self.client.add_acls(
+            self.database, 'app', ['host1', 'host2', 'host3', 'host2'],
+            workers=1
+        )
+
+        self.assertEqual(added, ['host2', 'host3'])
+        self.assertEqual(get_rules.call_count, 1)
+        self.assertEqual(
+            [call[0][2] for call in post_acl.call_args_list],
+            ['host2', 'host3']
+        )
+
+    def test_uses_local_rule_cache(self, get_rules, post_acl, credential):
+        get_rules.return_value = []
+        self.client.add_acls(self.database, 'app', ['host1'], workers=1)
+
+        added = self.client.add_acls(
+            self.database, 'app', ['host1'], workers=1
+        )
+
+        self.assertEqual(added, [])
+        self.assertEqual(get_rules.call_count, 1)
+        self.assertEqual(post_acl.call_count, 1)
+
+    def test_error_keeps_added_rules(self, get_rules, post_acl, credential):
+        get_rules.return_value = []
+
+        def post(database, app_name, hostname, ports):
+            if hostname == 'host2':
+                raise CantSetACLError('fake error')
+        post_acl.side_effect = post
+
+        with self.assertRaises(CantSetACLError):
+            self.client.add_acls(
+                self.database, 'app', ['host1', 'host2'], workers=1
+            )
+
+        self.assertEqual(
+            self.client.get_registered_hostnames(self.database, 'app'),
+            set(['host1'])
+        )
+
+    @patch('workflow.steps.util.base.requests.delete')
+    def test_remove_acl_clears_rule_cache(self, delete, get_rules, post_acl,
+                                          credential):
+        get_rules.return_value = []
+        self.client.add_acls(self.database, 'app', ['host1'], workers=1)
+        get_rules.return_value = [rule('host1')]
+
+        self.client.remove_acl(self.database, 'app')
+
+        self.assertEqual(self.cache, {})
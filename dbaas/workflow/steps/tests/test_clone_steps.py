@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+from mock import MagicMock, PropertyMock, patch
+
+from workflow.steps.util.clone.clone_database import (CloneProgress,
+                                                      CloneDatabaseData)
+from workflow.steps.tests.base import StepBaseTestCase
+
+
+MODULE = 'workflow.steps.util.clone.clone_database.{}'
+
+
+class CloneProgressTestCase(TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.state_dir)
+        self.task = MagicMock()
+        self.progress = CloneProgress(self.state_dir, self.task)
+
+    def write_state(self, chunks, done):
+        with open(os.path.join(self.state_dir, 'chunks'), 'w') as f:
+            f.write('\n'.join(chunks) + '\n')
+        done_dir = os.path.join(self.state_dir, 'done')
+        if not os.path.isdir(done_dir):
+            os.mkdir(done_dir)
+        for chunk in done:
+            open(os.path.join(done_dir, chunk), 'w').close()
+
+    def test_no_state_yet(self):
+        self.assertIsNone(self.progress.read())
+        self.assertIsNone(self.progress.report())
+        self.assertFalse(self.task.add_detail.called)
+
+    def test_counts_only_listed_chunks(self):
+        self.write_state(['users', 'orders', 'items'], ['users', 'schema'])
+        self.assertEqual(self.progress.read(), (1, 3))
+
+    def test_reports_only_when_changed(self):
+        self.write_state(['users', 'orders'], ['users'])
+
+        last = self.progress.report()
+        self.progress.report(last)
+
+        self.task.add_detail.assert_called_once_with(
+            'Cloned 1 of 2 tables', level=3
+        )
+        self.task.flush_details.assert_called_once_with()
+
+
+@patch(MODULE.format('CloneDatabaseData.is_first_instance'),
+       new=PropertyMock(return_value=True))
+@patch(MODULE.format('CloneDatabaseData.has_database'),
+       new=PropertyMock(return_value=True))
+@patch(MODULE.format('CloneDatabaseData.database'),
+       new=PropertyMock(return_value=MagicMock(id=7)))
+@patch(MODULE.format('Configuration'))
+class CloneDatabaseDataStateTestCase(StepBaseTestCase):
+    step_class = CloneDatabaseData
+
+    def setUp(self):
+        super(CloneDatabaseDataStateTestCase, self).setUp()
+        self.clone_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.clone_dir)
+        self.step.step_manager = MagicMock(task=None)
+
+    def make_state(self):
+        os.makedirs(os.path.join(self.step.state_dir, 'done'))
+
+    def run_step(self, is_retry):
+        with patch(MODULE.format('get_clone_args')), \
+                patch(MODULE.format('factory_for')), \
+                patch(MODULE.format('CloneDatabaseData.is_retry'),
+                      new=PropertyMock(return_value=is_retry)), \
+                patch(MODULE.format('call_script')) as call_script:
+            call_script.return_value = (0, 'ok')
+            self.step.do()
+        return call_script
+
+    def test_state_dir_by_destination_database_id(self, configuration):
+        configuration.get_by_name.return_value = self.clone_dir
+        self.assertTrue(self.step.state_dir.startswith(self.clone_dir))
+        self.assertTrue(self.step.state_dir.endswith('.7.clone'))
+
+    def test_new_clone_discards_previous_state(self, configuration):
+        configuration.get_by_name.return_value = self.clone_dir
+        self.make_state()
+
+        call_script = self.run_step(is_retry=False)
+
+        self.assertFalse(os.path.exists(self.step.state_dir))
+        self.assertEqual(
+            call_script.call_args[1]['envs']['CLONE_STATE_DIR'],
+            self.step.state_dir
+        )
+
+    def test_consistent_clone_from_configuration(self, configuration):
+        configuration.get_by_name.return_value = self.clone_dir
+        configuration.get_by_name_as_int.side_effect = (
+            lambda name, default: {'database_clone_consistent': 1}.get(
+                name, default
+            )
+        )
+
+        call_script = self.run_step(is_retry=False)
+
+        envs = call_script.call_args[1]['envs']
+        self.assertEqual(envs['CLONE_CONSISTENT'], '1')
+        self.assertEqual(envs['CLONE_PARALLEL'], '4')
+
+    def test_retry_keeps_state(self, configuration):
+        configuration.get_by_name.return_value = self.clone_dir
+        self.make_state()
+
+        self.run_step(is_retry=True)
+
+        self.assertTrue(os.path.exists(self.step.state_dir))
+
+    def test_undo_removes_state(self, configuration):
+        configuration.get_by_name.return_value = self.clone_dir
+        self.make_state()
+
+        self.step.undo()
+
+        self.assertFalse(os.path.exists(self.step.state_dir))
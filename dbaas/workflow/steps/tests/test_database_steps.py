@@ -1,7 +1,8 @@
 from mock import PropertyMock, MagicMock, patch
 
 from workflow.steps.util.database import (StopIfRunning, StopSlaveIfRunning,
-                                          StopIfRunningAndVMUp)
+                                          StopIfRunningAndVMUp,
+                                          WaitForReplication)
 from workflow.steps.tests.base import StepBaseTestCase
 
 
@@ -73,3 +74,71 @@ class StopSlaveIfRunningTestCase(StepBaseTestCase):
            new=MagicMock(return_value=True))
     def test_db_is_up(self):
         self.assertTrue(self.step.is_valid)
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class WaitForReplicationTestCase(StepBaseTestCase):
+    step_class = WaitForReplication
+
+    def setUp(self):
+        super(WaitForReplicationTestCase, self).setUp()
+        clock_patch = patch('util.wait.time', new=FakeClock())
+        clock_patch.start()
+        self.addCleanup(clock_patch.stop)
+        self.step._driver = MagicMock(max_replication_lag=0)
+        self.lag_for = self.step._driver.replication_lag_for
+
+    def test_all_ok_right_away(self):
+        self.lag_for.return_value = {'db1': 0, 'db2': 0}
+
+        self.assertEqual(
+            self.step.check_replication_ok_for(['db1', 'db2']), []
+        )
+        self.assertEqual(self.lag_for.call_count, 1)
+        self.assertEqual(
+            self.step.details, ['Replication lag after 0s: db1 0s, db2 0s']
+        )
+
+    def test_waits_only_for_lagging_instances(self):
+        self.lag_for.side_effect = [{'db1': 5, 'db2': 0}, {'db1': 0}]
+
+        self.assertEqual(
+            self.step.check_replication_ok_for(['db1', 'db2']), []
+        )
+        self.lag_for.assert_called_with(['db1'])
+        self.assertEqual(len(self.step.details), 2)
+
+    def test_not_running_returned_right_away(self):
+        self.lag_for.side_effect = [{'db1': None, 'db2': 5}, {'db2': 0}]
+
+        self.assertEqual(
+            self.step.check_replication_ok_for(['db1', 'db2']), ['db1']
+        )
+        self.assertIn('db1 not running', self.step.details[0])
+
+    def test_lagging_after_deadline(self):
+        self.lag_for.return_value = {'db1': 0, 'db2': 5}
+
+        self.assertEqual(
+            self.step.check_replication_ok_for(['db1', 'db2']), ['db2']
+        )
+
+    @patch('workflow.steps.util.database.sleep')
+    def test_fix_replication_restarts_all(self, sleep):
+        self.lag_for.return_value = {'db1': 0, 'db2': 0}
+
+        self.step.fix_replication(['db1', 'db2'])
+
+        self.assertEqual(self.step._driver.stop_slave.call_count, 2)
+        self.assertEqual(self.step._driver.start_slave.call_count, 2)
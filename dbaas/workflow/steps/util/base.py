@@ -3,14 +3,17 @@ from __future__ import unicode_literals
 import logging
 import requests
 from collections import namedtuple
-from time import sleep
 
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.encoding import python_2_unicode_compatible
 
 from dbaas_credentials.models import CredentialType
 from util import get_credentials_for, AuthRequest, GetCredentialException
 from physical.models import Vip
+from system.models import Configuration
+from util.concurrency import parallel_map
+from util.wait import wait_until, WaitTimeout
 
 LOG = logging.getLogger(__name__)
 CHECK_SECONDS = 10
@@ -23,6 +26,10 @@ class CantSetACLError(Exception):
 
 @python_2_unicode_compatible
 class BaseInstanceStep(object):
+    # Safe to run for all instances at the same time: does not depend on
+    # what the other instances did in the group. It may run again for an
+    # instance on a retry, so it must be idempotent
+    parallel_safe = False
 
     def __str__(self):
         return "I am a step"
@@ -33,6 +40,11 @@ class BaseInstanceStep(object):
         self._future_vip = None
         self._driver = None
         self._credential = None
+        self.details = []
+
+    def add_detail(self, message):
+        """ Written on the task, below the step, when the step ends """
+        self.details.append(message)
 
     @property
     def infra(self):
@@ -263,21 +275,29 @@ class BaseInstanceStep(object):
         #).identifier
         #return self._get_vip(future_vip_identifier, self.environment)
 
-    def __is_instance_status(self, expected, attempts=None):
+    def _is_instance_status(self, expected, attempts=None,
+                            check_seconds=CHECK_SECONDS,
+                            check_attempts=CHECK_ATTEMPTS):
         if self.host_migrate and self.instance.hostname.future_host:
             self.instance.address = self.instance.hostname.future_host.address
-        for _ in range(attempts or CHECK_ATTEMPTS):
+
+        def has_expected_status():
             try:
                 status = self.driver.check_status(instance=self.instance)
             except Exception as e:
                 LOG.debug('{} is down - {}'.format(self.instance, e))
                 status = False
+            return status == expected
 
-            if status == expected:
-                return True
-            else:
-                sleep(CHECK_SECONDS)
-        return False
+        # same time budget as attempts of check_seconds, checking sooner
+        timeout = (attempts or check_attempts) * check_seconds
+        try:
+            return wait_until(
+                has_expected_status, timeout, max_wait=check_seconds,
+                description='{} status'.format(self.instance)
+            )
+        except WaitTimeout:
+            return False
 
     def vm_is_up(self, attempts=2, wait=5, interval=10):
         return self.host.ssh.check(
@@ -287,10 +307,10 @@ class BaseInstanceStep(object):
         )
 
     def database_is_up(self, attempts=None):
-        return self.__is_instance_status(True, attempts=attempts)
+        return self._is_instance_status(True, attempts=attempts)
 
     def database_is_down(self, attempts=None):
-        return self.__is_instance_status(False, attempts=attempts)
+        return self._is_instance_status(False, attempts=attempts)
 
     def run_script(self, script, host=None):
         return (host or self.host).ssh.run_script(script)
@@ -540,24 +560,38 @@ class ACLFromHellClient(object):
         vip_dns = self._get_vip_dns(databaseinfra)
         self.add_acl(database, app_name, vip_dns)
 
-    def add_acl(self, database, app_name, hostname):
-        rules = self.get_enabled_rules(
-            database,
-            app_name,
-            extra_params={'destination.externaldns.name': hostname}
-        )
-        if rules:
-            msg = "Rule already registered. Database: {}, \
-                   App Name: {}, Hostname: {} - Rules: {}".format(
-                       database, app_name, hostname, rules
-                   )
-            LOG.info(msg)
-            return
+    @staticmethod
+    def _rule_hostname(rule):
+        return (rule.get('Destination', {})
+                .get('ExternalDNS', {})
+                .get('Name'))
 
-        infra = database.infra
-        driver = infra.get_driver()
+    @staticmethod
+    def _rules_cache_key(database, app_name):
+        return "aclfromhell:rules:{}:{}".format(database.id, app_name)
+
+    def get_acl_hostnames(self, database):
+        infra = database.databaseinfra
+        hostnames = [host.hostname for host in infra.hosts]
+        if infra.vips.exists():
+            hostnames.append(self._get_vip_dns(infra))
+        return hostnames
+
+    def get_registered_hostnames(self, database, app_name):
+        key = self._rules_cache_key(database, app_name)
+        hostnames = cache.get(key)
+        if hostnames is None:
+            hostnames = set(
+                self._rule_hostname(rule)
+                for rule in self.get_enabled_rules(database, app_name)
+            )
+            cache.set(key, hostnames, Configuration.get_by_name_as_int(
+                'aclfromhell_rules_cache_ttl', default=5*60
+            ))
+        return hostnames
 
-        payload = {
+    def _make_payload(self, database, app_name, hostname, ports):
+        return {
             "source": {
                 "tsuruapp": {
                     "appname": app_name
@@ -571,7 +605,7 @@ class ACLFromHellClient(object):
                             'protocol': 'tcp',
                             'port': p
                         },
-                        driver.ports
+                        ports
                     )
                 }
             },
@@ -583,6 +617,8 @@ class ACLFromHellClient(object):
             }
         }
 
+    def _post_acl(self, database, app_name, hostname, ports):
+        payload = self._make_payload(database, app_name, hostname, ports)
         LOG.info("Tsuru Add ACL: payload for host {}:{}".format(
             hostname, payload))
         resp = self._request(
@@ -594,13 +630,76 @@ class ACLFromHellClient(object):
             error = "Cant set acl for {}:{}-{}. Error: {}".format(
                 app_name, database, hostname, resp.content
             )
-            LOG.error(msg)
+            LOG.error(error)
             raise CantSetACLError(error)
 
         LOG.info("Tsuru Add ACL Status for host {}: {}".format(
             hostname, resp.status_code
         ))
 
+    def add_acl(self, database, app_name, hostname):
+        rules = self.get_enabled_rules(
+            database,
+            app_name,
+            extra_params={'destination.externaldns.name': hostname}
+        )
+        if rules:
+            msg = "Rule already registered. Database: {}, \
+                   App Name: {}, Hostname: {} - Rules: {}".format(
+                       database, app_name, hostname, rules
+                   )
+            LOG.info(msg)
+            return
+
+        driver = database.infra.get_driver()
+        self._post_acl(database, app_name, hostname, driver.ports)
+        cache.delete(self._rules_cache_key(database, app_name))
+
+    def add_acls(self, database, app_name, hostnames, workers=None):
+        """
+        Same as add_acl for many hostnames: the registered rules are read
+        once and only the missing ones are created, concurrently.
+        Returns the list of hostnames that got a new rule.
+        """
+        registered = self.get_registered_hostnames(database, app_name)
+        missing = []
+        for hostname in hostnames:
+            if hostname not in registered and hostname not in missing:
+                missing.append(hostname)
+        if not missing:
+            LOG.info("Rules already registered. Database: {}, "
+                     "App Name: {}".format(database, app_name))
+            return []
+
+        if workers is None:
+            workers = Configuration.get_by_name_as_int(
+                'aclfromhell_bulk_concurrency', default=5
+            )
+        ports = database.infra.get_driver().ports
+        # load the credential once, before the worker threads need it
+        self.credential
+        results = parallel_map(
+            lambda hostname: self._post_acl(
+                database, app_name, hostname, ports
+            ),
+            missing, workers=workers
+        )
+
+        added = [result.item for result in results if result.ok]
+        key = self._rules_cache_key(database, app_name)
+        cache.set(key, registered | set(added),
+                  Configuration.get_by_name_as_int(
+                      'aclfromhell_rules_cache_ttl', default=5*60
+                  ))
+
+        errors = [result for result in results if not result.ok]
+        if errors:
+            raise CantSetACLError("Cant set acl for {}:{} on {}".format(
+                app_name, database,
+                ", ".join(result.item for result in errors)
+            ))
+        return added
+
     def remove_acl(self, database, app_name):
         rules = self.get_enabled_rules(database, app_name)
 
@@ -611,9 +710,7 @@ class ACLFromHellClient(object):
 
         for rule in rules:
             rule_id = rule.get('RuleID')
-            host = (rule.get('Destination', {})
-                    .get('ExternalDNS', {})
-                    .get('Name'))
+            host = self._rule_hostname(rule)
             if rule_id:
                 LOG.info('Tsuru Unbind App removing rule for {}:{}-{}'.format(
                     app_name, database, host))
@@ -625,4 +722,5 @@ class ACLFromHellClient(object):
                     msg = "Error on delete rule {} for {}.".format(
                         rule_id, host)
                     LOG.error(msg)
+        cache.delete(self._rules_cache_key(database, app_name))
         return None
@@ -1,14 +1,66 @@
 # -*- coding: utf-8 -*-
 import logging
+import os
+import shutil
+import threading
 from util import call_script
 from django.conf import settings
+from django.db import connection
 from drivers import factory_for
 from notification.util import get_clone_args
+from system.models import Configuration
 from workflow.steps.util.base import BaseInstanceStep
 
 LOG = logging.getLogger(__name__)
 
 
+class CloneProgress(threading.Thread):
+    """Reports on the clone task how many chunks (tables) the clone
+    script already copied, reading the state dir it keeps for resuming"""
+
+    def __init__(self, state_dir, task, interval=30):
+        super(CloneProgress, self).__init__()
+        self.daemon = True
+        self.state_dir = state_dir
+        self.task = task
+        self.interval = interval
+        self.finished = threading.Event()
+
+    def read(self):
+        try:
+            with open(os.path.join(self.state_dir, 'chunks')) as chunks:
+                chunks = set(chunks.read().splitlines())
+            done = chunks.intersection(
+                os.listdir(os.path.join(self.state_dir, 'done'))
+            )
+        except (IOError, OSError):
+            return None
+        return len(done), len(chunks)
+
+    def report(self, last=None):
+        progress = self.read()
+        if progress and progress != last:
+            self.task.add_detail(
+                'Cloned {} of {} tables'.format(*progress), level=3
+            )
+            self.task.flush_details()
+        return progress or last
+
+    def run(self):
+        last = None
+        try:
+            while not self.finished.wait(self.interval):
+                last = self.report(last)
+        except Exception as e:
+            LOG.warning('Could not report clone progress: {}'.format(e))
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
 class CloneDatabaseData(BaseInstanceStep):
 
     def __unicode__(self):
@@ -22,11 +74,31 @@ class CloneDatabaseData(BaseInstanceStep):
             args = get_clone_args(
                 self.step_manager.origin_database, self.database)
             script_name = factory_for(self.infra).clone()
+            envs = {
+                'CLONE_PARALLEL': str(Configuration.get_by_name_as_int(
+                    'database_clone_parallel', default=4
+                )),
+                'CLONE_STATE_DIR': self.state_dir,
+                'CLONE_CONSISTENT': str(Configuration.get_by_name_as_int(
+                    'database_clone_consistent', default=0
+                )),
+            }
 
-            return_code, output = call_script(
-                script_name, working_dir=settings.SCRIPTS_PATH,
-                args=args, split_lines=False
-            )
+            # only a retry of this same clone may resume from the state
+            if not self.is_retry:
+                self.remove_state()
+
+            progress = CloneProgress(self.state_dir, self.step_manager.task)
+            if progress.task:
+                progress.start()
+            try:
+                return_code, output = call_script(
+                    script_name, working_dir=settings.SCRIPTS_PATH,
+                    args=args, split_lines=False, envs=envs
+                )
+            finally:
+                if progress.is_alive():
+                    progress.stop()
 
             LOG.info("Script Output: {}".format(output))
             LOG.info("Return code: {}".format(return_code))
@@ -41,5 +113,26 @@ class CloneDatabaseData(BaseInstanceStep):
 
             return False
 
+    @property
+    def state_dir(self):
+        # Kept by the clone script to resume, by destination database id
+        # so a new clone with the same name never sees it
+        return os.path.join(
+            Configuration.get_by_name('database_clone_dir'),
+            '{}.{}.clone'.format(self.database.name, self.database.id)
+        )
+
+    @property
+    def is_retry(self):
+        step_manager = self.step_manager
+        return step_manager.__class__.objects.filter(
+            infra=step_manager.infra
+        ).exclude(id=step_manager.id).exists()
+
+    def remove_state(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
     def undo(self):
-        pass
+        if not self.is_first_instance or not self.has_database:
+            return
+        self.remove_state()
@@ -6,6 +6,8 @@ from drivers.errors import ReplicationNotRunningError
 from logical.models import Database
 from physical.factories.prometheus_exporter_factory import get_exporter
 from util import build_context_script
+from util.concurrency import parallel_map
+from util.wait import Waiter
 from workflow.steps.mongodb.util import build_change_oplogsize_script
 from workflow.steps.mysql.util import build_update_kernel_params_script
 from workflow.steps.util.base import BaseInstanceStep
@@ -64,22 +66,6 @@ class DatabaseStep(BaseInstanceStep):
     def stop_database(self):
         return self._execute_init_script('stop')
 
-    def __is_instance_status(self, expected, attempts=None):
-        if self.host_migrate and self.instance.hostname.future_host:
-            self.instance.address = self.instance.hostname.future_host.address
-        for _ in range(attempts or CHECK_ATTEMPTS):
-            try:
-                status = self.driver.check_status(instance=self.instance)
-            except Exception as e:
-                LOG.debug('{} is down - {}'.format(self.instance, e))
-                status = False
-
-            if status == expected:
-                return True
-            else:
-                sleep(CHECK_SECONDS)
-        return False
-
     def vm_is_up(self, attempts=2, wait=5, interval=10):
         return self.host.ssh.check(
             retries=attempts,
@@ -88,10 +74,14 @@ class DatabaseStep(BaseInstanceStep):
         )
 
     def is_up(self, attempts=None):
-        return self.__is_instance_status(True, attempts=attempts)
+        return self._is_instance_status(
+            True, attempts, CHECK_SECONDS, CHECK_ATTEMPTS
+        )
 
     def is_down(self, attempts=None):
-        return self.__is_instance_status(False, attempts=attempts)
+        return self._is_instance_status(
+            False, attempts, CHECK_SECONDS, CHECK_ATTEMPTS
+        )
 
     def _execute_script(self, script_variables, script):
         final_script = build_context_script(
@@ -426,40 +416,75 @@ class WaitForReplication(DatabaseStep):
     def is_valid(self):
         return not self.instance.temporary
 
-    def check_replication_ok(self, instance):
-        attempts = 0
-        while not self.driver.is_replication_ok(instance):
-            if attempts == CHECK_ATTEMPTS:
-                return False
+    def check_replication_ok_for(self, instances):
+        """
+        Watches the lag of all instances at once, against one deadline,
+        and returns the ones not ok when it passes. Instances without
+        replication running are returned right away.
+        """
+        timeout = CHECK_ATTEMPTS * CHECK_SECONDS
+        not_running = []
+        pending = list(instances)
+        waiter = Waiter(timeout, max_wait=CHECK_SECONDS)
+        for _ in waiter:
+            lags = self.driver.replication_lag_for(pending)
+            self.add_lag_sample(timeout - waiter.remaining, pending, lags)
+            for instance in list(pending):
+                lag = lags[instance]
+                if lag is None:
+                    not_running.append(instance)
+                if lag is None or lag <= self.driver.max_replication_lag:
+                    pending.remove(instance)
+
+            if not pending:
+                break
+
+        return not_running + pending
+
+    def add_lag_sample(self, elapsed, instances, lags):
+        sample = 'Replication lag after {:.0f}s: {}'.format(
+            elapsed, ', '.join(
+                '{} {}'.format(
+                    instance,
+                    'not running' if lags[instance] is None
+                    else '{}s'.format(lags[instance])
+                ) for instance in instances
+            )
+        )
+        LOG.info(sample)
+        self.add_detail(sample)
 
-            attempts += 1
-            LOG.info("Replication is not ok for {} (Attempt {}/{})".format(
-                instance, attempts, CHECK_ATTEMPTS
-            ))
-            sleep(CHECK_SECONDS)
+    def restart_replication(self, instance):
+        self.driver.stop_slave(instance)
+        sleep(CHECK_SECONDS)
+        self.driver.start_slave(instance)
 
-        return True
+    def fix_replication(self, instances):
+        """ Restarts the replication of the instances all at once """
+        if not instances:
+            return
+
+        for result in parallel_map(
+                self.restart_replication, instances, len(instances)):
+            if not result.ok:
+                raise EnvironmentError(
+                    'Could not restart replication of {}: {}'.format(
+                        result.item, result.error
+                    )
+                )
+
+        sleep(CHECK_SECONDS)
+        if self.check_replication_ok_for(instances):
+            raise ReplicationNotRunningError
 
     def do(self):
         if not self.infra.plan.is_ha or not self.is_valid:
             return
 
-        not_running = []
         sleep(CHECK_SECONDS)
-        for instance in self.driver.get_database_instances():
-            try:
-                if not self.check_replication_ok(instance):
-                    not_running.append(instance)
-            except ReplicationNotRunningError:
-                not_running.append(instance)
-
-        for instance in not_running:
-            self.driver.stop_slave(instance)
-            sleep(CHECK_SECONDS)
-            self.driver.start_slave(instance)
-            sleep(CHECK_SECONDS)
-            if not self.check_replication_ok(instance):
-                raise ReplicationNotRunningError
+        self.fix_replication(self.check_replication_ok_for(
+            self.driver.get_database_instances()
+        ))
 
 
 class WaitForReplicationTemporaryInstance(WaitForReplication):
@@ -467,26 +492,13 @@ class WaitForReplicationTemporaryInstance(WaitForReplication):
     @property
     def is_valid(self):
         return self.instance.temporary
-    
-    def do(self):        
+
+    def do(self):
         if not self.infra.plan.is_ha or not self.is_valid:
             return
 
-        not_running = []
         sleep(CHECK_SECONDS)
-        try:
-            if not self.check_replication_ok(self.instance):
-                not_running.append(self.instance)
-        except ReplicationNotRunningError:
-            not_running.append(self.instance)
-
-        for instance in not_running:
-            self.driver.stop_slave(instance)
-            sleep(CHECK_SECONDS)
-            self.driver.start_slave(instance)
-            sleep(CHECK_SECONDS)
-            if not self.check_replication_ok(instance):
-                raise ReplicationNotRunningError
+        self.fix_replication(self.check_replication_ok_for([self.instance]))
 
 
 class WaitForReplicationSpecificInstance(WaitForReplicationTemporaryInstance):
@@ -4,7 +4,8 @@ from dbaas_dnsapi.provider import DNSAPIProvider
 from dbaas_dnsapi.utils import add_dns_record
 from django.core.exceptions import ObjectDoesNotExist
 from physical.models import Vip
-from util import get_credentials_for, check_dns
+from util import get_credentials_for
+from util.dns_propagation import check_dns_batch
 from base import BaseInstanceStep
 import socket
 
@@ -413,16 +414,32 @@ class CheckIsReady(DNSStep):
     def __unicode__(self):
         return "Waiting for DNS..."
 
+    @property
+    def dns_servers(self):
+        return [
+            server.strip() for server in self.credentials.project.split(',')
+            if server.strip()
+        ]
+
     def _check_dns_for(self, dns_to_check, ip_to_check):
-        for dns in DatabaseInfraDNSList.objects.filter(
+        self._check_records_for([(dns_to_check, ip_to_check)])
+
+    def _check_records_for(self, records):
+        """waits for all (dns, ip) records at once, on every dns server"""
+        registered = set(DatabaseInfraDNSList.objects.filter(
             databaseinfra=self.infra.id,
-            dns=dns_to_check
-        ):
-            if not check_dns(
-                    dns.dns,
-                    self.credentials.project,
-                    ip_to_check=ip_to_check):
-                raise EnvironmentError("DNS {} is not ready".format(dns.dns))
+            dns__in=[dns for dns, _ in records]
+        ).values_list('dns', flat=True))
+        records = [(dns, ip) for dns, ip in records if dns in registered]
+        if not records:
+            return
+
+        ready = check_dns_batch(records, self.dns_servers)
+        not_ready = sorted(dns for dns, is_ready in ready.items() if not is_ready)
+        if not_ready:
+            raise EnvironmentError(
+                "DNS {} is not ready".format(", ".join(not_ready))
+            )
 
     @property
     def must_check(self):
@@ -433,8 +450,10 @@ class CheckIsReady(DNSStep):
         if not self.must_check:
             return
 
-        for instance in self.instance.hostname.instances.all():
-            self._check_dns_for(instance.dns, self.host.address)
+        self._check_records_for([
+            (instance.dns, self.host.address)
+            for instance in self.instance.hostname.instances.all()
+        ])
 
 
 class CheckIsReadyTemporaryInstance(CheckIsReady):
@@ -471,10 +490,11 @@ class CheckIsReadyDBMigrate(CheckIsReady):
     def do(self):
         if not self.must_check:
             return
-        self._check_dns_for(self.host.hostname, self.host.address)
+        records = [(self.host.hostname, self.host.address)]
         for instance in self.instance.hostname.instances.all():
             future_instance = instance.future_instance
-            self._check_dns_for(future_instance.dns, future_instance.address)
+            records.append((future_instance.dns, future_instance.address))
+        self._check_records_for(records)
 
     def undo(self):
         pass
@@ -488,12 +508,13 @@ class CheckIsReadyDBMigrateRollback(CheckIsReady):
     def undo(self):
         if not self.must_check:
             return
-        self._check_dns_for(
+        records = [(
             self.instance.hostname.hostname,
             self.instance.hostname.address
-        )
+        )]
         for instance in self.instance.hostname.instances.all():
-            self._check_dns_for(instance.dns, instance.address)
+            records.append((instance.dns, instance.address))
+        self._check_records_for(records)
 
 
 class CheckVipDNSIsReadyDBMigrate(CheckIsReady):
@@ -5,6 +5,7 @@ from time import sleep
 from urlparse import urljoin
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F
 
 from dbaas_credentials.models import CredentialType
 from physical.models import Host, Instance, Ip, DatabaseInfra
@@ -638,6 +639,7 @@ class ChangeOffering(HostProviderStep):
 
 
 class CreateVirtualMachine(HostProviderStep):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Creating virtual machine..."
@@ -659,10 +661,12 @@ class CreateVirtualMachine(HostProviderStep):
             self.instance.delete()
 
     def update_databaseinfra_last_vm_created(self):
-        last_vm_created = self.infra.last_vm_created
-        last_vm_created += 1
-        self.infra.last_vm_created = last_vm_created
-        self.infra.save()
+        # the vms of an infra may be created at the same time
+        infras = DatabaseInfra.objects.filter(id=self.infra.id)
+        infras.update(last_vm_created=F('last_vm_created') + 1)
+        self.infra.last_vm_created = infras.values_list(
+            'last_vm_created', flat=True
+        ).get()
 
     @property
     def vm_name(self):
@@ -752,6 +756,7 @@ class CreateVirtualMachine(HostProviderStep):
 
 
 class DestroyVirtualMachineTemporaryInstance(CreateVirtualMachine):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Destroying virtual machine..."
@@ -768,6 +773,7 @@ class DestroyVirtualMachineTemporaryInstance(CreateVirtualMachine):
 
 
 class CreateVirtualMachineTemporaryInstance(CreateVirtualMachine):
+    parallel_safe = True
     
     @property
     def is_valid(self):
@@ -789,6 +795,7 @@ class CreateVirtualMachineTemporaryInstance(CreateVirtualMachine):
 
 
 class AllocateIP(HostProviderStep):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Allocating new ip..."
@@ -804,6 +811,7 @@ class AllocateIP(HostProviderStep):
 
 
 class AllocateIPTemporaryInstance(AllocateIP):
+    parallel_safe = True
     
     @property
     def is_valid(self):
@@ -850,6 +858,7 @@ class DeallocateIP(HostProviderStep):
 
 
 class CreateVirtualMachineRegionMigrate(CreateVirtualMachine):
+    parallel_safe = True
 
     @property
     def environment(self):
@@ -908,6 +917,7 @@ class CreateVirtualMachineRegionMigrate(CreateVirtualMachine):
 
 
 class CreateVirtualMachineMigrate(CreateVirtualMachine):
+    parallel_safe = True
 
     @property
     def environment(self):
@@ -1119,6 +1129,7 @@ class DestroyVirtualMachineMigrateKeepObject(DestroyVirtualMachineMigrate):
 
 
 class RecreateVirtualMachineMigrate(CreateVirtualMachineMigrate):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Recreating virtual machine in new zone..."
@@ -1177,6 +1188,7 @@ class SetServiceAccountRoles(CreateServiceAccount):
 
 
 class DestroyIPMigrate(AllocateIP):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Destroy IP migrate host..."
@@ -1195,6 +1207,7 @@ class DestroyIPMigrate(AllocateIP):
     
 
 class DestroyIPTemporaryInstance(DestroyIPMigrate):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Destroy IP..."
@@ -126,6 +126,7 @@ class ConfigureTelegrafSourceDBMigrateRollback(ConfigureTelegrafRollback):
 
 
 class InstallTelegraf(MetricsCollector):
+    parallel_safe = True
     def __unicode__(self):
         return "Installing Telegraf..."
 
@@ -159,6 +159,7 @@ class IfConguredSSLValidatorForTemporaryInstance(IfConguredSSLValidator):
 
 
 class UpdateOpenSSlLib(SSL):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Updating OpenSSL Lib..."
@@ -178,11 +179,11 @@ class UpdateOpenSSlLib(SSL):
 
 
 class UpdateOpenSSlLibIfConfigured(UpdateOpenSSlLib, IfConguredSSLValidator):
-    pass
+    parallel_safe = True
 
 
 class UpdateOpenSSlLibIfConfiguredTemporaryInstance(UpdateOpenSSlLib, IfConguredSSLValidatorForTemporaryInstance):
-    pass
+    parallel_safe = True
 
 
 class MongoDBUpdateCertificates(SSL):
@@ -425,6 +426,7 @@ class CreateSSLConfForInstanceIPIfConfigured(CreateSSLConfForInstanceIP,
 
 
 class RequestSSL(SSL):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Requesting SSL..."
@@ -447,28 +449,29 @@ class RequestSSL(SSL):
 
 
 class RequestSSLForInstance(RequestSSL, InstanceSSLBaseName):
-    pass
+    parallel_safe = True
 
 
 class RequestSSLForInstanceIfConfigured(RequestSSLForInstance,
                                         IfConguredSSLValidator):
-    pass
+    parallel_safe = True
 
 
 class RequestSSLForInfra(RequestSSL, InfraSSLBaseName):
-    pass
+    parallel_safe = True
 
 
 class RequestSSLForInfraIfConfigured(RequestSSLForInfra,
                                      IfConguredSSLValidator):
-    pass
+    parallel_safe = True
 
 
 class RequestSSLForInfraIfConfiguredTemporaryInstance(RequestSSLForInfra, IfConguredSSLValidatorForTemporaryInstance):
-    pass
+    parallel_safe = True
 
 
 class UpdateSSLForInfra(RequestSSLForInfra):
+    parallel_safe = True
 
     def request_ssl_certificate(self):
         script = "cd {ssl_path}\n"
@@ -483,6 +486,8 @@ class UpdateSSLForInfra(RequestSSLForInfra):
 
 
 class UpdateSSLForInstance(RequestSSLForInstance):
+    parallel_safe = True
+
     def request_ssl_certificate(self):
         script = "cd {ssl_path}\n"
         script += "openssl req -new -out {csr}"
@@ -946,7 +951,7 @@ class ReinstallVMSSLArbiterOnly(IfConguredSSLValidator):
 
 
 class UpdateOpenSSlLibIfConfiguredArbiterOnly(UpdateOpenSSlLibIfConfigured, ReinstallVMSSLArbiterOnly):
-    pass
+    parallel_safe = True
 
 
 class MongoDBUpdateCertificatesIfConfiguredArbiterOnly(MongoDBUpdateCertificatesIfConfigured, ReinstallVMSSLArbiterOnly):
@@ -962,7 +967,7 @@ class MongoDBCreateSSLConfForInfraIPIfConfiguredArbiterOnly(MongoDBCreateSSLConf
 
 
 class RequestSSLForInfraIfConfiguredArbiterOnly(RequestSSLForInfraIfConfigured, ReinstallVMSSLArbiterOnly):
-    pass
+    parallel_safe = True
 
 
 class CreateJsonRequestFileInfraIfConfiguredArbiterOnly(CreateJsonRequestFileInfraIfConfigured, ReinstallVMSSLArbiterOnly):
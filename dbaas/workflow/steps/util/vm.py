@@ -44,6 +44,7 @@ class VmStep(BaseInstanceStep):
 
 
 class WaitingBeReady(VmStep):
+    parallel_safe = True
 
     @property
     def is_valid(self):
@@ -62,6 +63,7 @@ class WaitingBeReady(VmStep):
 
 
 class WaitingBeReadyTemporaryInstance(WaitingBeReady):
+    parallel_safe = True
     
     @property
     def is_valid(self):
@@ -73,6 +75,7 @@ class WaitingBeReadyTemporaryInstance(WaitingBeReady):
 
 
 class WaitingBeReadyRollback(WaitingBeReady):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Waiting for VM be ready if rollback..."
@@ -85,6 +88,7 @@ class WaitingBeReadyRollback(WaitingBeReady):
 
 
 class UpdateOSDescription(VmStep):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Updating instance OS description..."
@@ -94,6 +98,7 @@ class UpdateOSDescription(VmStep):
 
 
 class UpdateOSDescriptionTemporaryInstance(UpdateOSDescription):
+    parallel_safe = True
     
     @property
     def is_valid(self):
@@ -148,11 +153,14 @@ class ChangeMaster(VmStep):
             if self.is_slave:
                 return
             try:
-                self.driver.check_replication_and_switch(self.target_instance)
+                elapsed = self.driver.check_replication_and_switch(
+                    self.target_instance
+                )
             except Exception as e:
                 error = e
                 sleep(CHANGE_MASTER_SECONDS)
             else:
+                self.add_detail('Switchover took {:.1f}s'.format(elapsed))
                 return
 
         raise error
@@ -190,7 +198,8 @@ class ChangeMasterTemporaryInstance(ChangeMaster):
             error = None
             try:
                 LOG.info("Trying to change master. Attempt %s", _)
-                self.driver.check_replication_and_switch_with_stepdown_time(self.target_instance, stepdown_time=300)
+                elapsed = self.driver.check_replication_and_switch_with_stepdown_time(self.target_instance, stepdown_time=300)
+                self.add_detail('Switchover took {:.1f}s'.format(elapsed))
                 master_is_temporary = self.check_master_is_temporary(wait_seconds=60)
 
                 if not master_is_temporary:
@@ -224,7 +233,10 @@ class ChangeMasterNotTemporaryInstance(ChangeMasterTemporaryInstance):
 
         for _ in range(CHANGE_MASTER_ATTEMPS):
             try:
-                self.driver.check_replication_and_switch(self.target_instance)
+                elapsed = self.driver.check_replication_and_switch(
+                    self.target_instance
+                )
+                self.add_detail('Switchover took {:.1f}s'.format(elapsed))
                 if self.check_master_is_temporary(wait_seconds=60):
                     raise Exception('Master is the temporary instance')
 
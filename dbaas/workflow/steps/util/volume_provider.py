@@ -641,6 +641,7 @@ class CreateVolumeDiskTypeUpgrade(VolumeProviderBase):
 
 
 class NewVolume(VolumeProviderBase):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Creating Volume..."
@@ -708,6 +709,7 @@ class NewVolume(VolumeProviderBase):
 
 
 class DestroyVolume(NewVolume):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Removing volume..."
@@ -724,6 +726,7 @@ class DestroyVolume(NewVolume):
     
 
 class DestroyVolumeTemporaryInstance(DestroyVolume):
+    parallel_safe = True
 
     def do(self):
         if not self.instance.temporary:
@@ -733,6 +736,7 @@ class DestroyVolumeTemporaryInstance(DestroyVolume):
 
 
 class DestroyFirstVolume(NewVolume):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Removing volume..."
@@ -747,6 +751,8 @@ class DestroyFirstVolume(NewVolume):
 
 
 class NewVolumeMigrate(NewVolume):
+    parallel_safe = True
+
     def __unicode__(self):
         return "Creating second volume based on snapshot for migrate..."
 
@@ -767,6 +773,8 @@ class NewVolumeMigrate(NewVolume):
 
 
 class NewVolumeFromMaster(NewVolume):
+    parallel_safe = True
+
     def __unicode__(self):
         return "Restore master backup in slave..."
 
@@ -780,6 +788,8 @@ class NewVolumeFromMaster(NewVolume):
     
 
 class NewVolumeFromSnapshot(NewVolume):
+    parallel_safe = True
+
     def __unicode__(self):
         return 'New Volume from last Snapshot...'
     
@@ -822,6 +832,9 @@ class NewVolumeFromSnapshot(NewVolume):
 
 
 class NewVolumeOnSlaveMigrate(NewVolumeMigrate):
+    # every instance points to the same slave host
+    parallel_safe = False
+
     @property
     def host(self):
         master_instance = self.driver.get_master_instance()
@@ -854,6 +867,9 @@ class NewVolumeOnSlaveMigrateFirstNode(VolumeProviderBase):
 
 
 class RemoveVolumeMigrate(NewVolumeMigrate):
+    # every instance points to the same slave host
+    parallel_safe = False
+
     def __unicode__(self):
         return "Removing second volume based on snapshot for migrate..."
 
@@ -897,6 +913,8 @@ class RemoveVolumeMigrateLastNode(VolumeProviderBase):
 
 
 class NewInactiveVolume(NewVolume):
+    parallel_safe = True
+
     def __unicode__(self):
         return "Creating Inactive Volume..."
 
@@ -2898,6 +2916,8 @@ class UmountDataLatestVolumeMigrate(UnmountDataLatestVolume):
 
 
 class NewVolumeMigrateOriginalHost(NewVolumeMigrate):
+    parallel_safe = True
+
     @property
     def is_valid(self):
         if not super(NewVolumeMigrateOriginalHost, self).is_valid\
@@ -2916,6 +2936,7 @@ class NewVolumeMigrateOriginalHost(NewVolumeMigrate):
 
 
 class DeleteVolumeMigrateOriginalHost(NewVolumeMigrateOriginalHost):
+    parallel_safe = True
 
     def __unicode__(self):
         return "Delete volume migrate..."
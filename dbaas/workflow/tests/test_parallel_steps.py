@@ -0,0 +1,233 @@
+import threading
+import time
+
+from django.test import TestCase
+from mock import patch
+
+from workflow.workflow import is_parallel_group, steps_for_instances
+
+
+CALLS = []
+CALLS_LOCK = threading.Lock()
+FAIL_ON = set()
+BUSY_HOSTS = set()
+SHARED_HOST_RUNS = []
+
+
+class FakeInstance(object):
+
+    def __init__(self, name, dns=None):
+        self.name = name
+        self.dns = dns or name
+
+    def __str__(self):
+        return self.name
+
+
+class FakeStep(object):
+    parallel_safe = False
+    can_run = True
+    wait = 0
+
+    def __init__(self, instance):
+        self.instance = instance
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def do(self):
+        time.sleep(self.wait)
+        with CALLS_LOCK:
+            CALLS.append((str(self), str(self.instance)))
+        if (str(self), str(self.instance)) in FAIL_ON:
+            raise Exception('{} failed'.format(self))
+
+    def undo(self):
+        self.do()
+
+
+class SerialStep(FakeStep):
+    pass
+
+
+class ParallelStep(FakeStep):
+    parallel_safe = True
+    wait = 0.3
+
+
+class OtherParallelStep(FakeStep):
+    parallel_safe = True
+
+
+class SharedHostStep(FakeStep):
+    parallel_safe = True
+    wait = 0.1
+
+    def do(self):
+        with CALLS_LOCK:
+            SHARED_HOST_RUNS.append(self.instance.dns in BUSY_HOSTS)
+            BUSY_HOSTS.add(self.instance.dns)
+        try:
+            super(SharedHostStep, self).do()
+        finally:
+            with CALLS_LOCK:
+                BUSY_HOSTS.discard(self.instance.dns)
+
+
+class FakeTask(object):
+
+    def __init__(self):
+        self.lines = []
+
+    def add_detail(self, message, level=None):
+        self.lines.append(message)
+
+    def add_step(self, step, total, message):
+        self.lines.append('{} of {} - {}'.format(step, total, message))
+
+    def update_details(self, message, persist=False):
+        self.lines[-1] = '{} {}'.format(self.lines[-1], message)
+
+
+STEPS = 'workflow.tests.test_parallel_steps.{}'
+
+
+@patch('workflow.workflow.lock_databases_for', return_value=(True, []))
+class ParallelStepsTestCase(TestCase):
+
+    def setUp(self):
+        CALLS[:] = []
+        FAIL_ON.clear()
+        SHARED_HOST_RUNS[:] = []
+        self.task = FakeTask()
+        self.instances = [FakeInstance('node{}'.format(i)) for i in range(3)]
+        self.counter = []
+
+    def step_counter(self, step, name=None):
+        self.counter.append(step)
+
+    def run_steps(self, steps, since_step=0):
+        groups = [{'Group': [STEPS.format(step) for step in steps]}]
+        return steps_for_instances(
+            groups, self.instances, self.task, self.step_counter,
+            since_step=since_step
+        )
+
+    def test_parallel_group(self, lock):
+        parallel = [STEPS.format(step) for step in (
+            'ParallelStep', 'OtherParallelStep'
+        )]
+        mixed = parallel + [STEPS.format('SerialStep')]
+
+        self.assertTrue(is_parallel_group(parallel))
+        self.assertFalse(is_parallel_group(mixed))
+
+    def test_parallel_steps_run_at_once(self, lock):
+        started_at = time.time()
+        self.assertTrue(self.run_steps(['ParallelStep']))
+
+        self.assertLess(time.time() - started_at, 0.3 * 3)
+        self.assertEqual(len(CALLS), 3)
+        self.assertEqual(self.counter, [1, 1, 2, 3])
+        self.assertIn('1 of 3 - ParallelStep SUCCESS!', self.task.lines)
+        self.assertIn('3 of 3 - ParallelStep SUCCESS!', self.task.lines)
+
+    def test_mixed_group_runs_as_serial(self, lock):
+        self.assertTrue(self.run_steps(['OtherParallelStep', 'SerialStep']))
+
+        steps = [line for line in self.task.lines if ' of 6 - ' in line]
+        self.assertEqual(steps, [
+            '1 of 6 - OtherParallelStep SUCCESS!',
+            '2 of 6 - SerialStep SUCCESS!',
+            '3 of 6 - OtherParallelStep SUCCESS!',
+            '4 of 6 - SerialStep SUCCESS!',
+            '5 of 6 - OtherParallelStep SUCCESS!',
+            '6 of 6 - SerialStep SUCCESS!',
+        ])
+        self.assertEqual(self.counter, [1, 2, 3, 4, 5, 6])
+
+    @patch('workflow.workflow.time.sleep')
+    def test_retry_after_serial_failure(self, sleep, lock):
+        FAIL_ON.add(('SerialStep', 'node0'))
+        self.assertFalse(self.run_steps(['OtherParallelStep', 'SerialStep']))
+        self.assertEqual(self.counter[-1], 2)
+        self.assertEqual(CALLS, [
+            ('OtherParallelStep', 'node0'), ('SerialStep', 'node0'),
+        ])
+
+        CALLS[:] = []
+        FAIL_ON.clear()
+        self.assertTrue(self.run_steps(
+            ['OtherParallelStep', 'SerialStep'], since_step=self.counter[-1]
+        ))
+
+        self.assertEqual(CALLS, [
+            ('SerialStep', 'node0'),
+            ('OtherParallelStep', 'node1'), ('SerialStep', 'node1'),
+            ('OtherParallelStep', 'node2'), ('SerialStep', 'node2'),
+        ])
+
+    def test_instances_on_same_host_run_in_order(self, lock):
+        self.instances = [
+            FakeInstance('redis0', dns='vm0'),
+            FakeInstance('sentinel0', dns='vm0'),
+            FakeInstance('redis1', dns='vm1'),
+        ]
+
+        self.assertTrue(self.run_steps(['SharedHostStep']))
+
+        self.assertEqual(SHARED_HOST_RUNS, [False, False, False])
+        self.assertLess(
+            CALLS.index(('SharedHostStep', 'redis0')),
+            CALLS.index(('SharedHostStep', 'sentinel0'))
+        )
+        self.assertIn('Running 1 step(s) in parallel for 2 hosts',
+                      self.task.lines)
+
+    @patch('workflow.workflow.time.sleep')
+    def test_failure_stops_instances_on_same_host(self, sleep, lock):
+        self.instances = [
+            FakeInstance('redis0', dns='vm0'),
+            FakeInstance('redis1', dns='vm1'),
+            FakeInstance('sentinel0', dns='vm0'),
+        ]
+        FAIL_ON.add(('OtherParallelStep', 'redis0'))
+
+        self.assertFalse(self.run_steps(['OtherParallelStep']))
+
+        self.assertNotIn(('OtherParallelStep', 'sentinel0'), CALLS)
+        self.assertIn('1 of 3 - OtherParallelStep FAILED!', self.task.lines)
+
+    def test_since_step(self, lock):
+        self.assertTrue(self.run_steps(['OtherParallelStep'], since_step=3))
+
+        self.assertEqual(sorted(CALLS), [
+            ('OtherParallelStep', 'node2'),
+        ])
+        self.assertIn('2 of 3 - OtherParallelStep SKIPPED!', self.task.lines)
+
+    @patch('workflow.workflow.time.sleep')
+    def test_failure_reports_first_step(self, sleep, lock):
+        FAIL_ON.add(('OtherParallelStep', 'node1'))
+        FAIL_ON.add(('OtherParallelStep', 'node2'))
+
+        self.assertFalse(self.run_steps(['OtherParallelStep', 'ParallelStep']))
+
+        self.assertEqual(self.counter[-1], 3)
+        self.assertIn('3 of 6 - OtherParallelStep FAILED!', self.task.lines)
+        self.assertNotIn('5 of 6 - OtherParallelStep FAILED!', self.task.lines)
+        self.assertNotIn(('ParallelStep', 'node1'), CALLS)
+
+    def test_undo_keeps_groups_order(self, lock):
+        groups = [
+            {'Group 1': [STEPS.format('SerialStep')]},
+            {'Group 2': [STEPS.format('OtherParallelStep')]},
+        ]
+        expected = [dict(group) for group in groups]
+
+        self.assertTrue(steps_for_instances(
+            groups, self.instances, self.task, undo=True
+        ))
+
+        self.assertEqual(groups, expected)
+        self.assertEqual(CALLS[0][0], 'OtherParallelStep')
@@ -0,0 +1,83 @@
+from unittest import TestCase
+
+from mock import patch, MagicMock
+
+from util import providers
+from workflow.plan import StepPlan, compile_plan
+from workflow.tests.test_parallel_steps import SerialStep, ParallelStep
+
+
+STEPS = 'workflow.tests.test_parallel_steps.{}'
+GROUPS = [
+    {'Group 1': (STEPS.format('SerialStep'), STEPS.format('ParallelStep'))},
+    {'Group 2': (STEPS.format('SerialStep'),)},
+]
+
+
+class StepPlanTestCase(TestCase):
+
+    def test_resolves_classes_once(self):
+        plan = StepPlan(GROUPS)
+
+        self.assertEqual(plan.classes, {
+            STEPS.format('SerialStep'): SerialStep,
+            STEPS.format('ParallelStep'): ParallelStep,
+        })
+        self.assertEqual(plan.descriptions, ['Group 1', 'Group 2'])
+        self.assertEqual(plan.steps_per_instance, 3)
+        self.assertEqual(plan.total_of_steps([1, 2]), 6)
+        self.assertTrue(plan.is_parallel_safe(STEPS.format('ParallelStep')))
+        self.assertFalse(plan.is_parallel_safe(STEPS.format('SerialStep')))
+
+    def test_is_still_the_list_of_groups(self):
+        plan = StepPlan(GROUPS)
+
+        self.assertEqual(plan, GROUPS)
+        self.assertIs(compile_plan(plan), plan)
+
+    def test_invalid_step_fails_when_used(self):
+        plan = StepPlan([{'Group': (STEPS.format('InvalidStep'),)}])
+
+        self.assertFalse(plan.is_parallel_safe(STEPS.format('InvalidStep')))
+        with self.assertRaises(Exception):
+            plan.step_class(STEPS.format('InvalidStep'))
+
+    def test_copy(self):
+        plan = StepPlan(GROUPS)
+        plan_copy = plan.copy()
+        plan_copy.reverse()
+
+        self.assertEqual(plan, GROUPS)
+        self.assertIs(plan_copy.classes, plan.classes)
+        self.assertEqual(plan_copy.steps_per_instance, 3)
+
+
+@patch('util.providers.get_replication_topology_instance')
+class GetStepPlanTestCase(TestCase):
+
+    def setUp(self):
+        providers.STEP_PLANS.clear()
+        self.addCleanup(providers.STEP_PLANS.clear)
+
+    def test_cached_by_topology_and_operation(self, get_topology):
+        get_topology.return_value = MagicMock(
+            get_deploy_steps=MagicMock(return_value=GROUPS),
+            get_destroy_steps=MagicMock(return_value=GROUPS[:1]),
+        )
+
+        deploy = providers.get_deploy_settings('fake.Topology')
+        self.assertEqual(providers.get_deploy_settings('fake.Topology'), deploy)
+        destroy = providers.get_destroy_settings('fake.Topology')
+
+        self.assertEqual(deploy, GROUPS)
+        self.assertEqual(destroy, GROUPS[:1])
+        self.assertEqual(get_topology.call_count, 2)
+
+    def test_returns_copies(self, get_topology):
+        get_topology.return_value = MagicMock(
+            get_deploy_steps=MagicMock(return_value=list(GROUPS))
+        )
+
+        providers.get_deploy_settings('fake.Topology').reverse()
+
+        self.assertEqual(providers.get_deploy_settings('fake.Topology'), GROUPS)
@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
 import logging
 import time
+from collections import OrderedDict
 from util import full_stack
-from django.utils.module_loading import import_by_path
 from exceptions.error_codes import DBAAS_0001
 from logical.models import Database
 from physical.models import DatabaseInfra, Instance
 from system.models import Configuration
-from copy import copy
+from util.concurrency import DEFAULT_WORKERS, parallel_map
+from plan import compile_plan
 
 LOG = logging.getLogger(__name__)
 
@@ -75,6 +76,221 @@ def steps_for_instances_with_rollback(group_of_steps, instances, task):
     return False
 
 
+class StepRun(object):
+
+    def __init__(self, number, step, instance):
+        self.number = number
+        self.step = step
+        self.instance = instance
+        self.step_instance = None
+        self.name = None
+        self.skipped = False
+        self.retries = 0
+        self.error = None
+        self.stack = None
+
+
+def is_parallel_group(steps, plan=None):
+    """
+    A group runs in parallel only when all of its steps are parallel safe,
+    so the steps always run in the order of their numbers and a retry
+    from a failed step never repeats the steps before it.
+    """
+    plan = plan or compile_plan([{'': steps}])
+    # steps that can not be loaded are reported by the serial run
+    return all(plan.is_parallel_safe(step) for step in steps)
+
+
+def host_key(instance):
+    """
+    Instances on the same host, as redis and its sentinel, have to run
+    one after the other, each one seeing what the steps did for the
+    previous. Before the vm is created they only share the vm name.
+    """
+    if getattr(instance, 'hostname_id', None):
+        return 'host:{}'.format(instance.hostname_id)
+    return 'dns:{}'.format(getattr(instance, 'vm_name', None) or instance.dns)
+
+
+def runs_by_host(instances, runs):
+    hosts = OrderedDict()
+    for instance, instance_runs in zip(instances, runs):
+        hosts.setdefault(host_key(instance), []).append(instance_runs)
+    return hosts.values()
+
+
+class StepRunner(object):
+    """
+    Runs a group of steps for all instances. Step numbers are always the
+    ones of the sequential order, instance by instance, so
+    step_counter_method and since_step behave the same no matter if the
+    group ran in serial or in parallel.
+
+    Parallel steps run in worker threads, one host at a time per worker,
+    that do not touch the task; their results are written on it
+    afterwards, in step order.
+    """
+
+    def __init__(self, plan, task, steps_total, since_step=0, undo=False,
+                 step_manager=None, step_counter_method=None):
+        self.plan = plan
+        self.task = task
+        self.steps_total = steps_total
+        self.since_step = since_step
+        self.undo = undo
+        self.step_manager = step_manager
+        self.step_counter_method = step_counter_method
+        self.step_max_retry = Configuration.get_by_name_as_int(
+            'max_step_retry', 0
+        ) + 1
+        self.workers = Configuration.get_by_name_as_int(
+            'parallel_steps_workers', default=DEFAULT_WORKERS
+        )
+
+    def runs_for(self, instances, steps, group_step):
+        return [[
+            StepRun(
+                group_step + (index * len(steps)) + position + 1,
+                step, instance
+            ) for position, step in enumerate(steps)
+        ] for index, instance in enumerate(instances)]
+
+    def prepare(self, run):
+        step_class = self.plan.step_class(run.step)
+        run.step_instance = step_class(run.instance)
+        if self.step_manager:
+            run.step_instance.step_manager = self.step_manager
+        run.name = str(run.step_instance)
+        if self.undo:
+            run.name = 'Rollback ' + run.name
+
+    def must_skip(self, run):
+        return run.number < self.since_step or not run.step_instance.can_run
+
+    def execute(self, run, on_retry=None):
+        for retry in range(1, 1 + self.step_max_retry):
+            run.step_instance.attempt = retry
+            try:
+                if self.undo:
+                    run.step_instance.undo()
+                else:
+                    run.step_instance.do()
+            except Exception as e:
+                if retry == self.step_max_retry:
+                    run.error = str(e)
+                    run.stack = full_stack()
+                    return
+                run.retries = retry
+                if on_retry:
+                    on_retry(run, retry)
+                LOG.debug(str(e))
+                LOG.debug(full_stack())
+                time.sleep(3 * retry)
+            else:
+                return
+
+    def count(self, run):
+        if self.step_counter_method:
+            self.step_counter_method(run.number, run.step)
+
+    def retrying(self, run, retry):
+        self.task.update_details("FAILED! Retrying ({}/{})...".format(
+            retry, self.step_max_retry - 1
+        ))
+        self.task.add_step(run.number, self.steps_total, run.name)
+
+    def write_details(self, run):
+        for detail in getattr(run.step_instance, 'details', []):
+            self.task.add_detail(detail, level=3)
+
+    def failed(self, error, stack):
+        self.task.update_details("FAILED!", persist=True)
+        self.task.add_detail(error)
+        self.task.add_detail(stack)
+
+    def run_serial(self, instances, steps, group_step):
+        runs = self.runs_for(instances, steps, group_step)
+        for instance, instance_runs in zip(instances, runs):
+            self.task.add_detail('Instance: {}'.format(instance))
+            for run in instance_runs:
+                self.count(run)
+                try:
+                    self.prepare(run)
+                    self.task.add_step(run.number, self.steps_total, run.name)
+                    if self.must_skip(run):
+                        self.task.update_details("SKIPPED!", persist=True)
+                        continue
+                except Exception as e:
+                    self.failed(str(e), full_stack())
+                    return False
+
+                self.execute(run, on_retry=self.retrying)
+                self.write_details(run)
+                if run.error:
+                    self.failed(run.error, run.stack)
+                    return False
+                self.task.update_details("SUCCESS!", persist=True)
+        return True
+
+    def _execute_instance(self, instance_runs):
+        for run in instance_runs:
+            try:
+                if self.must_skip(run):
+                    run.skipped = True
+                    continue
+            except Exception as e:
+                run.error = str(e)
+                run.stack = full_stack()
+                return instance_runs
+            self.execute(run)
+            if run.error:
+                break
+        return instance_runs
+
+    def _execute_host(self, host_runs):
+        for instance_runs in host_runs:
+            self._execute_instance(instance_runs)
+            if any(run.error for run in instance_runs):
+                break
+        return host_runs
+
+    def run_parallel(self, instances, steps, group_step):
+        runs = self.runs_for(instances, steps, group_step)
+        hosts = runs_by_host(instances, runs)
+        if len(hosts) < 2:
+            return self.run_serial(instances, steps, group_step)
+        try:
+            for instance_runs in runs:
+                for run in instance_runs:
+                    self.prepare(run)
+        except Exception:
+            return self.run_serial(instances, steps, group_step)
+
+        # a crash while the workers run resumes from the group start
+        self.count(runs[0][0])
+        self.task.add_detail('Running {} step(s) in parallel for {} '
+                             'hosts'.format(len(steps), len(hosts)))
+        parallel_map(self._execute_host, hosts, self.workers)
+
+        # runs left out after a failure on the same host come after it
+        for instance, instance_runs in zip(instances, runs):
+            self.task.add_detail('Instance: {}'.format(instance))
+            for run in instance_runs:
+                self.count(run)
+                self.task.add_step(run.number, self.steps_total, run.name)
+                if run.skipped:
+                    self.task.update_details("SKIPPED!", persist=True)
+                    continue
+                for retry in range(1, run.retries + 1):
+                    self.retrying(run, retry)
+                self.write_details(run)
+                if run.error:
+                    self.failed(run.error, run.stack)
+                    return False
+                self.task.update_details("SUCCESS!", persist=True)
+        return True
+
+
 def steps_for_instances(
         list_of_groups_of_steps, instances, task, step_counter_method=None,
         since_step=0, undo=False, step_manager=None
@@ -88,84 +304,40 @@ def steps_for_instances(
     if not success:
         return False
 
-    steps_total = total_of_steps(list_of_groups_of_steps, instances)
+    plan = compile_plan(list_of_groups_of_steps)
+    steps_total = plan.total_of_steps(instances)
     step_current = 0
 
     step_header_for(task, instances, since_step)
 
+    groups = plan.groups
     if undo:
-        list_of_groups_of_steps.reverse()
+        groups.reverse()
 
-    step_max_retry = Configuration.get_by_name_as_int('max_step_retry', 0) + 1
+    runner = StepRunner(
+        plan, task, steps_total, since_step, undo, step_manager,
+        step_counter_method
+    )
 
-    for count, group_of_steps in enumerate(list_of_groups_of_steps, start=1):
+    for count, (name, steps) in enumerate(groups, start=1):
         task.add_detail('Starting group of steps {} of {} - {}'.format(
-            count, len(list_of_groups_of_steps), group_of_steps.keys()[0])
+            count, len(groups), name)
         )
 
-        steps = list(group_of_steps.items()[0][1])
+        steps = list(steps)
         if undo:
             steps.reverse()
 
-        for instance in instances:
-            task.add_detail('Instance: {}'.format(instance))
-            for step in steps:
-                step_current += 1
-
-                if step_counter_method:
-                    step_counter_method(step_current, step)
-
-                try:
-                    step_class = import_by_path(step)
-                    step_instance = step_class(instance)
-                    if step_manager:
-                        step_instance.step_manager = step_manager
-                    str_step_instance = str(step_instance)
-                    if undo:
-                        str_step_instance = 'Rollback ' + str_step_instance
-
-                    task.add_step(step_current, steps_total, str_step_instance)
-
-                    if step_current < since_step or not step_instance.can_run:
-                        task.update_details("SKIPPED!", persist=True)
-                        continue
-                except Exception as e:
-                    task.update_details("FAILED!", persist=True)
-                    task.add_detail(str(e))
-                    task.add_detail(full_stack())
-                    return False
-
-                for retry in range(1, 1 + step_max_retry):
-                    step_instance.attempt = retry
-                    try:
-                        if undo:
-                            step_instance.undo()
-                        else:
-                            step_instance.do()
-                    except Exception as e:
-                        if retry == step_max_retry:
-                            task.update_details("FAILED!", persist=True)
-                            task.add_detail(str(e))
-                            task.add_detail(full_stack())
-                            return False
-                        else:
-                            task.update_details(
-                                "FAILED! Retrying ({}/{})...".format(
-                                    retry, step_max_retry - 1
-                                )
-                            )
-                            LOG.debug(str(e))
-                            LOG.debug(full_stack())
-                            time.sleep(3 * retry)
-                            task.add_step(
-                                step_current, steps_total, str_step_instance
-                            )
-                    else:
-                        task.update_details("SUCCESS!", persist=True)
-                        break
+        run_group = runner.run_serial
+        if (runner.workers > 1 and len(instances) > 1
+                and is_parallel_group(steps, plan)):
+            run_group = runner.run_parallel
+        if not run_group(instances, steps, step_current):
+            return False
+        step_current += len(steps) * len(instances)
 
         task.add_detail('Ending group of steps: {} of {}\n'.format(
-            count, len(list_of_groups_of_steps))
+            count, len(groups))
         )
 
     unlock_databases(locked_databases)
@@ -177,7 +349,8 @@ def rollback_for_instances(group_of_steps, instances, task, from_step):
         task.add_detail('Rollback is implemented only for one group of steps!')
         return False
 
-    steps = group_of_steps[0].items()[0][1]
+    plan = compile_plan(group_of_steps)
+    steps = plan.groups[0][1]
     i = 0
     for instance in instances:
         instance_current_step = 0
@@ -194,7 +367,7 @@ def rollback_for_instances(group_of_steps, instances, task, from_step):
     undo_step_current = len(steps)
     for step in reversed(steps):
         try:
-            step_class = import_by_path(step)
+            step_class = plan.step_class(step)
             step_instance = step_class(instance)
 
             task.add_step(
@@ -253,11 +426,7 @@ def unlock_databases_for(instances):
 
 
 def total_of_steps(groups, instances):
-    total = 0
-    for group in groups:
-        total += len(group.values()[0])
-
-    return total * len(instances)
+    return compile_plan(groups).total_of_steps(instances)
 
 
 def step_header_for(task, instances, since_step=None):
@@ -295,17 +464,18 @@ def rollback_for_instances_full(groups, instances, task, step_current_method,
 def get_current_step_for_instances(
     list_of_groups_of_steps, instances, current_step, undo=False):
 
-    groups_of_steps = copy(list_of_groups_of_steps)
+    plan = compile_plan(list_of_groups_of_steps)
+    groups_of_steps = plan.groups
     if undo:
         groups_of_steps.reverse()
-        steps_total = total_of_steps(groups_of_steps, instances)
+        steps_total = plan.total_of_steps(instances)
         since_step = (steps_total - current_step) + 1
     else:
         since_step = current_step
 
     step_current = 0
-    for group_of_steps in groups_of_steps:
-        steps = list(group_of_steps.items()[0][1])
+    for _, steps in groups_of_steps:
+        steps = list(steps)
         if undo:
             steps.reverse()
         for instance in instances: